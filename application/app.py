@@ -2,7 +2,6 @@ import streamlit as st
 from PIL import Image
 from utils.streamlit_utils import hide_icons, hide_sidebar, remove_whitespaces
 from streamlit_extras.switch_page_button import switch_page
-from web3 import Web3
 
 if __name__ == '__main__':
     st.set_page_config(
@@ -11,9 +10,6 @@ if __name__ == '__main__':
         layout="wide"
     )
 
-# Initialize Web3 connection
-web3 = Web3(Web3.HTTPProvider('http://127.0.0.1:7545'))  # adjust URL if needed
-
 hide_icons()
 hide_sidebar()
 remove_whitespaces()
@@ -0,0 +1,197 @@
+"""
+Verify a directory or ZIP archive of certificate PDFs in one go.
+
+QR codes are decoded in a process pool, the decoded certificates are
+checked against the chain with batched reads, and one report row per file
+is written as soon as its chunk finishes.
+
+Run from the application directory:
+    python batch_verify.py certificates.zip --report report.csv
+    python batch_verify.py ./received --report report.json --processes 4
+"""
+import argparse
+import csv
+import json
+import os
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+from connection import reader
+from utils.verify_utils import check_merkle_proof, extract_qr_code_from_pdf, match_details
+
+REPORT_FIELDS = ("file", "status", "certificate_id", "detail", "decode_ms", "verify_ms")
+
+
+def iter_pdfs(source):
+    """Yield (name, path or bytes) for every PDF in a directory tree or ZIP archive"""
+    if zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as archive:
+            for info in archive.infolist():
+                if not info.is_dir() and info.filename.lower().endswith(".pdf"):
+                    yield info.filename, archive.read(info)
+    elif os.path.isdir(source):
+        for root, _, files in os.walk(source):
+            for name in sorted(files):
+                if name.lower().endswith(".pdf"):
+                    path = os.path.join(root, name)
+                    yield os.path.relpath(path, source), path
+    else:
+        raise ValueError(f"{source} is neither a directory nor a ZIP archive")
+
+
+def _decode(item):
+    """Runs in a worker process; returns (name, qr_data, decode seconds)"""
+    name, pdf = item
+    start = time.perf_counter()
+    qr_data = extract_qr_code_from_pdf(pdf)
+    return name, qr_data, time.perf_counter() - start
+
+
+def _chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def verify_decoded(decoded):
+    """
+    Verify a chunk of (name, qr_data, decode_seconds) with batched chain
+    reads; returns one report row per file, in order.
+    """
+    start = time.perf_counter()
+    rows = []
+    calls = []
+    pending = []
+    for name, qr_data, decode_seconds in decoded:
+        row = {"file": name, "status": "", "certificate_id": "", "detail": "",
+               "decode_ms": round(decode_seconds * 1000, 1), "verify_ms": 0.0}
+        rows.append(row)
+        if not isinstance(qr_data, dict) or "certificate_id" not in qr_data:
+            row.update(status="no_qr", detail="No valid QR code found")
+            continue
+        row["certificate_id"] = qr_data["certificate_id"]
+        if "merkle_root" in qr_data:
+            try:
+                leaf, reason = check_merkle_proof(qr_data)
+            except (KeyError, ValueError) as e:
+                leaf, reason = None, f"Malformed QR payload: {e}"
+            if leaf is None:
+                row.update(status="invalid", detail=reason)
+                continue
+            pending.append((row, qr_data, len(calls)))
+            calls.append(("merkleRoots", (bytes.fromhex(qr_data["merkle_root"]),)))
+            calls.append(("revokedLeaves", (bytes.fromhex(leaf),)))
+        else:
+            pending.append((row, qr_data, len(calls)))
+            calls.append(("getCertificate", (qr_data["certificate_id"],)))
+
+    try:
+        results = reader.call_many(calls)
+    except Exception as e:
+        for row, _, _ in pending:
+            row.update(status="error", detail=str(e))
+        return rows
+
+    for row, qr_data, index in pending:
+        if "merkle_root" in qr_data:
+            anchored, revoked = results[index], results[index + 1]
+            if not (anchored and anchored[0]):
+                row.update(status="invalid", detail="Certificate batch is not anchored on the blockchain")
+            elif revoked and revoked[0]:
+                row.update(status="invalid", detail="Certificate has been revoked")
+            else:
+                row.update(status="valid")
+            continue
+        try:
+            is_valid, result = match_details(results[index], qr_data)
+        except KeyError as e:
+            is_valid, result = False, f"Malformed QR payload: missing {e}"
+        row.update(status="valid" if is_valid else "invalid", detail="" if is_valid else result)
+
+    # One batched read covers the whole chunk; every row reports its duration
+    verify_ms = round((time.perf_counter() - start) * 1000, 1)
+    for row in rows:
+        if row["status"] != "no_qr":
+            row["verify_ms"] = verify_ms
+    return rows
+
+
+def verify_batch(source, processes=None, chunk_size=64):
+    """
+    Yield a report row (dict with REPORT_FIELDS) for every PDF under
+    `source`, a directory or ZIP path. Files are decoded and verified a
+    chunk at a time, so rows arrive while later files are still pending.
+    """
+    with ProcessPoolExecutor(max_workers=processes or os.cpu_count() or 1) as executor:
+        previous = None
+        for chunk in _chunks(iter_pdfs(source), chunk_size):
+            # map submits the whole chunk at once, so it decodes while the previous chunk is verified
+            current = executor.map(_decode, chunk)
+            if previous is not None:
+                yield from verify_decoded(list(previous))
+            previous = current
+        if previous is not None:
+            yield from verify_decoded(list(previous))
+
+
+class ReportWriter:
+    """Writes rows as CSV or as a JSON array, flushing after every row"""
+
+    def __init__(self, file, report_format="csv"):
+        self.file = file
+        self.report_format = report_format
+        self.count = 0
+        if report_format == "csv":
+            self._csv = csv.DictWriter(file, fieldnames=REPORT_FIELDS)
+            self._csv.writeheader()
+        else:
+            file.write("[\n")
+
+    def write(self, row):
+        if self.report_format == "csv":
+            self._csv.writerow(row)
+        else:
+            self.file.write((",\n" if self.count else "") + json.dumps(row))
+        self.count += 1
+        self.file.flush()
+
+    def close(self):
+        if self.report_format != "csv":
+            self.file.write("\n]\n")
+        self.file.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", help="directory or ZIP archive of certificate PDFs")
+    parser.add_argument("--report", default="verification_report.csv", help="report file, .csv or .json")
+    parser.add_argument("--format", choices=["csv", "json"], help="report format; inferred from --report when omitted")
+    parser.add_argument("--processes", type=int, help="QR decoding processes, defaults to the CPU count")
+    parser.add_argument("--chunk-size", type=int, default=64, help="files decoded and verified per batch")
+    args = parser.parse_args()
+
+    report_format = args.format or ("json" if args.report.lower().endswith(".json") else "csv")
+    output = open(args.report, "w", newline="", encoding="utf-8")
+    writer = ReportWriter(output, report_format)
+    counts = {}
+    start = time.perf_counter()
+    try:
+        for row in verify_batch(args.source, processes=args.processes, chunk_size=args.chunk_size):
+            writer.write(row)
+            counts[row["status"]] = counts.get(row["status"], 0) + 1
+    finally:
+        writer.close()
+        output.close()
+    elapsed = time.perf_counter() - start
+    summary = ", ".join(f"{count} {status}" for status, count in sorted(counts.items()))
+    print(f"Verified {writer.count} files in {elapsed:.1f}s: {summary or 'nothing found'}. Report written to {args.report}")
+
+
+if __name__ == "__main__":
+    main()
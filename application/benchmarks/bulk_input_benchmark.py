@@ -0,0 +1,127 @@
+"""
+Time and peak memory of reading a bulk upload. Generates an N-row XLSX,
+DOCX and CSV file, then reads each in a fresh process with the previous
+path (pd.read_excel / python-docx into a DataFrame, then a row per
+iterrows) and with the streaming readers in utils.bulk_input. Peak
+memory is the process's resident set high-water mark (Linux VmHWM) above
+what it used after imports, so parsers implemented in C (lxml) are
+counted too.
+
+Run from the application directory:
+    python -m benchmarks.bulk_input_benchmark --rows 100000
+"""
+import argparse
+import csv
+import io
+import multiprocessing
+import os
+import tempfile
+import time
+
+import pandas as pd
+from docx import Document
+from openpyxl import Workbook
+
+from utils.bulk_input import BULK_FILE_TYPES, normalize_column_name, read_bulk_rows
+
+HEADER = ["Registration No", "Full Name", "Course", "Email"]
+
+
+def sample_row(index):
+    return [f"SC/BENCH/{index}/26", f"Student Number {index}", "Computer Science", f"student{index}@example.com"]
+
+
+def write_files(directory, rows):
+    paths = {}
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(HEADER)
+    for index in range(rows):
+        sheet.append(sample_row(index))
+    paths["Excel"] = os.path.join(directory, "bulk.xlsx")
+    workbook.save(paths["Excel"])
+
+    document = Document()
+    table = document.add_table(rows=rows + 1, cols=len(HEADER))
+    for row, values in zip(table.rows, [HEADER] + [sample_row(index) for index in range(rows)]):
+        for cell, value in zip(row.cells, values):
+            cell.text = value
+    paths["DOCX"] = os.path.join(directory, "bulk.docx")
+    document.save(paths["DOCX"])
+
+    paths["CSV"] = os.path.join(directory, "bulk.csv")
+    with open(paths["CSV"], "w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(HEADER)
+        writer.writerows(sample_row(index) for index in range(rows))
+    return paths
+
+
+def read_previous(file, file_type):
+    """The page's previous path: the whole file into a DataFrame, renamed, then iterated"""
+    if file_type == "Excel":
+        df = pd.read_excel(file)
+    elif file_type == "DOCX":
+        doc = Document(file)
+        data = []
+        keys = None
+        for i, table in enumerate(doc.tables):
+            for row in table.rows:
+                text = (cell.text for cell in row.cells)
+                if i == 0 and keys is None:
+                    keys = tuple(text)
+                    continue
+                data.append(dict(zip(keys, text)))
+        df = pd.DataFrame(data)
+    else:
+        df = pd.read_csv(file)
+    df = df.rename(columns=normalize_column_name)
+    return (row for _, row in df.iterrows())
+
+
+def peak_rss_mb():
+    # ru_maxrss is inherited from the parent process, VmHWM starts afresh in the child
+    with open("/proc/self/status") as status:
+        line = next(line for line in status if line.startswith("VmHWM:"))
+    return int(line.split()[1]) / 1024
+
+
+def measure(path, file_type, streaming, results):
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    # Uploads reach the page as in-memory files
+    with open(path, "rb") as handle:
+        file = io.BytesIO(handle.read())
+    rows = read_bulk_rows(file, file_type) if streaming else read_previous(file, file_type)
+    count = sum(1 for _ in rows)
+    elapsed = time.perf_counter() - start
+    results.put((count, elapsed, peak_rss_mb() - baseline))
+
+
+def run(path, file_type, streaming):
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    process = context.Process(target=measure, args=(path, file_type, streaming, results))
+    process.start()
+    result = results.get()
+    process.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = write_files(directory, args.rows)
+        for extension, file_type in BULK_FILE_TYPES.items():
+            size = os.path.getsize(paths[file_type]) / 2 ** 20
+            print(f"{extension} ({size:.1f} MB on disk)")
+            for label, streaming in (("previous", False), ("streaming", True)):
+                count, elapsed, peak = run(paths[file_type], file_type, streaming)
+                print(f"  {label:>9}: {count} rows in {elapsed:.1f}s | {count / elapsed:.0f} rows/s | peak +{peak:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Certificate email throughput against a local SMTP stand-in (aiosmtpd, not
+part of the app's requirements: pip install aiosmtpd). The previous
+sender opened, greeted and quit a connection per message; the outbox
+reuses pooled connections and retries transient failures in background
+workers. --handshake-latency delays every EHLO to stand in for the TLS
+handshake and login a real provider costs, and --fail-every answers 451
+to every Nth message to exercise retries.
+
+Run from the application directory:
+    python -m benchmarks.email_benchmark --count 200 --handshake-latency 0.1
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import smtplib
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from aiosmtpd.controller import Controller
+
+from utils.email_utils import SENT_STATUS, EmailOutbox, SMTPPool, certificate_email
+
+SENDER = "institute@example.com"
+
+
+class Handler:
+    def __init__(self, handshake_latency, fail_every):
+        self.handshake_latency = handshake_latency
+        self.fail_every = fail_every
+        self.connections = 0
+        self.attempts = 0
+        self.delivered = 0
+        self._lock = threading.Lock()
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        self.connections += 1
+        await asyncio.sleep(self.handshake_latency)
+        session.host_name = hostname
+        return responses
+
+    async def handle_DATA(self, server, session, envelope):
+        with self._lock:
+            self.attempts += 1
+            if self.fail_every and self.attempts % self.fail_every == 0:
+                return "451 Temporary local problem, try again"
+            self.delivered += 1
+        return "250 Message accepted for delivery"
+
+
+def messages(count):
+    return [certificate_email(SENDER, f"student{index}@example.com", f"bench-{index}", f"http://127.0.0.1/ipfs/{index}", "PRIME INSTITUTE")
+            for index in range(count)]
+
+
+def send_per_connection(host, port, message):
+    """The previous sender: a new connection for every message"""
+    try:
+        server = smtplib.SMTP(host, port)
+        server.send_message(message)
+        server.quit()
+        return SENT_STATUS
+    except Exception as e:
+        return f"Failed to send email: {e}"
+
+
+def run(label, handler, send, count):
+    handler.connections = handler.attempts = handler.delivered = 0
+    start = time.perf_counter()
+    # The outbox logs every delivery; keep the benchmark output readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        statuses = send(messages(count))
+    elapsed = time.perf_counter() - start
+    sent = statuses.count(SENT_STATUS)
+    print(f"{label:>24}: {elapsed:6.2f} s | {count / elapsed:6.1f} msg/s | sent {sent}/{count} | "
+          f"{handler.connections} connections, {handler.attempts} DATA attempts")
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=200, help="messages per run")
+    parser.add_argument("--workers", type=int, default=2, help="sending threads, and pooled connections for the outbox")
+    parser.add_argument("--handshake-latency", type=float, default=0.1, help="seconds added to every EHLO")
+    parser.add_argument("--fail-every", type=int, default=0, help="answer 451 to every Nth message")
+    args = parser.parse_args()
+
+    handler = Handler(args.handshake_latency, args.fail_every)
+    host, port = "127.0.0.1", free_port()
+    controller = Controller(handler, hostname=host, port=port)
+    controller.start()
+    try:
+        def previous(batch):
+            with ThreadPoolExecutor(max_workers=args.workers) as executor:
+                return list(executor.map(lambda message: send_per_connection(host, port, message), batch))
+
+        pool = SMTPPool(host, port, starttls=False, size=args.workers)
+        outbox = EmailOutbox(pool, workers=args.workers, backoff=0.05)
+
+        def pooled(batch):
+            futures = [outbox.send(message) for message in batch]
+            wait(futures)
+            return [future.result() for future in futures]
+
+        run("connection per message", handler, previous, args.count)
+        run("pooled outbox", handler, pooled, args.count)
+        pool.close()
+    finally:
+        controller.stop()
+
+
+if __name__ == "__main__":
+    main()
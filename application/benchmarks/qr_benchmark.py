@@ -0,0 +1,106 @@
+"""
+QR extraction cost per certificate for each decoder backend: the previous
+full-page 2x scan against the tiered extraction in utils.qr_utils, on
+born-digital certificates (with and without the metadata shortcut) and on
+"scanned" copies (the page flattened to a single image, so only the image
+paths can apply).
+
+Run from the application directory:
+    python -m benchmarks.qr_benchmark --count 50
+Set QR_DECODER to the fastest backend that decodes every scanned copy.
+"""
+import argparse
+import contextlib
+import io
+import time
+
+import fitz  # PyMuPDF
+
+from utils.cert_utils import CertificateTemplate
+from utils.qr_utils import DECODERS, STRATEGIES, _parse, _pixmap_to_image, decode_qr_payload, get_decoder
+
+TEMPLATE_PATH = "../assets/certificate_template.pdf"
+
+
+def sample_certificate(index):
+    return {
+        'registration_no': f"SC/BENCH/{index}/26",
+        'student_name': f"STUDENT NUMBER {index}",
+        'course_name': "Computer Science",
+        'institution': "PRIME INSTITUTE OF TECHNOLOGY",
+        'issue_date': "2026-01-01"
+    }
+
+
+def flatten(pdf_bytes, dpi=150):
+    """A scanned-looking copy: page 1 rendered to a bitmap and wrapped in a new PDF"""
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as source:
+        page = source[0]
+        pix = page.get_pixmap(dpi=dpi)
+        scanned = fitz.open()
+        scanned.new_page(width=page.rect.width, height=page.rect.height).insert_image(page.rect, pixmap=pix)
+        return scanned.tobytes()
+
+
+def full_page_scan(pdf_bytes, decoder, stats):
+    """The previous extraction: every page at 2x through the decoder"""
+    stats.update(strategy="page", pixels=0)
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as document:
+        for page in document:
+            pix = page.get_pixmap(matrix=fitz.Matrix(2, 2))
+            stats["pixels"] += pix.width * pix.height
+            payload = _parse(decoder.decode(_pixmap_to_image(pix)))
+            if payload:
+                return payload
+    return None
+
+
+def measure(label, extract, pdfs, decoder):
+    decoded = 0
+    pixels = 0
+    strategies = {}
+    start = time.perf_counter()
+    for pdf in pdfs:
+        stats = {}
+        if extract(pdf, decoder=decoder, stats=stats):
+            decoded += 1
+        pixels += stats["pixels"]
+        strategies[stats["strategy"]] = strategies.get(stats["strategy"], 0) + 1
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<22} {elapsed / len(pdfs) * 1000:7.1f} ms | {pixels / len(pdfs) / 1e6:6.2f} MPx | "
+          f"decoded {decoded}/{len(pdfs)} | {strategies}")
+    return elapsed, decoded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=50, help="certificates per run")
+    args = parser.parse_args()
+
+    template = CertificateTemplate(TEMPLATE_PATH)
+    with contextlib.redirect_stdout(io.StringIO()):
+        born_digital = [template.render(sample_certificate(index)) for index in range(args.count)]
+    scanned = [flatten(pdf) for pdf in born_digital]
+
+    image_strategies = [strategy for strategy in STRATEGIES if strategy[0] != "metadata"]
+    best = None
+    for name in DECODERS:
+        try:
+            decoder = get_decoder(name)
+        except Exception as e:
+            print(f"{name}: unavailable ({e})")
+            continue
+        print(name)
+        measure("full page (before)", lambda pdf, **kw: full_page_scan(pdf, kw["decoder"], kw["stats"]), born_digital, decoder)
+        measure("tiered", decode_qr_payload, born_digital, decoder)
+        measure("tiered, images only", lambda pdf, **kw: decode_qr_payload(pdf, strategies=image_strategies, **kw), born_digital, decoder)
+        # Backends only matter when the image has to be decoded, so rank them on scanned copies
+        elapsed, decoded = measure("tiered, scanned copy", decode_qr_payload, scanned, decoder)
+        if decoded == len(scanned) and (best is None or elapsed < best[1]):
+            best = (name, elapsed)
+    if best:
+        print(f"Fastest backend that decoded every scanned copy: QR_DECODER={best[0]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Per-certificate render time with and without the cached certificate template,
+and throughput of the multi-process render pool.
+
+Run from the application directory:
+    python -m benchmarks.render_benchmark --count 1000 --processes 1 2 4
+"""
+import argparse
+import contextlib
+import io
+import os
+import time
+from io import BytesIO
+
+from PyPDF2 import PdfReader, PdfWriter
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+
+from utils.cert_utils import CertificateTemplate, render_overlay
+from utils.render_pool import RenderPool
+
+TEMPLATE_PATH = os.path.join("..", "assets", "certificate_template.pdf")
+
+
+def sample_certificate(index):
+    return {
+        'registration_no': f"SC/BENCH/{index}/26",
+        'student_name': f"STUDENT NUMBER {index}",
+        'course_name': "Computer Science",
+        'institution': "PRIME INSTITUTE OF TECHNOLOGY",
+        'issue_date': "2026-01-01"
+    }
+
+
+def render_uncached(certificate_data):
+    """The previous render path: register fonts, re-parse the template and merge_page for every certificate"""
+    pdfmetrics.registerFont(TTFont('Damion', '../assets/Damion.ttf'))
+    pdfmetrics.registerFont(TTFont('Playball', '../assets/Playball.ttf'))
+    _, overlay = render_overlay(certificate_data)
+    with open(TEMPLATE_PATH, "rb") as template_file:
+        page = PdfReader(template_file).pages[0]
+        page.merge_page(PdfReader(BytesIO(overlay)).pages[0])
+        output = PdfWriter()
+        output.add_page(page)
+        output_buffer = BytesIO()
+        output.write(output_buffer)
+    return output_buffer.getvalue()
+
+
+def time_renders(render, count):
+    durations = []
+    # render_overlay logs every certificate; keep the benchmark output readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        for index in range(count):
+            start = time.perf_counter()
+            render(sample_certificate(index))
+            durations.append(time.perf_counter() - start)
+    return durations
+
+
+def report(label, durations):
+    durations = sorted(durations)
+    total = sum(durations)
+    print(f"{label:>8}: {len(durations)} certificates in {total:.1f}s | "
+          f"mean {total / len(durations) * 1000:.1f} ms | "
+          f"p50 {durations[len(durations) // 2] * 1000:.1f} ms | "
+          f"p95 {durations[int(len(durations) * 0.95)] * 1000:.1f} ms")
+
+
+def time_pool(processes, count):
+    pool = RenderPool(TEMPLATE_PATH, processes=processes)
+    # Warm every worker before timing
+    list(pool.render_many(sample_certificate(index) for index in range(processes * pool.chunk_size)))
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        rendered = sum(1 for success, _ in pool.render_many(sample_certificate(index) for index in range(count)) if success)
+        elapsed = time.perf_counter() - start
+    pool.shutdown()
+    print(f"  pool x{processes}: {rendered} certificates in {elapsed:.1f}s | {rendered / elapsed:.1f} certificates/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=1000, help="certificates to render per run")
+    parser.add_argument("--processes", type=int, nargs="*", default=[], help="render pool sizes to measure")
+    parser.add_argument("--skip-baseline", action="store_true", help="skip the slow uncached run")
+    args = parser.parse_args()
+
+    if not args.skip_baseline:
+        report("before", time_renders(render_uncached, args.count))
+    template = CertificateTemplate(TEMPLATE_PATH)
+    report("after", time_renders(template.render, args.count))
+    for processes in args.processes:
+        time_pool(processes, args.count)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Offline throughput of certificate storage: rendered certificates are
+pinned to a local Pinata stand-in (pinata_standin.py) that answers after
+a fixed delay and returns 429 above a concurrency cap, then read back
+through the CID cache. Compares the previous uploader (a new session and
+retry adapter per upload, a fixed number of workers) with the shared
+adaptive client.
+
+Run from the application directory:
+    python -m benchmarks.storage_benchmark --count 200 --latency 0.05 --capacity 8
+"""
+import argparse
+import contextlib
+import io
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from pinata_standin import start_server
+from utils.cert_utils import CertificateTemplate
+from utils.cid_utils import compute_cid
+from utils.ipfs_cache import CidCache
+from utils.pinata_utils import PinataClient
+from utils.storage import PinataStorage
+
+TEMPLATE_PATH = "../assets/certificate_template.pdf"
+HEADERS = {"pinata_api_key": "benchmark", "pinata_secret_api_key": "benchmark"}
+
+
+def sample_certificate(index):
+    return {
+        'registration_no': f"SC/BENCH/{index}/26",
+        'student_name': f"STUDENT NUMBER {index}",
+        'course_name': "Computer Science",
+        'institution': "PRIME INSTITUTE OF TECHNOLOGY",
+        'issue_date': "2026-01-01"
+    }
+
+
+def upload_per_call_session(api_url, pdf_bytes, file_name):
+    """The previous uploader: a fresh session with urllib3 retries for every file"""
+    session = requests.Session()
+    session.mount("http://", HTTPAdapter(max_retries=Retry(total=3, backoff_factor=1, status_forcelist=[408, 429, 500, 502, 503, 504])))
+    response = session.post(f"{api_url}/pinning/pinFileToIPFS", headers=HEADERS,
+                            files={"file": (file_name, pdf_bytes, "application/pdf")}, timeout=30)
+    response.raise_for_status()
+    return response.json()["IpfsHash"]
+
+
+def timed_uploads(label, upload, pdfs, workers):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        cids = list(executor.map(lambda item: upload(item[1], f"{item[0]}.pdf"), enumerate(pdfs)))
+    elapsed = time.perf_counter() - start
+    print(f"{label:>30}: {elapsed:6.2f} s | {len(pdfs) / elapsed:6.1f} uploads/s")
+    return cids
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=200, help="certificates to pin")
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds the stand-in takes to answer")
+    parser.add_argument("--capacity", type=int, default=8, help="concurrent requests the stand-in serves before answering 429")
+    parser.add_argument("--workers", type=int, default=4, help="upload workers for the previous uploader")
+    args = parser.parse_args()
+
+    template = CertificateTemplate(TEMPLATE_PATH)
+    with contextlib.redirect_stdout(io.StringIO()):
+        pdfs = [template.render(sample_certificate(index)) for index in range(args.count)]
+    expected = [compute_cid(pdf) for pdf in pdfs]
+
+    with tempfile.TemporaryDirectory() as directory:
+        server, api_url = start_server(f"{directory}/store", latency=args.latency, capacity=args.capacity)
+        try:
+            cids = timed_uploads(f"per-call session, {args.workers} workers",
+                                 lambda pdf, name: upload_per_call_session(api_url, pdf, name), pdfs, args.workers)
+            assert cids == expected
+
+            client = PinataClient(HEADERS["pinata_api_key"], HEADERS["pinata_secret_api_key"], api_url=api_url)
+            storage = PinataStorage(gateway=f"{api_url}/ipfs", client=client)
+            cids = timed_uploads(f"adaptive client, up to {client.max_concurrency}", storage.pin, pdfs, client.max_concurrency)
+            assert cids == expected
+            print(f"{'final concurrency limit':>30}: {client.limit.limit:.1f}")
+
+            cache = CidCache(f"{directory}/cache", storage=storage)
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                fetched = list(executor.map(cache.get, cids))
+            elapsed = time.perf_counter() - start
+            assert fetched == pdfs
+            print(f"{'verified read-back via cache':>30}: {elapsed:6.2f} s | {len(pdfs) / elapsed:6.1f} files/s")
+        finally:
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
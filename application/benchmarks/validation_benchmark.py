@@ -0,0 +1,141 @@
+"""
+Bulk-file validation against a certificate store that already holds
+--issued certificates. The previous worker validated row by row with two
+indexed lookups per row, after the raw rows had been queued, and did not
+notice rows repeating each other within the file; BulkValidator checks a
+DataFrame at a time with one set lookup per chunk, catches in-file
+duplicates too, and queues rows already validated.
+
+"validate" times validation alone; "queue" times getting a file's rows
+into a job with every row validated or rejected, as the worker sees it.
+
+Run from the application directory:
+    python -m benchmarks.validation_benchmark --rows 100000 --issued 100000
+"""
+import argparse
+import hashlib
+import os
+import random
+import tempfile
+import time
+
+from utils.bulk_validation import BulkValidator
+from utils.cert_store import CertificateStore, JournalCertificateStore
+from utils.job_store import JobStore
+
+INSTITUTION = "PRIME INSTITUTE OF TECHNOLOGY"
+
+
+def issued_record(index):
+    return {
+        "certificate_id": f"issued-{index}",
+        "registration_no": f"SC/ISSUED/{index}/26",
+        "email": f"issued{index}@example.com",
+        "full_name": f"STUDENT NUMBER {index}",
+        "course_name": "Computer Science",
+        "institution": INSTITUTION,
+        "ipfsHash": "QmBenchmark"
+    }
+
+
+def sample_rows(count, issued, seed=0):
+    """Mostly new students, with blanks, already-issued rows and repeats mixed in"""
+    rng = random.Random(seed)
+    rows = []
+    for index in range(count):
+        row = {"registration_no": f"SC/BENCH/{index}/26", "full_name": f"Student Number {index}",
+               "course": "Computer Science", "email": f"student{index}@example.com"}
+        roll = rng.random()
+        if roll < 0.02:
+            row["email"] = None
+        elif roll < 0.04 and issued:
+            row["registration_no"] = f"SC/ISSUED/{rng.randrange(issued)}/26"
+        elif roll < 0.06 and rows:
+            row["email"] = rng.choice(rows)["email"]
+        rows.append(row)
+    return rows
+
+
+def previous_fields(row, store):
+    """The worker's previous per-row validation: (fields, error)"""
+    registration_no = row.get('registration_no')
+    full_name = row.get('full_name')
+    course_name = row.get('course')
+    email = row.get('email')
+    if not registration_no or not full_name or not course_name or not email:
+        return None, "incomplete details"
+    if store.has_registration_no(registration_no):
+        return None, "duplicate registration number"
+    if store.has_email(email):
+        return None, "duplicate email"
+    candidate_name = full_name.upper()
+    registration_no = registration_no.upper()
+    data_to_hash = f"{registration_no}{candidate_name}{course_name}{INSTITUTION}".encode('utf-8')
+    return {
+        "certificate_id": hashlib.sha256(data_to_hash).hexdigest(),
+        "registration_no": registration_no,
+        "candidate_name": candidate_name,
+        "course_name": course_name,
+        "email": email
+    }, None
+
+
+def validate_previous(rows, store):
+    return sum(1 for row in rows if previous_fields(row, store)[1] is None)
+
+
+def validate_bulk(rows, store):
+    validator = BulkValidator(INSTITUTION, store)
+    for _ in validator.validate_rows(rows):
+        pass
+    return validator.accepted
+
+
+def queue_previous(rows, store, job_store):
+    """Raw rows queued, then validated by the worker with a checkpoint per clean row and a commit per rejected one"""
+    job_id = job_store.create_job(((row, {}, None) for row in rows), INSTITUTION, INSTITUTION)
+    validated = []
+    for row in job_store.rows(job_id):
+        fields, error = previous_fields(row["source"], store)
+        if error:
+            job_store.fail_row(job_id, row["row_index"], error)
+        else:
+            validated.append((row["row_index"], fields))
+    job_store.checkpoint_many(job_id, validated, "validated")
+    return len(validated)
+
+
+def queue_bulk(rows, store, job_store):
+    validator = BulkValidator(INSTITUTION, store)
+    job_store.create_job(validator.validate_rows(rows), INSTITUTION, INSTITUTION)
+    return validator.accepted
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--issued", type=int, default=100000)
+    args = parser.parse_args()
+
+    rows = sample_rows(args.rows, args.issued)
+    with tempfile.TemporaryDirectory() as directory:
+        stores = {
+            "sqlite": CertificateStore(os.path.join(directory, "certificates.db"), json_path=None),
+            "journal": JournalCertificateStore(os.path.join(directory, "certificates.journal"), json_path=None)
+        }
+        for name, store in stores.items():
+            store.add_many(issued_record(index) for index in range(args.issued))
+            print(f"{name} store ({args.issued} issued), {args.rows} rows")
+            job_store = JobStore(os.path.join(directory, f"{name}-jobs.db"))
+            for label, run in (("validate previous", lambda: validate_previous(rows, store)),
+                               ("validate bulk", lambda: validate_bulk(rows, store)),
+                               ("queue previous", lambda: queue_previous(rows, store, job_store)),
+                               ("queue bulk", lambda: queue_bulk(rows, store, job_store))):
+                start = time.perf_counter()
+                accepted = run()
+                elapsed = time.perf_counter() - start
+                print(f"  {label:>17}: {accepted} accepted in {elapsed:.2f}s | {args.rows / elapsed:.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
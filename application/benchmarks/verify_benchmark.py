@@ -0,0 +1,132 @@
+"""
+End-to-end verification latency of the blocking path (contract call, then
+gateway download) against the async path, using a local stand-in node and
+IPFS gateway that each answer after a fixed delay.
+
+Run from the application directory:
+    python -m benchmarks.verify_benchmark --count 50 --latency 0.2
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from eth_abi import decode, encode
+from web3 import Web3
+
+from connection import contract
+from utils.verify_utils import AsyncVerifier
+
+PDF_BYTES = b"%PDF-1.4\n" + b"0" * 200_000
+IPFS_HASH = "QmBenchmarkCertificate"
+
+
+def sample_qr_data(index):
+    return {
+        "certificate_id": f"bench-{index}",
+        "registration_no": f"SC/BENCH/{index}/26",
+        "student_name": f"STUDENT NUMBER {index}",
+        "course_name": "Computer Science",
+        "institution": "PRIME INSTITUTE OF TECHNOLOGY"
+    }
+
+
+def make_handler(latency):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body go out in separate writes; without this, delayed ACKs add ~40 ms per response
+        disable_nagle_algorithm = True
+
+        def do_POST(self):
+            # JSON-RPC: answer getCertificate from the ID in the calldata
+            request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            if request["method"] != "eth_call":
+                # web3 may ask for the chain ID before the first call
+                self._send(json.dumps({"jsonrpc": "2.0", "id": request["id"], "result": "0x539"}).encode(), "application/json")
+                return
+            time.sleep(latency)
+            certificate_id = decode(["string"], bytes.fromhex(request["params"][0]["data"][10:]))[0]
+            index = certificate_id.split("-")[1]
+            data = sample_qr_data(index)
+            result = encode(["string"] * 5, [data["registration_no"], data["student_name"], data["course_name"], data["institution"], IPFS_HASH])
+            self._send(json.dumps({"jsonrpc": "2.0", "id": request["id"], "result": "0x" + result.hex()}).encode(), "application/json")
+
+        def do_GET(self):
+            time.sleep(latency)
+            self._send(PDF_BYTES, "application/pdf")
+
+        def _send(self, body, content_type):
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def start_server(latency):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(latency))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}"
+
+
+def verify_blocking(sync_contract, gateway, qr_data):
+    """The previous verifier path: contract call, compare, then download the PDF"""
+    details = sync_contract.functions.getCertificate(qr_data["certificate_id"]).call()
+    assert details[0] == qr_data["registration_no"]
+    return requests.get(f"{gateway}/{details[4]}").content
+
+
+async def time_async(node, gateway, count, hint):
+    durations = []
+    async with AsyncVerifier(provider_uri=node, gateway=gateway) as verifier:
+        for index in range(count):
+            start = time.perf_counter()
+            is_valid, _, pdf_bytes = await verifier.verify_certificate(sample_qr_data(index), ipfs_hash=IPFS_HASH if hint else None)
+            durations.append(time.perf_counter() - start)
+            assert is_valid and pdf_bytes == PDF_BYTES
+    return durations
+
+
+def report(label, durations):
+    durations = sorted(durations)
+    print(f"{label:>18}: mean {sum(durations) / len(durations) * 1000:.0f} ms | "
+          f"p50 {durations[len(durations) // 2] * 1000:.0f} ms | "
+          f"p95 {durations[int(len(durations) * 0.95)] * 1000:.0f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=50, help="verifications per run")
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds the node and the gateway take to answer")
+    args = parser.parse_args()
+
+    node = start_server(args.latency)
+    gateway = start_server(args.latency)
+    sync_contract = Web3(Web3.HTTPProvider(node)).eth.contract(address=contract.address, abi=contract.abi)
+
+    # verify_certificate logs every ID; keep the benchmark output readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        blocking = []
+        for index in range(args.count):
+            start = time.perf_counter()
+            verify_blocking(sync_contract, gateway, sample_qr_data(index))
+            blocking.append(time.perf_counter() - start)
+        sequential = asyncio.run(time_async(node, gateway, args.count, hint=False))
+        concurrent = asyncio.run(time_async(node, gateway, args.count, hint=True))
+    report("blocking", blocking)
+    report("async, no hint", sequential)
+    report("async, index hint", concurrent)
+
+
+if __name__ == "__main__":
+    main()
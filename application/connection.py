@@ -1,16 +1,93 @@
 import json
+import os
+import threading
+
+import requests
+from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
 from web3 import Web3
 
-# Connect to a local Ethereum node
-w3 = Web3(Web3.HTTPProvider('http://127.0.0.1:8545'))
+from utils.rpc_batch import BatchReader
+
+# Settings below are read at import time, which in the Streamlit app comes before any page loads .env
+load_dotenv()
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+DEPLOYMENT_CONFIG_PATH = os.getenv("DEPLOYMENT_CONFIG", os.path.join(APP_DIR, "deployment_config.json"))
+ABI_PATH = os.getenv("CERTIFICATION_ABI", os.path.join(APP_DIR, "..", "build", "contracts", "Certification.json"))
+
+
+def create_session(pool_size=10):
+    """Keep-alive HTTP session whose connection pool is shared by every thread using it"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def create_web3(provider_uri="http://127.0.0.1:8545", pool_size=10, timeout=30, session=None):
+    """Web3 over HTTP with a pooled keep-alive session and a per-request timeout"""
+    session = session or create_session(pool_size)
+    return Web3(Web3.HTTPProvider(provider_uri, request_kwargs={"timeout": timeout}, session=session))
+
+
+def load_deployment(config_path=DEPLOYMENT_CONFIG_PATH, abi_path=ABI_PATH):
+    """Contract addresses from the deployment config and the Certification ABI from the truffle build"""
+    with open(config_path) as f:
+        addresses = json.load(f)
+    with open(abi_path) as f:
+        abi = json.load(f)['abi']
+    return addresses, abi
+
+
+class Connection:
+    """Everything that talks to the node, built once per process"""
+
+    def __init__(self):
+        pool_size = int(os.getenv("WEB3_POOL_SIZE", "10"))
+        timeout = float(os.getenv("WEB3_TIMEOUT", "30"))
+        self.session = create_session(pool_size)
+        self.w3 = create_web3(
+            os.getenv("WEB3_PROVIDER_URI", "http://127.0.0.1:8545"),
+            pool_size=pool_size,
+            timeout=timeout,
+            session=self.session
+        )
+        addresses, abi = load_deployment()
+        # Environment variables win over the deployment config, e.g. for a node with a different deployment
+        certification_address = os.getenv("CERTIFICATION_ADDRESS") or addresses["Certification"]
+        multicall_address = os.getenv("MULTICALL_ADDRESS") or addresses.get("Multicall")
+        self.contract = self.w3.eth.contract(address=certification_address, abi=abi)
+        # Batched reads: one aggregate3 eth_call per chunk when the Multicall helper is deployed
+        # (migrations/3_deploy_multicall.js), otherwise one JSON-RPC batch per chunk
+        self.reader = BatchReader(
+            self.w3,
+            self.contract,
+            multicall_address=multicall_address,
+            max_batch_size=int(os.getenv("READ_BATCH_SIZE", "200")),
+            timeout=timeout,
+            session=self.session
+        )
+
+
+_connection = None
+_connection_lock = threading.Lock()
+
 
-# Load the contract ABI
-with open('../build/contracts/Certification.json') as f:
-    contract_json = json.load(f)
-    contract_abi = contract_json['abi']
+def get_connection():
+    """
+    Process-wide connection shared by every Streamlit session. Configured by
+    WEB3_PROVIDER_URI, WEB3_POOL_SIZE, WEB3_TIMEOUT, DEPLOYMENT_CONFIG,
+    CERTIFICATION_ABI, CERTIFICATION_ADDRESS and MULTICALL_ADDRESS.
+    """
+    global _connection
+    with _connection_lock:
+        if _connection is None:
+            _connection = Connection()
+        return _connection
 
-# Set the contract address (update this with the deployed contract address)
-contract_address = '0xCbf8e871A97d3819b3F24263f6148C83A51025F5'
 
-# Create the contract instance
-contract = w3.eth.contract(address=contract_address, abi=contract_abi)
+w3 = get_connection().w3
+contract = get_connection().contract
+reader = get_connection().reader
@@ -0,0 +1,287 @@
+"""
+Background worker for bulk issuance jobs queued by the institute page.
+
+The page validates rows before queueing a job. Each row is then
+checkpointed after every stage (rendered, pinned, anchored, emailed) in
+the job database, so a job interrupted by a crash or restart resumes
+where its rows stopped: rendered PDFs are kept in a spool directory until
+they are pinned, anchoring first checks what is already on chain, and no
+completed stage is run twice.
+
+Run from the application directory:
+    python job_worker.py
+The institute page starts one with --exit-when-idle when none is running.
+"""
+import argparse
+import concurrent.futures
+import os
+import shutil
+import socket
+import threading
+import time
+from datetime import datetime
+
+from dotenv import load_dotenv
+
+# connection reads the provider settings at import time
+load_dotenv()
+
+from connection import contract, reader
+from utils.cert_store import get_certificate_store
+from utils.chain_utils import NOT_MINED, issue_certificates_batched, is_merkle_root_anchored
+from utils.email_utils import SENT_STATUS, certificate_email, get_outbox
+from utils.job_store import get_job_store
+from utils.merkle_utils import build_tree, get_proof, get_root, leaf_hash
+from utils.pipeline import Pipeline, Stage
+from utils.render_pool import get_render_pool
+from utils.storage import LocalStorage, get_storage
+from utils.tx_utils import RECEIPT_TIMEOUT, get_submitter
+
+WORKER_ID = f"{socket.gethostname()}-{os.getpid()}"
+LEASE_SECONDS = 60
+TEMPLATE_PATH = os.path.join("..", "assets", "certificate_template.pdf")
+SPOOL_DIR = os.getenv("JOB_SPOOL_DIR", "job_spool")
+ANCHOR_BATCH_SIZE = int(os.getenv("BULK_ANCHOR_BATCH_SIZE", "50"))
+# Seconds the render and anchor stages wait for a batch to fill before sending what they have
+RENDER_LINGER = 0.2
+ANCHOR_LINGER = 2.0
+# Seconds a finished job waits for its queued emails; the rest keep delivering in the background
+EMAIL_WAIT_SECONDS = float(os.getenv("JOB_EMAIL_WAIT_SECONDS", "300"))
+
+
+def build_merkle_batch(store, job):
+    """Fix the job's Merkle tree once; leaves and proofs are stored with the rows"""
+    rows = store.rows(job["job_id"], ["validated"])
+    if not rows:
+        return
+    levels = build_tree([leaf_hash(row["certificate_id"]) for row in rows])
+    store.set_merkle_root(job["job_id"], get_root(levels),
+                          [(row["row_index"], levels[0][index], get_proof(levels, index)) for index, row in enumerate(rows)])
+
+
+class JobRunner:
+    """
+    Runs one claimed job through the remaining stages of each of its rows.
+    Once `lease_lost` is set, another worker owns the job: stages stop
+    before doing any more work and no further results are recorded.
+    """
+
+    def __init__(self, store, job, lease_lost=None):
+        self.store = store
+        self.job = job
+        self.job_id = job["job_id"]
+        self.lease_lost = lease_lost or threading.Event()
+        self.storage = get_storage()
+        self.spool = LocalStorage(os.path.join(SPOOL_DIR, str(self.job_id)))
+        self.render_pool = get_render_pool(TEMPLATE_PATH)
+        self.certificate_store = get_certificate_store()
+        self.email_futures = []
+
+    def check_lease(self):
+        if self.lease_lost.is_set():
+            raise RuntimeError(f"Lost the lease on job {self.job_id}")
+
+    def certificate_data(self, row):
+        return {
+            'registration_no': row["registration_no"],
+            'student_name': row["candidate_name"],
+            'course_name': row["course_name"],
+            'institution': self.job["institution"],
+            'issue_date': datetime.now().strftime('%Y-%m-%d'),
+            'merkle_root': self.job["merkle_root"],
+            'merkle_leaf': row["merkle_leaf"],
+            'merkle_proof': row["merkle_proof"]
+        }
+
+    def render_stage(self, batch):
+        self.check_lease()
+        todo = [row for row in batch if row["stage"] == "validated"]
+        results = [(row, True, None) for row in batch if row["stage"] != "validated"]
+        checkpoints = []
+        for row, (success, payload) in zip(todo, self.render_pool.render_many(self.certificate_data(row) for row in todo)):
+            if success:
+                # Spooled until pinned, so a resumed job pins the very bytes that were rendered
+                row["pdf_cid"] = self.spool.pin(payload)
+                row["stage"] = "rendered"
+                checkpoints.append((row["row_index"], {"pdf_cid": row["pdf_cid"]}))
+                results.append((row, True, None))
+            else:
+                results.append((row, False, payload))
+        self.store.checkpoint_many(self.job_id, checkpoints, "rendered")
+        return results
+
+    def pin_stage(self, row):
+        if row["stage"] != "rendered":
+            return row
+        self.check_lease()
+        pdf_bytes = b"".join(self.spool.fetch(row["pdf_cid"]))
+        row["ipfs_hash"] = self.storage.pin(pdf_bytes, f"{row['certificate_id']}.pdf")
+        row["stage"] = "pinned"
+        self.store.checkpoint(self.job_id, row["row_index"], "pinned", ipfs_hash=row["ipfs_hash"])
+        self.spool.unpin(row["pdf_cid"])
+        return row
+
+    def anchor_stage(self, batch):
+        self.check_lease()
+        if self.job["merkle_mode"]:
+            root = self.job["merkle_root"]
+            if not is_merkle_root_anchored(root):
+                try:
+                    receipt = get_submitter().submit(contract.functions.anchorMerkleRoot(bytes.fromhex(root), self.job["merkle_size"])).result(timeout=RECEIPT_TIMEOUT)
+                except concurrent.futures.TimeoutError:
+                    return [(row, False, NOT_MINED) for row in batch]
+                if receipt["status"] != 1:
+                    return [(row, False, "Merkle root anchoring failed") for row in batch]
+            results = [(row, True, None) for row in batch]
+        else:
+            # A previous run may have anchored rows without checkpointing them
+            on_chain = reader.get_certificates(row["certificate_id"] for row in batch)
+            results = []
+            pending = []
+            for row in batch:
+                details = on_chain.get(row["certificate_id"])
+                if details and details[4] == row["ipfs_hash"]:
+                    results.append((row, True, None))
+                else:
+                    pending.append(dict(row, institution=self.job["institution"]))
+            results.extend(issue_certificates_batched(pending))
+        anchored = [row for row, success, _ in results if success]
+        for row in anchored:
+            row["stage"] = "anchored"
+        self.store.checkpoint_many(self.job_id, [(row["row_index"], {}) for row in anchored], "anchored")
+        self.record_certificates(anchored)
+        return results
+
+    def record_certificates(self, rows):
+        records = []
+        for row in rows:
+            record = {
+                "registration_no": row["registration_no"],
+                "email": row["email"],
+                "full_name": row["candidate_name"],
+                "course_name": row["course_name"],
+                "institution": self.job["institution"],
+                "certificate_id": row["certificate_id"],
+                "ipfsHash": row["ipfs_hash"]
+            }
+            if self.job["merkle_mode"]:
+                record["merkle_root"] = self.job["merkle_root"]
+                record["merkle_leaf"] = row["merkle_leaf"]
+            records.append(record)
+        # Already present when a resumed job re-anchors a row it had recorded
+        self.certificate_store.add_many(records, skip_duplicates=True)
+
+    def queue_email(self, row):
+        message = certificate_email(os.getenv("EMAIL_USER"), row["email"], row["certificate_id"],
+                                    self.storage.url(row["ipfs_hash"]), self.job["institution_name"])
+        future = get_outbox().send(message)
+        future.add_done_callback(lambda future, row_index=row["row_index"]: self.record_email(row_index, future.result()))
+        self.email_futures.append(future)
+
+    def record_email(self, row_index, status):
+        if status == SENT_STATUS:
+            self.store.checkpoint(self.job_id, row_index, "emailed", email_status=status)
+        else:
+            # The certificate is issued; only the email is given up on
+            self.store.fail_row(self.job_id, row_index, status, email_status=status)
+
+    def run(self):
+        # Rows arrive validated; the page queued rejected ones as failed
+        if self.job["merkle_mode"] and not self.job["merkle_root"]:
+            build_merkle_batch(self.store, self.job)
+            self.job = self.store.get_job(self.job_id)
+
+        # Rows anchored before an interruption still need their email
+        for row in self.store.rows(self.job_id, ["anchored"]):
+            self.queue_email(row)
+
+        rows = self.store.rows(self.job_id, ["validated", "rendered", "pinned"])
+        unconfirmed = 0
+        if rows:
+            pipeline = Pipeline([
+                Stage("render", self.render_stage, batch_size=self.render_pool.chunk_size * self.render_pool.processes, linger=RENDER_LINGER),
+                Stage("pin", self.pin_stage, workers=self.storage.max_concurrency),
+                Stage("anchor", self.anchor_stage,
+                      batch_size=len(rows) if self.job["merkle_mode"] else ANCHOR_BATCH_SIZE, linger=ANCHOR_LINGER)
+            ])
+            for result in pipeline.run(rows):
+                if self.lease_lost.is_set():
+                    # The remaining rows fail fast at the lease check; they belong to the job's new owner
+                    continue
+                if result.success:
+                    self.queue_email(result.item)
+                elif result.error == NOT_MINED:
+                    # May still be mined: left at "pinned", where a resumed job checks the chain before anchoring again
+                    unconfirmed += 1
+                else:
+                    self.store.fail_row(self.job_id, result.item["row_index"], f"{result.stage}: {result.error}")
+
+        self.check_lease()
+        _, pending = concurrent.futures.wait(self.email_futures, timeout=EMAIL_WAIT_SECONDS)
+        if pending:
+            # Their rows stay at "anchored" until delivery is recorded
+            print(f"{len(pending)} emails of job {self.job_id} still queued after {EMAIL_WAIT_SECONDS:.0f}s")
+        shutil.rmtree(self.spool.directory, ignore_errors=True)
+        if unconfirmed:
+            raise RuntimeError(f"{unconfirmed} rows were not confirmed on chain; requeue the job to check them again")
+
+
+def keep_lease(store, job_id, stop, lease_lost):
+    """Renew the job's lease and the worker heartbeat until `stop` is set; sets `lease_lost` when the renewal fails"""
+    while not stop.wait(LEASE_SECONDS / 3):
+        store.heartbeat(WORKER_ID)
+        if not store.renew_lease(job_id, WORKER_ID, LEASE_SECONDS):
+            print(f"Lost the lease on job {job_id}")
+            lease_lost.set()
+            return
+
+
+def run_job(store, job):
+    print(f"Worker {WORKER_ID} running job {job['job_id']} ({job['total']} rows)")
+    stop = threading.Event()
+    lease_lost = threading.Event()
+    threading.Thread(target=keep_lease, args=(store, job["job_id"], stop, lease_lost), daemon=True).start()
+    try:
+        JobRunner(store, job, lease_lost).run()
+        store.finish_job(job["job_id"], "done", worker_id=WORKER_ID)
+        print(f"Job {job['job_id']} finished: {store.progress(job['job_id'])}")
+    except Exception as e:
+        if lease_lost.is_set():
+            # The worker that took the job over finishes it
+            print(f"Job {job['job_id']} stopped: {e}")
+        else:
+            # Checkpoints are kept; requeueing the job resumes it
+            store.finish_job(job["job_id"], "failed", str(e), worker_id=WORKER_ID)
+            print(f"Job {job['job_id']} failed: {e}")
+    finally:
+        stop.set()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--exit-when-idle", action="store_true", help="exit once no job has been queued for --idle-timeout seconds")
+    parser.add_argument("--idle-timeout", type=float, default=30.0)
+    parser.add_argument("--poll-interval", type=float, default=2.0, help="seconds between checks for new jobs")
+    args = parser.parse_args()
+
+    store = get_job_store()
+    idle_since = time.monotonic()
+    try:
+        while True:
+            store.heartbeat(WORKER_ID)
+            job = store.claim_job(WORKER_ID, LEASE_SECONDS)
+            if job is not None:
+                run_job(store, job)
+                idle_since = time.monotonic()
+            elif args.exit_when_idle and time.monotonic() - idle_since > args.idle_timeout:
+                break
+            else:
+                time.sleep(args.poll_interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        store.remove_worker(WORKER_ID)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,28 +1,31 @@
 import streamlit as st
-import requests
 import json
 import os
-import smtplib
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
 from dotenv import load_dotenv
 import hashlib
-from utils.cert_utils import generate_certificate_pdf  # Updated import
+from utils.cert_utils import render_certificate_pdf  # Updated import
+from utils.tx_utils import RECEIPT_TIMEOUT, get_submitter
+from utils.chain_cache import get_certificates, get_read_cache, is_verified
+from utils.indexer import CERTIFICATE_COLUMNS, get_indexer
 from utils.streamlit_utils import view_certificate, displayPDF, hide_icons, hide_sidebar, remove_whitespaces
-from connection import contract, w3
+from connection import contract, reader
 from streamlit_extras.switch_page_button import switch_page
-from utils.file_utils import load_institutions, save_institutions, load_certificates, save_certificates, is_duplicate_registration_no, is_duplicate_email, delete_certificate, delete_from_pinata
+from utils.file_utils import load_institutions, save_institutions, delete_from_storage
+from utils.cert_store import get_certificate_store
+from utils.storage import get_storage
+from utils.ipfs_cache import get_pdf_cache
+from utils.email_utils import certificate_email, get_outbox
+from utils.job_store import get_job_store
+from utils.bulk_input import BULK_FILE_TYPES, BULK_READERS, read_bulk_rows
+from utils.bulk_validation import BulkValidator
+from utils.verify_utils import check_merkle_record
 import pandas as pd
 import time
-from docx import Document
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
 import concurrent.futures
-from functools import lru_cache
-import asyncio
 import gc
-from PIL import Image
 import shutil
+import subprocess
+import sys
 import logging
 from datetime import datetime  # Import datetime module
 
@@ -47,11 +50,11 @@ if 'institutions' not in st.session_state:
     st.session_state.institutions = load_institutions()
 if 'selected_institution' not in st.session_state:
     st.session_state.selected_institution = None
-if 'certificates' not in st.session_state:
-    st.session_state.certificates = load_certificates()
 if 'refresh' not in st.session_state:
     st.session_state.refresh = False
 
+certificate_store = get_certificate_store()
+
 # Check if the user is logged in and has the correct profile
 if not st.session_state.logged_in or st.session_state.profile != "Institute":
     st.error("Access denied. This page is only for Institute users.")
@@ -65,144 +68,41 @@ api_secret = os.getenv("PINATA_API_SECRET")
 email_user = os.getenv("EMAIL_USER")
 email_password = os.getenv("EMAIL_PASSWORD")
 
-# Ensure API keys are loaded
-if not api_key or not api_secret:
+# Ensure API keys are loaded when certificates go to Pinata
+if os.getenv("STORAGE_BACKEND", "pinata") == "pinata" and (not api_key or not api_secret):
     st.error("Pinata API keys are not set. Please check your environment variables.")
     st.stop()
 
-def upload_to_pinata(file_path, api_key, api_secret, max_retries=3):
+def upload_to_storage(pdf_bytes, file_name="certificate.pdf"):
     """
-    Upload file to Pinata with retry logic
+    Pin PDF bytes with the configured storage backend (Pinata by default)
     """
-    # Configure retry strategy
-    retry_strategy = Retry(
-        total=max_retries,
-        backoff_factor=1,
-        status_forcelist=[408, 429, 500, 502, 503, 504],
-    )
-    
-    # Create session with retry strategy
-    session = requests.Session()
-    session.mount("https://", HTTPAdapter(max_retries=retry_strategy))
-    
-    pinata_api_url = "https://api.pinata.cloud/pinning/pinFileToIPFS"
-    headers = {
-        "pinata_api_key": api_key,
-        "pinata_secret_api_key": api_secret,
-    }
-
     try:
-        with open(file_path, "rb") as file:
-            files = {"file": file}
-            
-            for attempt in range(max_retries):
-                try:
-                    response = session.post(
-                        pinata_api_url, 
-                        headers=headers, 
-                        files=files, 
-                        timeout=30
-                    )
-                    response.raise_for_status()
-                    
-                    result = response.json()
-                    if "IpfsHash" in result:
-                        return result["IpfsHash"]
-                    
-                except requests.exceptions.RequestException as e:
-                    if attempt == max_retries - 1:
-                        st.error(f"Failed to upload after {max_retries} attempts: {str(e)}")
-                        return None
-                    time.sleep(2 ** attempt)  # Exponential backoff
-                    continue
-                    
+        return get_storage().pin(pdf_bytes, file_name)
     except Exception as e:
-        st.error(f"Error preparing file upload: {str(e)}")
+        st.error(f"Failed to upload the certificate: {str(e)}")
         return None
 
-def send_email(to_email, certificate_id, download_link):
-    msg = MIMEMultipart()
-    msg['From'] = email_user
-    msg['To'] = to_email
-    msg['Subject'] = "Certificate Issued"
-
-    body = f"Dear Student,\n\nCongratulations on completing your Course. Here are your certificate details: \n\nCertificate ID: {certificate_id}\nDownload Link: {download_link}\n\nBest regards,\n {st.session_state.selected_institution}"
-    msg.attach(MIMEText(body, 'plain'))
-
-    try:
-        server = smtplib.SMTP('smtp.gmail.com', 587)
-        server.starttls()
-        server.login(email_user, email_password)
-        text = msg.as_string()
-        server.sendmail(email_user, to_email, text)
-        server.quit()
-        return "Email sent successfully"
-    except Exception as e:
-        return f"Failed to send email: {e}"
-
-def delete_from_pinata(ipfs_hash, api_key, api_secret):
-    url = f"https://api.pinata.cloud/pinning/unpin/{ipfs_hash}"
-    headers = {
-        "pinata_api_key": api_key,
-        "pinata_secret_api_key": api_secret
-    }
-    response = requests.delete(url, headers=headers)
-    return response.status_code == 200
-
-def read_docx(file):
-    doc = Document(file)
-    data = []
-    keys = None
-    for i, table in enumerate(doc.tables):
-        for row in table.rows:
-            text = (cell.text for cell in row.cells)
-            if i == 0 and keys is None:
-                keys = tuple(text)
-                continue
-            row_data = dict(zip(keys, text))
-            data.append(row_data)
-    return pd.DataFrame(data)
-
-def normalize_column_names(df):
-    # Ensure all column names are strings
-    df.columns = df.columns.map(str)
-    # Convert all column names to strings explicitly
-    df.columns = df.columns.astype(str)
-    # Normalize column names
-    df.columns = df.columns.str.strip().str.lower().str.replace(' ', '_')
-    return df
-
-def map_columns(df):
-    column_mapping = {
-        'registration_no': 'Registration No',
-        'full_name': 'Full Name',
-        'course': 'Course',
-        'email': 'Email'
-    }
-    # Create a reverse mapping for normalization
-    reverse_mapping = {v.lower().replace(' ', '_'): k for k, v in column_mapping.items()}
-    # Rename columns based on the reverse mapping
-    df = df.rename(columns=reverse_mapping)
-    return df
+def send_email(to_email, certificate_id, download_link, institution_name=None):
+    """Queue the certificate email; returns a Future that resolves to the delivery status"""
+    if institution_name is None:
+        institution_name = st.session_state.selected_institution
+    return get_outbox().send(certificate_email(email_user, to_email, certificate_id, download_link, institution_name))
 
 def handle_transaction(contract_function):
     try:
-        tx_hash = contract_function.transact({
-            'from': w3.eth.accounts[0],  # Ensure the sender's address is included
-            'gas': 2000000
-        })
-        receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
+        # Nonce and gas are managed by the shared submitter
+        receipt = get_submitter().submit(contract_function).result(timeout=RECEIPT_TIMEOUT)
         # Log the transaction receipt
         print(f"Transaction receipt: {receipt}")
         return receipt
+    except concurrent.futures.TimeoutError:
+        st.error(f"Transaction was not mined within {RECEIPT_TIMEOUT} seconds. Please check the network and try again.")
+        return None
     except Exception as e:
         st.error(f"Transaction failed: {str(e)}")
         return None
 
-@lru_cache(maxsize=1)
-def load_certificate_template():
-    return Image.open(os.path.join("..", "assets", "certificate_template.pdf"))
-
 # Add this function before the process_certificate function
 
 def generate_file_path(registration_no):
@@ -217,181 +117,160 @@ def generate_file_path(registration_no):
 
 import time  # Import time module for delay
 
+def revocation_function(certificate):
+    if certificate.get('merkle_leaf'):
+        # Merkle-anchored certificates are revoked through the revoked-leaf set
+        return contract.functions.revokeLeaf(bytes.fromhex(certificate['merkle_leaf']))
+    return contract.functions.invalidateCertificate(certificate['certificate_id'])
+
 def revoke_certificate(certificate_id):
     try:
         # Find the certificate details
-        certificate = next((cert for cert in st.session_state.certificates if cert['certificate_id'] == certificate_id), None)
+        certificate = certificate_store.get(certificate_id)
         if not certificate:
             st.error("Invalid Certificate ID.")
             return False
 
         # Revoke the certificate on the blockchain
-        tx_receipt = handle_transaction(contract.functions.invalidateCertificate(certificate_id))
+        tx_receipt = handle_transaction(revocation_function(certificate))
         if tx_receipt:
             # Remove from local storage
-            st.session_state.certificates = [cert for cert in st.session_state.certificates if cert['certificate_id'] != certificate_id]
-            save_certificates(st.session_state.certificates)
-
-            # Delete from Pinata
-            if delete_from_pinata(certificate['ipfsHash'], api_key, api_secret):
+            certificate_store.delete(certificate_id)
+            get_read_cache().invalidate(certificate_id)
+            # The listing reads the index, which would otherwise show the certificate until its next poll
+            get_indexer().apply_receipt(tx_receipt)
+            # Revoked PDFs must not stay downloadable from the static cache
+            get_pdf_cache().remove(certificate['ipfsHash'])
+
+            # Unpin from IPFS storage
+            if delete_from_storage(certificate['ipfsHash']):
                 st.success("Certificate revoked and deleted successfully!")
                 return True
             else:
-                st.error("Failed to delete certificate from Pinata.")
+                st.error("Failed to delete certificate from IPFS storage.")
                 return False
     except Exception as e:
         st.error(f"Error revoking certificate: {str(e)}")
         return False
 
 def revoke_all_certificates():
-    total_certs = len(st.session_state.certificates)
+    certificates = certificate_store.all()
+    total_certs = len(certificates)
     progress_bar = st.progress(0)
-    for i, cert in enumerate(st.session_state.certificates):
-        certificate_id = cert['certificate_id']
-        revoke_certificate(certificate_id)
+    submitter = get_submitter()
+
+    # Submit every revocation first, then collect receipts as they are mined
+    submitted = []
+    for cert in certificates:
+        try:
+            submitted.append((cert, submitter.submit(revocation_function(cert))))
+        except Exception as e:
+            st.error(f"Error revoking certificate {cert['certificate_id']}: {str(e)}")
+
+    revoked_ids = set()
+    timed_out = []
+    indexer = get_indexer()
+    for i, (cert, future) in enumerate(submitted):
+        try:
+            # Receipts arrive in submission order, so each wait only covers the gap since the previous one
+            receipt = future.result(timeout=RECEIPT_TIMEOUT)
+            if receipt["status"] == 1:
+                revoked_ids.add(cert['certificate_id'])
+                indexer.apply_receipt(receipt)
+                get_pdf_cache().remove(cert['ipfsHash'])
+                if not delete_from_storage(cert['ipfsHash']):
+                    st.error(f"Failed to delete certificate {cert['certificate_id']} from IPFS storage.")
+        except concurrent.futures.TimeoutError:
+            timed_out.append(cert['certificate_id'])
+        except Exception as e:
+            st.error(f"Error revoking certificate {cert['certificate_id']}: {str(e)}")
         progress_bar.progress((i + 1) / total_certs)
-    st.session_state.certificates = []
-    save_certificates(st.session_state.certificates)
-    st.success("All certificates revoked and deleted successfully!")
 
-def process_bulk_certificates(file, file_type):
+    certificate_store.delete_many(revoked_ids)
+    for certificate_id in revoked_ids:
+        get_read_cache().invalidate(certificate_id)
+    if timed_out:
+        # Left in the store and the caches: they may still be mined, or have been dropped
+        st.error(f"{len(timed_out)} revocations were not mined within {RECEIPT_TIMEOUT} seconds: {', '.join(timed_out)}. Please check the network and try again.")
+    st.success(f"{len(revoked_ids)} certificates revoked and deleted successfully!")
+
+def start_job_worker():
+    """Start a background job worker unless one is already running"""
+    if not get_job_store().live_workers():
+        # Run from the application directory like the app itself; it exits once the queue stays empty
+        subprocess.Popen([sys.executable, "job_worker.py", "--exit-when-idle"], start_new_session=True)
+
+def process_bulk_certificates(file, file_type, merkle_mode=False):
     if file is None:
         st.error("Error! Please upload a file!")
         return
+    if file_type not in BULK_READERS:
+        st.error("Invalid file! File type is not supported, only supports .xlsx, .docx and .csv files")
+        return
 
+    # Issuance runs in job_worker.py and survives reruns, closed tabs and restarts
+    selected_institution = st.session_state.selected_institution
+    institution = selected_institution.split(". ")[1].upper() if ". " in selected_institution else selected_institution.upper()
+    job_store = get_job_store()
+    validator = BulkValidator(institution, certificate_store)
     try:
-        if file_type == "Excel":
-            df = pd.read_excel(file)
-        elif file_type == "DOCX":
-            df = read_docx(file)
-        else:
-            st.error("Invalid file! File type is not supported, only supports .docx and .xlsx files")
-            return
+        # Rows stream from the file through validation into the job, a chunk at a time
+        job_id = job_store.create_job(validator.validate_rows(read_bulk_rows(file, file_type)), institution, selected_institution, merkle_mode)
     except Exception as e:
         st.error(f"Error reading file: {str(e)}")
         return
 
-    if df.empty:
-        st.error("The uploaded file is empty. Please upload a valid file with data.")
-        return
-
-    df = normalize_column_names(df)
-    df = map_columns(df)
-
-    total_rows = len(df)
-    if total_rows == 0:
+    if job_id is None:
         st.error("No valid data found in the uploaded file after processing.")
         return
 
-    generation_progress_bar = st.progress(0)
-    email_progress_bar = st.progress(0)
-    generated_count = 0
-    email_sent_count = 0
-    skipped_details = []
-
-    for index, row in df.iterrows():
-        registration_no = row.get('registration_no')
-        full_name = row.get('full_name')
-        course_name = row.get('course')
-        email = row.get('email')
-
-        if not registration_no or not full_name or not course_name or not email:
-            skipped_details.append(f"Failed to generate certificate for {registration_no} due to incomplete details")
-            continue
-
-        if is_duplicate_registration_no(st.session_state.certificates, registration_no):
-            skipped_details.append(f"Failed to generate certificate for {registration_no} due to duplicate registration number")
-            continue
-
-        if is_duplicate_email(st.session_state.certificates, email):
-            skipped_details.append(f"Failed to generate certificate for {registration_no} due to duplicate email")
-            continue
-
-        try:
-            candidate_name = full_name.upper()
-            institution = st.session_state.selected_institution.split(". ")[1].upper() if ". " in st.session_state.selected_institution else st.session_state.selected_institution.upper()
-            registration_no = registration_no.upper()
-
-            safe_filename = f"{registration_no.replace('/', '_').replace('\\', '_')}.pdf"
-            pdf_file_path = os.path.join("..", "application", "certificates", safe_filename)
-            template_path = os.path.join("..", "assets", "certificate_template.pdf")
-
-            temp_file = "temp_certificate.pdf"
-
-            generate_certificate_pdf({
-                'registration_no': registration_no,
-                'student_name': candidate_name,
-                'course_name': course_name,
-                'institution': institution,
-                'issue_date': datetime.now().strftime('%Y-%m-%d'),
-                'ipfs_hash': ''
-            }, temp_file, template_path)
-
-            ipfs_hash = upload_to_pinata(temp_file, api_key, api_secret)
-            if ipfs_hash:
-                data_to_hash = f"{registration_no}{candidate_name}{course_name}{institution}".encode('utf-8')
-                certificate_id = hashlib.sha256(data_to_hash).hexdigest()
-
-                generate_certificate_pdf({
-                    'registration_no': registration_no,
-                    'student_name': candidate_name,
-                    'course_name': course_name,
-                    'institution': institution,
-                    'issue_date': datetime.now().strftime('%Y-%m-%d'),
-                    'ipfs_hash': ipfs_hash
-                }, pdf_file_path, template_path)
-
-                tx_receipt = handle_transaction(contract.functions.generateCertificate(
-                    certificate_id,
-                    registration_no,
-                    candidate_name,
-                    course_name,
-                    institution,
-                    ipfs_hash
-                ))
-
-                if tx_receipt:
-                    st.session_state.certificates.append({
-                        "registration_no": registration_no,
-                        "email": email,
-                        "full_name": candidate_name,
-                        "course_name": course_name,
-                        "institution": institution,
-                        "certificate_id": certificate_id,
-                        "ipfsHash": ipfs_hash
-                    })
-                    save_certificates(st.session_state.certificates)
-                    generated_count += 1
-
-                    download_link = f"https://gateway.pinata.cloud/ipfs/{ipfs_hash}"
-                    email_status = send_email(email, certificate_id, download_link)
-                    if "successfully" in email_status:
-                        email_sent_count += 1
-                    else:
-                        skipped_details.append(f"Failed to generate certificate for {registration_no} due to {email_status}")
-
-            if os.path.exists(temp_file):
-                os.remove(temp_file)
-            if 'pdf_file_path' in locals() and os.path.exists(pdf_file_path):
-                os.remove(pdf_file_path)
-
-        except Exception as e:
-            if "Certificate with this ID already exists" in str(e):
-                skipped_details.append(f"Failed to generate certificate for {registration_no} due to certificate with this ID already exists")
-            else:
-                skipped_details.append(f"Failed to generate certificate for {registration_no} due to {str(e)}")
-            if 'pdf_file_path' in locals() and os.path.exists(pdf_file_path):
-                os.remove(pdf_file_path)
-
-        generation_progress_bar.progress((index + 1) / total_rows, text=f"Generating Certificates: {generated_count}")
-        email_progress_bar.progress((index + 1) / total_rows, text=f"Sending Emails: {email_sent_count}")
-
-    st.success(f"{generated_count} certificates successfully generated")
-    st.success(f"{email_sent_count} emails successfully sent")
-    if skipped_details:
-        st.error(f"Skipped {len(skipped_details)} details:")
-        for detail in skipped_details:
-            st.write(detail)
+    # Every rejection is known before the first upload
+    if validator.rejected:
+        st.error(f"Skipped {validator.rejected} rows:")
+        st.dataframe(pd.DataFrame(job_store.failures(job_id), columns=["Row", "Registration No", "Last Stage", "Reason"])
+                     .drop(columns="Last Stage"), hide_index=True)
+    if validator.accepted:
+        start_job_worker()
+        st.success(f"Bulk job {job_id} queued with {validator.accepted} certificates. Progress is shown below.")
+    else:
+        job_store.finish_job(job_id, "done")
+
+JOB_STAGE_LABELS = {
+    "validated": "Validated",
+    "rendered": "Rendered",
+    "pinned": "Uploaded",
+    "anchored": "Issued",
+    "emailed": "Emailed"
+}
+
+@st.fragment(run_every=3)
+def show_bulk_jobs():
+    job_store = get_job_store()
+    jobs = job_store.recent_jobs()
+    if not jobs:
+        return
+    if any(job["status"] in ("queued", "running") for job in jobs):
+        # A worker that crashed or was never started leaves its jobs waiting
+        start_job_worker()
+
+    st.subheader("Bulk Jobs")
+    for job in jobs:
+        progress = job_store.progress(job["job_id"])
+        mode = "Merkle root" if job["merkle_mode"] else "per certificate"
+        with st.expander(f"Job {job['job_id']} · {job['institution']} · {job['total']} rows · {mode} · {job['status']}",
+                         expanded=job["status"] in ("queued", "running")):
+            for stage, label in JOB_STAGE_LABELS.items():
+                st.progress(progress[stage] / max(job["total"], 1), text=f"{label}: {progress[stage]} of {job['total']}")
+            if job["error"]:
+                st.error(f"Job stopped: {job['error']}")
+            if job["status"] == "failed" and st.button("Resume", key=f"resume_job_{job['job_id']}"):
+                job_store.requeue_job(job["job_id"])
+                start_job_worker()
+                st.rerun(scope="fragment")
+            failures = job_store.failures(job["job_id"])
+            if failures:
+                st.error(f"Skipped {len(failures)} rows:")
+                st.dataframe(pd.DataFrame(failures, columns=["Row", "Registration No", "Last Stage", "Reason"]), hide_index=True)
 
 def refresh_page():
     st.rerun()
@@ -434,9 +313,9 @@ if page == "Generate Certificate":
             st.error("Institution name cannot be empty!")
         elif not email:
             st.error("Email cannot be empty!")
-        elif is_duplicate_registration_no(st.session_state.certificates, Registration_No):
+        elif certificate_store.has_registration_no(Registration_No):
             st.error("Registration number already exists!")
-        elif is_duplicate_email(st.session_state.certificates, email):
+        elif certificate_store.has_email(email):
             st.error("Email already used!")
         else:
             try:
@@ -445,105 +324,80 @@ if page == "Generate Certificate":
                 Institution = Institution.upper()
                 Registration_No = Registration_No.upper()
                 
-                # Create safe filename for local storage
-                safe_filename = f"{Registration_No.replace('/', '_').replace('\\', '_')}.pdf"
-                pdf_file_path = os.path.join("..", "application", "certificates", safe_filename)
                 template_path = os.path.join("..", "assets", "certificate_template.pdf")
-                
-                # Create temporary file for Pinata
-                temp_file = "temp_certificate.pdf"
-                
-                # Generate certificate without ipfs_hash first
-                generate_certificate_pdf({
+
+                # Render once in memory; the ipfs_hash is never drawn on the certificate
+                pdf_bytes = render_certificate_pdf({
                     'registration_no': Registration_No,
                     'student_name': candidate_name,
                     'course_name': course_name,
                     'institution': Institution,  # Include institution name
-                    'issue_date': datetime.now().strftime('%Y-%m-%d'),
-                    'ipfs_hash': ''  # Placeholder for ipfs_hash
-                }, temp_file, template_path)
-
-                # Upload to Pinata
-                try:
-                    ipfs_hash = upload_to_pinata(temp_file, api_key, api_secret)
-                    if ipfs_hash:
-                        # Generate certificate ID
-                        data_to_hash = f"{Registration_No}{candidate_name}{course_name}{Institution}".encode('utf-8')
-                        certificate_id = hashlib.sha256(data_to_hash).hexdigest()
-
-                        # Generate certificate with ipfs_hash
-                        generate_certificate_pdf({
-                            'registration_no': Registration_No,
-                            'student_name': candidate_name,
-                            'course_name': course_name,
-                            'institution': Institution,  # Include institution name
-                            'issue_date': datetime.now().strftime('%Y-%m-%d'),
-                            'ipfs_hash': ipfs_hash  # Include ipfs_hash
-                        }, pdf_file_path, template_path)
-
-                        # Store in blockchain
-                        try:
-                            tx_receipt = handle_transaction(contract.functions.generateCertificate(
-                                certificate_id,
-                                Registration_No,
-                                candidate_name,
-                                course_name,
-                                Institution,
-                                ipfs_hash
-                            ))
-
-                            if tx_receipt:
-                                # Log the certificate details
-                                print(f"Certificate stored with ID: {certificate_id}")
-
-                                # Save certificate details locally
-                                st.session_state.certificates.append({
-                                    "registration_no": Registration_No,
-                                    "email": email,
-                                    "full_name": candidate_name,
-                                    "course_name": course_name,
-                                    "institution": Institution,
-                                    "certificate_id": certificate_id,
-                                    "ipfsHash": ipfs_hash
-                                })
-                                save_certificates(st.session_state.certificates)
-
-                                st.success(f"Certificate successfully generated with ID: {certificate_id}")
+                    'issue_date': datetime.now().strftime('%Y-%m-%d')
+                }, template_path)
+
+                # Upload to IPFS storage
+                ipfs_hash = upload_to_storage(pdf_bytes)
+                if ipfs_hash:
+                    # Generate certificate ID
+                    data_to_hash = f"{Registration_No}{candidate_name}{course_name}{Institution}".encode('utf-8')
+                    certificate_id = hashlib.sha256(data_to_hash).hexdigest()
+
+                    # Store in blockchain
+                    try:
+                        tx_receipt = handle_transaction(contract.functions.generateCertificate(
+                            certificate_id,
+                            Registration_No,
+                            candidate_name,
+                            course_name,
+                            Institution,
+                            ipfs_hash
+                        ))
+
+                        if tx_receipt:
+                            # Log the certificate details
+                            print(f"Certificate stored with ID: {certificate_id}")
+
+                            # Save certificate details locally
+                            certificate_store.add({
+                                "registration_no": Registration_No,
+                                "email": email,
+                                "full_name": candidate_name,
+                                "course_name": course_name,
+                                "institution": Institution,
+                                "certificate_id": certificate_id,
+                                "ipfsHash": ipfs_hash
+                            })
+
+                            st.success(f"Certificate successfully generated with ID: {certificate_id}")
                                 
-                                # Send email to student
-                                download_link = f"https://gateway.pinata.cloud/ipfs/{ipfs_hash}"
-                                email_status = send_email(email, certificate_id, download_link)
-                                st.info(email_status)
-
-                        except Exception as e:
-                            st.error(f"Blockchain Error: {str(e)}")
-                    else:
-                        st.error("Failed to upload the certificate to Pinata. Please try again.")
+                            # Email the student in the background
+                            download_link = get_storage().url(ipfs_hash)
+                            send_email(email, certificate_id, download_link)
+                            st.info(f"The certificate email to {email} has been queued for delivery.")
 
-                finally:
-                    # Clean up temporary files
-                    if os.path.exists(temp_file):
-                        os.remove(temp_file)
-                    if os.path.exists(pdf_file_path):
-                        os.remove(pdf_file_path)
+                    except Exception as e:
+                        st.error(f"Blockchain Error: {str(e)}")
+                else:
+                    st.error("Failed to upload the certificate to IPFS. Please try again.")
 
             except Exception as e:
                 st.error(f"Error generating certificate: {str(e)}")
-                if os.path.exists(pdf_file_path):
-                    os.remove(pdf_file_path)
 
     st.header("Bulk Certificate Generation")
     bulk_form = st.form("Bulk-Certificate-Generation")
-    bulk_file = bulk_form.file_uploader("Upload Excel or DOCX file", type=["xlsx", "docx"])
+    bulk_file = bulk_form.file_uploader("Upload Excel, DOCX or CSV file", type=["xlsx", "docx", "csv"])
+    issuance_mode = bulk_form.radio("Issuance Mode", ["Store each certificate on chain", "Anchor batch Merkle root"])
     bulk_submit = bulk_form.form_submit_button("Generate Certificates")
 
     if bulk_submit:
         if bulk_file:
-            file_type = "Excel" if bulk_file.name.endswith(".xlsx") else "DOCX"
-            process_bulk_certificates(bulk_file, file_type)
+            file_type = BULK_FILE_TYPES.get(os.path.splitext(bulk_file.name)[1].lower())
+            process_bulk_certificates(bulk_file, file_type, merkle_mode=issuance_mode == "Anchor batch Merkle root")
         else:
             st.error("Error! Please upload a file!")
 
+    show_bulk_jobs()
+
 elif page == "View Certificates":
     st.header("View Certificates")
     if st.button("↻ Refresh", key="refresh_view"):
@@ -557,16 +411,30 @@ elif page == "View Certificates":
             st.error("Error! Field cannot be empty.")
         else:
             try:
-                # Smart Contract Call
-                result = contract.functions.isVerified(certificate_id).call()
-                if result:
-                    st.success("Certificate validated successfully!")
-                    view_certificate(certificate_id)
+                record = certificate_store.get(certificate_id)
+                if record and record.get("merkle_leaf"):
+                    # Only the batch root is on chain; check the stored leaf against it
+                    is_valid, reason = check_merkle_record(record)
+                    if is_valid:
+                        st.success("Certificate validated successfully!")
+                        view_certificate(certificate_id, ipfs_hash=record["ipfsHash"])
+                    else:
+                        st.error(f"Invalid Certificate ID! {reason}")
                 else:
-                    st.error("Invalid Certificate ID! Certificate might be tampered or deleted")
+                    # Indexed state first; IDs the indexer has not reached yet fall back to the cached contract call
+                    indexed = get_indexer().get(certificate_id)
+                    result = indexed is not None or is_verified(certificate_id)
+                    if result:
+                        st.success("Certificate validated successfully!")
+                        view_certificate(certificate_id, ipfs_hash=indexed[4] if indexed else None)
+                    else:
+                        st.error("Invalid Certificate ID! Certificate might be tampered or deleted")
             except Exception as e:
                 st.error("Error verifying certificate: Certificate with this ID does not exist.")
 
+    with st.expander("Verification cache statistics"):
+        st.json(get_read_cache().stats())
+
 elif page == "Manage Institutions":
     st.header("Manage Institutions")
     if st.button("↻ Refresh", key="refresh_manage"):
@@ -605,24 +473,49 @@ elif page == "Revoke Certificate":
     if st.button("↻ Refresh", key="refresh_revoke"):
         refresh_page()
     
-    # Load certificates from blockchain
+    # Load certificates from the local event index instead of one contract call per certificate
     certificates = []
     try:
-        for cert in st.session_state.certificates:
-            try:
-                cert_details = contract.functions.getCertificate(cert['certificate_id']).call()
-                if cert_details and cert_details[4]:  # Check if IPFS hash exists
+        indexer = get_indexer()
+        indexer.catch_up()
+        local_certificates = certificate_store.all()
+        on_chain = indexer.active_certificates()
+        revoked_leaves = indexer.revoked_leaves(cert['merkle_leaf'] for cert in local_certificates if cert.get('merkle_leaf'))
+        # Certificates issued before INDEXER_START_BLOCK are not in the index; read them in batches instead
+        unindexed = [cert['certificate_id'] for cert in local_certificates
+                     if not cert.get('merkle_leaf') and cert['certificate_id'] not in on_chain]
+        for certificate_id, result in get_certificates(unindexed).items():
+            if result:
+                on_chain[certificate_id] = dict(zip(CERTIFICATE_COLUMNS, result))
+        unindexed_leaves = [cert['merkle_leaf'] for cert in local_certificates
+                            if cert.get('merkle_leaf') and not indexer.is_root_anchored(cert['merkle_root'])]
+        if unindexed_leaves:
+            revoked_leaves |= reader.revoked_leaves(unindexed_leaves)
+        for cert in local_certificates:
+            if cert.get('merkle_leaf'):
+                # Merkle-anchored certificates only have their revocation state on chain
+                if cert['merkle_leaf'] not in revoked_leaves:
                     certificates.append({
                         'id': cert['certificate_id'],
-                        'registration_no': cert_details[0],
-                        'candidate_name': cert_details[1],
-                        'course_name': cert_details[2],
-                        'institution': cert_details[3],
-                        'ipfs_hash': cert_details[4],
-                        'email': cert['email']  # Add email to the certificate details
+                        'registration_no': cert['registration_no'],
+                        'candidate_name': cert['full_name'],
+                        'course_name': cert['course_name'],
+                        'institution': cert['institution'],
+                        'ipfs_hash': cert['ipfsHash'],
+                        'email': cert['email']
                     })
-            except Exception:
                 continue
+            cert_details = on_chain.get(cert['certificate_id'])
+            if cert_details and cert_details['ipfs_hash']:  # Check if IPFS hash exists
+                certificates.append({
+                    'id': cert['certificate_id'],
+                    'registration_no': cert_details['registration_no'],
+                    'candidate_name': cert_details['candidate_name'],
+                    'course_name': cert_details['course_name'],
+                    'institution': cert_details['institution'],
+                    'ipfs_hash': cert_details['ipfs_hash'],
+                    'email': cert['email']  # Add email to the certificate details
+                })
 
         if certificates:
             df = pd.DataFrame(certificates)
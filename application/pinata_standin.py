@@ -0,0 +1,186 @@
+"""
+A local stand-in for Pinata: the pinning endpoints the app uses plus an
+IPFS gateway, backed by a content-addressed directory (utils.storage
+.LocalStorage), so issuance can run and be benchmarked with no network.
+
+Run from the application directory:
+    python pinata_standin.py --port 8090 --directory ipfs_store
+and point the app at it:
+    PINATA_API_URL=http://127.0.0.1:8090
+    IPFS_GATEWAY=http://127.0.0.1:8090/ipfs
+
+--latency delays every answer and --capacity answers 429 while more than
+that many requests are in flight, to exercise the uploader's backoff.
+"""
+import argparse
+import json
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from utils.storage import LocalStorage
+
+
+def _multipart_file(content_type, body):
+    """
+    (filename, bytes) of the first file part of a multipart/form-data body.
+    Split on the boundary directly; the email parser takes tens of
+    milliseconds per megabyte, which would dominate any benchmark.
+    """
+    boundary = next((param.split("=", 1)[1].strip('"') for param in content_type.split(";")
+                     if param.strip().startswith("boundary=")), None)
+    if not boundary:
+        return None, None
+    for part in body.split(b"--" + boundary.encode("latin-1"))[1:-1]:
+        headers, _, content = part.partition(b"\r\n\r\n")
+        match = re.search(rb'filename="([^"]*)"', headers)
+        if match:
+            # Each part ends with the CRLF that precedes the next boundary
+            return match.group(1).decode("utf-8"), content[:-2]
+    return None, None
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Set on the handler class by make_server
+    storage = None
+    latency = 0.0
+    capacity = None
+    active = 0
+    active_lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body=b"", content_type="application/json", headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status, payload):
+        self._send(status, json.dumps(payload).encode())
+
+    def _handle(self, handler):
+        cls = type(self)
+        with cls.active_lock:
+            cls.active += 1
+            overloaded = cls.capacity is not None and cls.active > cls.capacity
+        try:
+            if cls.latency:
+                time.sleep(cls.latency)
+            if overloaded:
+                self._send_json(429, {"error": "Rate limit exceeded"})
+            else:
+                handler()
+        finally:
+            with cls.active_lock:
+                cls.active -= 1
+
+    def _authorised(self):
+        if self.headers.get("pinata_api_key") and self.headers.get("pinata_secret_api_key"):
+            return True
+        self._send_json(401, {"error": "Missing API credentials"})
+        return False
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self._handle(lambda: self._pin(body))
+
+    def do_DELETE(self):
+        self._handle(self._unpin)
+
+    def do_GET(self):
+        self._handle(self._get)
+
+    def _pin(self, body):
+        if urlparse(self.path).path != "/pinning/pinFileToIPFS":
+            return self._send_json(404, {"error": "Not found"})
+        if not self._authorised():
+            return
+        _, data = _multipart_file(self.headers.get("Content-Type", ""), body)
+        if data is None:
+            return self._send_json(400, {"error": "No file provided"})
+        self._send_json(200, {
+            "IpfsHash": self.storage.pin(data),
+            "PinSize": len(data),
+            "Timestamp": datetime.now(timezone.utc).isoformat()
+        })
+
+    def _unpin(self):
+        path = urlparse(self.path).path
+        if not path.startswith("/pinning/unpin/"):
+            return self._send_json(404, {"error": "Not found"})
+        if not self._authorised():
+            return
+        try:
+            removed = self.storage.unpin(path.rsplit("/", 1)[1])
+        except ValueError:
+            removed = False
+        self._send(200, b"OK", "text/plain") if removed else self._send_json(404, {"error": "Not pinned"})
+
+    def _get(self):
+        url = urlparse(self.path)
+        if url.path == "/data/pinList":
+            if not self._authorised():
+                return
+            cid = parse_qs(url.query).get("hashContains", [""])[0]
+            try:
+                rows = [{"ipfs_pin_hash": cid}] if self.storage.exists(cid) else []
+            except ValueError:
+                rows = []
+            return self._send_json(200, {"count": len(rows), "rows": rows})
+        if url.path.startswith("/ipfs/"):
+            cid = url.path[len("/ipfs/"):]
+            try:
+                if self.storage.exists(cid):
+                    return self._send(200, b"".join(self.storage.fetch(cid)), "application/pdf")
+            except ValueError:
+                pass
+        self._send_json(404, {"error": "Not found"})
+
+
+def make_server(directory="ipfs_store", host="127.0.0.1", port=0, latency=0.0, capacity=None):
+    """A ThreadingHTTPServer for the stand-in; port 0 picks a free port"""
+    handler = type("Handler", (StandinHandler,), {
+        "storage": LocalStorage(directory), "latency": latency, "capacity": capacity,
+        "active": 0, "active_lock": threading.Lock()
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def start_server(*args, **kwargs):
+    """Start a stand-in in a background thread; returns (server, base URL)"""
+    server = make_server(*args, **kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address[:2]
+    return server, f"http://{host}:{port}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--directory", default="ipfs_store", help="where pinned files are kept")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every answer")
+    parser.add_argument("--capacity", type=int, help="concurrent requests served before answering 429")
+    args = parser.parse_args()
+
+    server = make_server(args.directory, args.host, args.port, args.latency, args.capacity)
+    print(f"Pinata stand-in on http://{args.host}:{args.port} (gateway at /ipfs), storing in {args.directory}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+import csv
+import io
+import zipfile
+from xml.etree.ElementTree import iterparse
+
+from openpyxl import load_workbook
+
+# Bulk file columns after normalisation (stripped, lower-cased, spaces to underscores)
+COLUMN_MAPPING = {
+    'registration_no': 'Registration No',
+    'full_name': 'Full Name',
+    'course': 'Course',
+    'email': 'Email'
+}
+BULK_FILE_TYPES = {".xlsx": "Excel", ".docx": "DOCX", ".csv": "CSV"}
+
+WORD_NAMESPACE = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+
+def normalize_column_name(name):
+    name = str(name).strip().lower().replace(' ', '_')
+    reverse_mapping = {v.lower().replace(' ', '_'): k for k, v in COLUMN_MAPPING.items()}
+    return reverse_mapping.get(name, name)
+
+
+def _cell_text(value):
+    """Cell values as the text a user typed; spreadsheets hand back numbers for numeric registration numbers"""
+    if value is None:
+        return None
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    text = str(value).strip()
+    return text or None
+
+
+def _rows_to_records(rows):
+    """First row is the header; yield the rest as dicts keyed by normalised column names, skipping blank rows"""
+    keys = None
+    for row in rows:
+        if keys is None:
+            keys = [normalize_column_name(key) if key is not None else "" for key in row]
+            continue
+        values = [_cell_text(value) for value in row]
+        if any(values):
+            yield dict(zip(keys, values))
+
+
+def iter_xlsx_rows(file):
+    """Rows of the first worksheet, read in openpyxl's read-only mode one row at a time"""
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    try:
+        yield from _rows_to_records(workbook.worksheets[0].iter_rows(values_only=True))
+    finally:
+        workbook.close()
+
+
+def _docx_table_rows(file):
+    """
+    Cell text of every top-level table row in document order, parsed
+    incrementally from word/document.xml. Finished rows and body elements
+    are dropped from the tree, so memory stays flat however long the
+    table is.
+    """
+    with zipfile.ZipFile(file) as archive, archive.open("word/document.xml") as document:
+        body = None
+        tables = []
+        for event, element in iterparse(document, events=("start", "end")):
+            if event == "start":
+                if element.tag == WORD_NAMESPACE + "body":
+                    body = element
+                elif element.tag == WORD_NAMESPACE + "tbl":
+                    tables.append(element)
+                continue
+            if element.tag == WORD_NAMESPACE + "tbl":
+                tables.pop()
+            if element.tag == WORD_NAMESPACE + "tr" and len(tables) == 1:
+                yield [text for cell in element.findall(WORD_NAMESPACE + "tc") for text in _docx_cell_text(cell)]
+                tables[0].remove(element)
+            elif not tables and body is not None and element in body:
+                body.remove(element)
+
+
+def _run_text(node):
+    if node.tag == WORD_NAMESPACE + "t":
+        return node.text or ""
+    if node.tag == WORD_NAMESPACE + "tab":
+        return "\t"
+    if node.tag in (WORD_NAMESPACE + "br", WORD_NAMESPACE + "cr"):
+        return "\n"
+    return ""
+
+
+def _docx_cell_text(cell):
+    """Paragraph text joined by newlines, repeated for cells merged across columns (as python-docx does)"""
+    text = "\n".join("".join(_run_text(node) for node in paragraph.iter()) for paragraph in cell.findall(WORD_NAMESPACE + "p"))
+    span = cell.find(f"{WORD_NAMESPACE}tcPr/{WORD_NAMESPACE}gridSpan")
+    return [text] * (int(span.get(WORD_NAMESPACE + "val")) if span is not None else 1)
+
+
+def iter_docx_rows(file):
+    """Rows of the document's tables; the first table's first row is the header for all of them"""
+    yield from _rows_to_records(_docx_table_rows(file))
+
+
+def iter_csv_rows(file):
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    try:
+        yield from _rows_to_records(csv.reader(text))
+    finally:
+        # Leave the uploaded file open for the caller
+        text.detach()
+
+
+BULK_READERS = {"Excel": iter_xlsx_rows, "DOCX": iter_docx_rows, "CSV": iter_csv_rows}
+
+
+def read_bulk_rows(file, file_type):
+    """Yield each data row of a bulk upload as a dict with normalised column names"""
+    return BULK_READERS[file_type](file)
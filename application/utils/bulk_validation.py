@@ -0,0 +1,95 @@
+import hashlib
+from itertools import islice
+
+import numpy as np
+import pandas as pd
+
+REQUIRED_COLUMNS = ("registration_no", "full_name", "course", "email")
+# Rows validated per DataFrame; keeps memory flat for files of any length
+VALIDATION_CHUNK_SIZE = 5000
+
+
+def certificate_ids(registration_nos, candidate_names, course_names, institution):
+    return [hashlib.sha256(f"{registration_no}{candidate_name}{course_name}{institution}".encode('utf-8')).hexdigest()
+            for registration_no, candidate_name, course_name in zip(registration_nos, candidate_names, course_names)]
+
+
+class BulkValidator:
+    """
+    Validates bulk-file rows a DataFrame at a time: normalises the fields,
+    rejects rows with missing fields, registration numbers or emails
+    already in the certificate store, and repeats within the file, and
+    computes the certificate IDs of the rest. Registration numbers and
+    emails accepted in earlier chunks are remembered, so duplicates are
+    caught across the whole file.
+    """
+
+    def __init__(self, institution, certificate_store):
+        self.institution = institution
+        self.certificate_store = certificate_store
+        self._registration_nos = set()
+        self._emails = set()
+        self.accepted = 0
+        self.rejected = 0
+
+    def _claim(self, values, candidates, seen):
+        """Flag candidate rows whose value repeats an earlier candidate's; the first occurrence claims it"""
+        values = values[candidates]
+        # Membership per value; isin would rebuild a hash table of everything seen for every chunk
+        repeated = values.duplicated() | np.fromiter((value in seen for value in values.tolist()), bool, len(values))
+        seen.update(values[~repeated].tolist())
+        return repeated.reindex(candidates.index, fill_value=False)
+
+    def validate(self, df):
+        """
+        The chunk's rows with their normalised certificate fields and an
+        `error` column, None for rows that can be issued.
+        """
+        # Plain object columns: pandas' string dtype is far slower to hand back to Python
+        text = df.reindex(columns=list(REQUIRED_COLUMNS)).apply(lambda column: column.map(str, na_action="ignore").str.strip())
+        text = text.mask(text == "")
+        registration_no = text["registration_no"].str.upper()
+        email = text["email"]
+
+        missing = text.isna().any(axis=1)
+        issued_registration_no = registration_no.isin(self.certificate_store.existing_registration_nos(registration_no[~missing].tolist()))
+        used_email = email.isin(self.certificate_store.existing_emails(email[~missing].tolist()))
+        candidates = ~(missing | issued_registration_no | used_email)
+        repeated_registration_no = self._claim(registration_no, candidates, self._registration_nos)
+        repeated_email = self._claim(email, candidates & ~repeated_registration_no, self._emails)
+
+        result = pd.DataFrame({
+            "registration_no": registration_no,
+            "candidate_name": text["full_name"].str.upper(),
+            "course_name": text["course"],
+            "email": email,
+            "error": np.select(
+                [missing, issued_registration_no, used_email, repeated_registration_no, repeated_email],
+                ["incomplete details", "duplicate registration number", "duplicate email",
+                 "duplicate registration number in file", "duplicate email in file"],
+                default=None
+            )
+        }, index=df.index).astype(object)
+        result = result.where(result.notna(), None)
+        clean = result["error"].isna()
+        result["certificate_id"] = None
+        result.loc[clean, "certificate_id"] = certificate_ids(result.loc[clean, "registration_no"].tolist(), result.loc[clean, "candidate_name"].tolist(),
+                                                              result.loc[clean, "course_name"].tolist(), self.institution)
+        self.accepted += int(clean.sum())
+        self.rejected += len(result) - int(clean.sum())
+        return result
+
+    def validate_rows(self, rows, chunk_size=VALIDATION_CHUNK_SIZE):
+        """
+        Validate an iterable of row dicts chunk by chunk; yields (source,
+        fields, error) per row in order, as JobStore.create_job takes them.
+        """
+        rows = iter(rows)
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                return
+            result = self.validate(pd.DataFrame.from_records(chunk))
+            columns = [name for name in result.columns if name != "error"]
+            fields = (dict(zip(columns, values)) for values in zip(*(result[name].tolist() for name in columns)))
+            yield from zip(chunk, fields, result["error"].tolist())
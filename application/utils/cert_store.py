@@ -0,0 +1,430 @@
+import fcntl
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+# Columns in the order records are stored; keys match the certificates.json records
+RECORD_FIELDS = ("certificate_id", "registration_no", "email", "full_name", "course_name", "institution", "ipfsHash", "merkle_root", "merkle_leaf")
+# Values per IN (...) query; SQLite before 3.32 allows 999 bound parameters
+LOOKUP_CHUNK_SIZE = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS certificates (
+    certificate_id TEXT PRIMARY KEY,
+    registration_no TEXT NOT NULL UNIQUE,
+    email TEXT NOT NULL UNIQUE,
+    full_name TEXT NOT NULL,
+    course_name TEXT NOT NULL,
+    institution TEXT NOT NULL,
+    ipfsHash TEXT NOT NULL,
+    merkle_root TEXT,
+    merkle_leaf TEXT
+);
+CREATE TABLE IF NOT EXISTS store_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+class CertificateStore:
+    """
+    Locally issued certificates in an embedded SQLite database. Unique
+    indexes on certificate_id, registration_no and email make duplicate
+    checks O(1), and every write is its own small transaction instead of a
+    rewrite of the whole file.
+    """
+
+    def __init__(self, db_path="certificates.db", json_path="certificates.json"):
+        self.db_path = db_path
+        # One connection shared by every session and worker thread, serialised by the lock
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+        if json_path:
+            self.import_json(json_path)
+
+    def import_json(self, json_path):
+        """
+        One-time import of an existing certificates.json. Returns the records
+        that were rejected as duplicates.
+        """
+        with self._lock:
+            imported = self._conn.execute("SELECT value FROM store_meta WHERE key = 'json_imported'").fetchone()
+        if imported or not os.path.exists(json_path):
+            return []
+        with open(json_path, "r") as file:
+            records = json.load(file)
+        rejected = self.add_many(records, skip_duplicates=True)
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO store_meta (key, value) VALUES ('json_imported', ?)", (os.path.abspath(json_path),))
+        if rejected:
+            print(f"Skipped {len(rejected)} duplicate certificates while importing {json_path}")
+        return rejected
+
+    @staticmethod
+    def _to_row(record):
+        return tuple(record.get(field) for field in RECORD_FIELDS)
+
+    @staticmethod
+    def _to_record(row):
+        record = {field: row[field] for field in RECORD_FIELDS}
+        # Keep records shaped like the JSON ones: Merkle fields only when present
+        for field in ("merkle_root", "merkle_leaf"):
+            if record[field] is None:
+                del record[field]
+        return record
+
+    def all(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM certificates ORDER BY rowid").fetchall()
+        return [self._to_record(row) for row in rows]
+
+    def get(self, certificate_id):
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM certificates WHERE certificate_id = ?", (certificate_id,)).fetchone()
+        return self._to_record(row) if row else None
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM certificates").fetchone()[0]
+
+    def has_registration_no(self, registration_no):
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM certificates WHERE registration_no = ?", (registration_no,)).fetchone() is not None
+
+    def has_email(self, email):
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM certificates WHERE email = ?", (email,)).fetchone() is not None
+
+    def _existing(self, column, values):
+        values = list(dict.fromkeys(values))
+        found = set()
+        with self._lock:
+            # Chunked to stay under SQLite's bound-parameter limit; each chunk is an index lookup
+            for start in range(0, len(values), LOOKUP_CHUNK_SIZE):
+                chunk = values[start:start + LOOKUP_CHUNK_SIZE]
+                rows = self._conn.execute(f"SELECT {column} FROM certificates WHERE {column} IN ({', '.join('?' for _ in chunk)})", chunk)
+                found.update(row[0] for row in rows)
+        return found
+
+    def existing_registration_nos(self, registration_nos):
+        """The subset of registration_nos already issued"""
+        return self._existing("registration_no", registration_nos)
+
+    def existing_emails(self, emails):
+        """The subset of emails already used"""
+        return self._existing("email", emails)
+
+    def add(self, record):
+        """Insert one certificate; raises sqlite3.IntegrityError on a duplicate ID, registration number or email"""
+        placeholders = ", ".join("?" for _ in RECORD_FIELDS)
+        with self._lock, self._conn:
+            self._conn.execute(f"INSERT INTO certificates ({', '.join(RECORD_FIELDS)}) VALUES ({placeholders})", self._to_row(record))
+
+    def add_many(self, records, skip_duplicates=False):
+        """
+        Insert records in one transaction. With skip_duplicates, duplicates
+        are left out and returned; otherwise the first one aborts the whole
+        insert.
+        """
+        placeholders = ", ".join("?" for _ in RECORD_FIELDS)
+        statement = f"INSERT INTO certificates ({', '.join(RECORD_FIELDS)}) VALUES ({placeholders})"
+        rejected = []
+        with self._lock, self._conn:
+            for record in records:
+                try:
+                    self._conn.execute(statement, self._to_row(record))
+                except sqlite3.IntegrityError:
+                    if not skip_duplicates:
+                        raise
+                    rejected.append(record)
+        return rejected
+
+    def delete(self, certificate_id):
+        with self._lock, self._conn:
+            return self._conn.execute("DELETE FROM certificates WHERE certificate_id = ?", (certificate_id,)).rowcount > 0
+
+    def delete_many(self, certificate_ids):
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM certificates WHERE certificate_id = ?", [(certificate_id,) for certificate_id in certificate_ids])
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM certificates")
+
+
+class JournalCertificateStore:
+    """
+    Certificate store without a database: the current state lives in memory
+    and every change is appended to a line-delimited JSON journal and
+    fsynced, so a write costs one short append however many certificates
+    exist. A torn last line from a crash is ignored on replay. Once the
+    journal passes compact_threshold bytes, and has at least doubled since
+    its last compaction, it is rewritten in the background as one insert
+    per live certificate.
+
+    Several processes (the page and the job worker) can share a journal:
+    appends and compaction hold an exclusive lock on a sidecar lock file,
+    and every read or check first applies what the others appended since,
+    starting over when another process has compacted the journal.
+    """
+
+    def __init__(self, journal_path="certificates.journal", json_path="certificates.json", compact_threshold=4 * 1024 * 1024):
+        self.journal_path = journal_path
+        self.compact_threshold = compact_threshold
+        self._lock = threading.RLock()
+        self._records = {}
+        self._by_registration_no = {}
+        self._by_email = {}
+        self._compacting = False
+        self._journal = None
+        # Bytes of the journal applied to the in-memory state
+        self._offset = 0
+        # Size of the journal as last compacted; appends past twice this trigger the next compaction
+        self._snapshot_size = 0
+        self._lock_file = open(f"{journal_path}.lock", "a")
+        with self._lock, self._file_lock(fcntl.LOCK_EX):
+            if not os.path.exists(journal_path) and json_path and os.path.exists(json_path):
+                # One-time import: the existing JSON becomes the first snapshot
+                with open(json_path, "r") as file:
+                    self._write_snapshot(journal_path, json.load(file))
+            self._sync(truncate=True)
+
+    @contextmanager
+    def _file_lock(self, operation):
+        """flock is held per open file, not per thread: take it only while holding self._lock, and never nested"""
+        fcntl.flock(self._lock_file, operation)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _write_snapshot(path, records):
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            for record in records:
+                file.write(json.dumps({"op": "insert", "record": record}) + "\n")
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, path)
+
+    def _sync(self, truncate=False):
+        """
+        Apply the journal entries appended since the last sync, by this or
+        another process; replay from the start if the file was replaced by
+        a compaction. Only called under the file lock; with the exclusive
+        one, a torn tail left by a crashed writer is cut off.
+        """
+        replaced = False
+        if self._journal is not None:
+            stat = os.stat(self.journal_path)
+            replaced = stat.st_ino != os.fstat(self._journal.fileno()).st_ino
+            if not replaced and stat.st_size == self._offset:
+                # Nothing new: the common case, without reading the file
+                return
+        if self._journal is None or replaced:
+            if self._journal is not None:
+                self._journal.close()
+            self._journal = open(self.journal_path, "a", encoding="utf-8")
+            self._records.clear()
+            self._by_registration_no.clear()
+            self._by_email.clear()
+            self._offset = 0
+        with open(self.journal_path, "rb") as file:
+            file.seek(self._offset)
+            for line in file:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # Only the last line can be torn, by a crash mid-append
+                    break
+                if not line.endswith(b"\n"):
+                    break
+                self._apply(entry)
+                self._offset += len(line)
+        if replaced:
+            # Compacted by another process; close enough to its snapshot size
+            self._snapshot_size = self._offset
+        # Cut off a torn tail so the next append starts on a fresh line
+        if truncate and self._offset != os.path.getsize(self.journal_path):
+            os.truncate(self.journal_path, self._offset)
+
+    def _apply(self, entry):
+        if entry["op"] == "insert":
+            record = entry["record"]
+            if self._conflicts(record):
+                return False
+            self._records[record["certificate_id"]] = record
+            self._by_registration_no[record["registration_no"]] = record["certificate_id"]
+            self._by_email[record["email"]] = record["certificate_id"]
+        elif entry["op"] == "revoke":
+            record = self._records.pop(entry["certificate_id"], None)
+            if record is None:
+                return False
+            del self._by_registration_no[record["registration_no"]]
+            del self._by_email[record["email"]]
+        elif entry["op"] == "clear":
+            self._records.clear()
+            self._by_registration_no.clear()
+            self._by_email.clear()
+        return True
+
+    def _conflicts(self, record):
+        return (record["certificate_id"] in self._records
+                or record["registration_no"] in self._by_registration_no
+                or record["email"] in self._by_email)
+
+    def _append(self, entries):
+        """Called under the exclusive file lock, right after a sync"""
+        for entry in entries:
+            self._journal.write(json.dumps(entry) + "\n")
+        self._journal.flush()
+        os.fsync(self._journal.fileno())
+        self._offset = os.fstat(self._journal.fileno()).st_size
+        if not self._compacting and self._offset > max(self.compact_threshold, 2 * self._snapshot_size):
+            self._compacting = True
+            threading.Thread(target=self.compact, daemon=True).start()
+
+    @contextmanager
+    def _locked(self, operation):
+        """Take both locks and catch up with the journal"""
+        with self._lock, self._file_lock(operation):
+            self._sync(truncate=operation == fcntl.LOCK_EX)
+            yield
+
+    def _read(self):
+        return self._locked(fcntl.LOCK_SH)
+
+    def compact(self):
+        """Rewrite the journal as a snapshot of the live certificates"""
+        old_journal = None
+        try:
+            with self._read():
+                records = list(self._records.values())
+                offset = self._offset
+                # Held open until the swap so its inode cannot be reused by another compaction's file
+                old_journal = open(self.journal_path, "rb")
+            # The snapshot is written without the locks; appends made meanwhile are copied over before the swap
+            temp_path = f"{self.journal_path}.compact.{os.getpid()}"
+            self._write_snapshot(temp_path, records)
+            snapshot_size = os.path.getsize(temp_path)
+            with self._locked(fcntl.LOCK_EX):
+                if os.fstat(old_journal.fileno()).st_ino != os.stat(self.journal_path).st_ino:
+                    # Another process compacted the journal meanwhile
+                    os.remove(temp_path)
+                    return
+                with open(temp_path, "ab") as new_journal:
+                    old_journal.seek(offset)
+                    new_journal.write(old_journal.read())
+                    new_journal.flush()
+                    os.fsync(new_journal.fileno())
+                os.replace(temp_path, self.journal_path)
+                self._sync()
+                self._snapshot_size = snapshot_size
+        finally:
+            if old_journal is not None:
+                old_journal.close()
+            self._compacting = False
+
+    def all(self):
+        with self._read():
+            return list(self._records.values())
+
+    def get(self, certificate_id):
+        with self._read():
+            return self._records.get(certificate_id)
+
+    def count(self):
+        with self._read():
+            return len(self._records)
+
+    def has_registration_no(self, registration_no):
+        with self._read():
+            return registration_no in self._by_registration_no
+
+    def has_email(self, email):
+        with self._read():
+            return email in self._by_email
+
+    def existing_registration_nos(self, registration_nos):
+        with self._read():
+            return set(registration_nos) & self._by_registration_no.keys()
+
+    def existing_emails(self, emails):
+        with self._read():
+            return set(emails) & self._by_email.keys()
+
+    def add(self, record):
+        """Insert one certificate; raises sqlite3.IntegrityError on a duplicate, like CertificateStore"""
+        with self._locked(fcntl.LOCK_EX):
+            if self._conflicts(record):
+                raise sqlite3.IntegrityError("Duplicate certificate ID, registration number or email")
+            self._append([{"op": "insert", "record": record}])
+            self._apply({"op": "insert", "record": record})
+
+    def add_many(self, records, skip_duplicates=False):
+        rejected = []
+        entries = []
+        with self._locked(fcntl.LOCK_EX):
+            for record in records:
+                if self._conflicts(record):
+                    if not skip_duplicates:
+                        # Undo this call's in-memory inserts; nothing has been journaled yet
+                        for entry in entries:
+                            self._apply({"op": "revoke", "certificate_id": entry["record"]["certificate_id"]})
+                        raise sqlite3.IntegrityError("Duplicate certificate ID, registration number or email")
+                    rejected.append(record)
+                    continue
+                entry = {"op": "insert", "record": record}
+                self._apply(entry)
+                entries.append(entry)
+            if entries:
+                self._append(entries)
+        return rejected
+
+    def delete(self, certificate_id):
+        with self._locked(fcntl.LOCK_EX):
+            if certificate_id not in self._records:
+                return False
+            entry = {"op": "revoke", "certificate_id": certificate_id}
+            self._append([entry])
+            return self._apply(entry)
+
+    def delete_many(self, certificate_ids):
+        with self._locked(fcntl.LOCK_EX):
+            entries = [{"op": "revoke", "certificate_id": certificate_id} for certificate_id in certificate_ids if certificate_id in self._records]
+            if entries:
+                self._append(entries)
+            for entry in entries:
+                self._apply(entry)
+
+    def clear(self):
+        with self._locked(fcntl.LOCK_EX):
+            self._append([{"op": "clear"}])
+            self._apply({"op": "clear"})
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_certificate_store():
+    """
+    Process-wide certificate store shared by every Streamlit session.
+    CERT_STORE_BACKEND selects "sqlite" (default) or "journal".
+    """
+    global _store
+    with _store_lock:
+        if _store is None:
+            if os.getenv("CERT_STORE_BACKEND", "sqlite") == "journal":
+                _store = JournalCertificateStore()
+            else:
+                _store = CertificateStore()
+        return _store
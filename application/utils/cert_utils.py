@@ -2,31 +2,41 @@ import qrcode
 from reportlab.lib.pagesizes import landscape, letter
 from reportlab.pdfgen import canvas
 from reportlab.lib.units import inch
+from reportlab.lib.utils import ImageReader
 from reportlab.pdfbase.ttfonts import TTFont
 from reportlab.pdfbase import pdfmetrics
 from PyPDF2 import PdfWriter, PdfReader
+from PyPDF2.generic import ArrayObject, DecodedStreamObject, DictionaryObject, NameObject
 from io import BytesIO
 import os
 import hashlib
 import json
+import threading
+
+_font_lock = threading.Lock()
+# Resource name of the per-certificate overlay stamped onto the template page
+OVERLAY_NAME = "/CertificateOverlay"
+# Where the QR code is drawn on page 1, in points from the bottom-left corner: (x, y, size)
+QR_BOX = (0.5 * inch, 0.5 * inch, 1.5 * inch)
+# Document info entry holding the QR payload as JSON
+PAYLOAD_KEY = "/CertificatePayload"
 
-def generate_certificate_pdf(certificate_data, file_path, template_path):
-    # Ensure file_path is not empty
-    if not file_path:
-        raise ValueError("The file_path parameter is empty")
 
-    # Register custom fonts
-    pdfmetrics.registerFont(TTFont('Damion', '../assets/Damion.ttf'))
-    pdfmetrics.registerFont(TTFont('Playball', '../assets/Playball.ttf'))
+def register_fonts(font_dir=os.path.join("..", "assets")):
+    """Register the custom certificate fonts once per process"""
+    with _font_lock:
+        registered = pdfmetrics.getRegisteredFontNames()
+        for font_name in ("Damion", "Playball"):
+            if font_name not in registered:
+                pdfmetrics.registerFont(TTFont(font_name, os.path.join(font_dir, f"{font_name}.ttf")))
 
+
+def certificate_payload(certificate_data):
+    """The QR payload of a certificate: its ID plus the printed details, and the Merkle proof in anchoring mode"""
     # Generate the certificate ID consistently
     data_to_hash = f"{certificate_data['registration_no']}{certificate_data['student_name']}{certificate_data['course_name']}{certificate_data['institution']}".encode('utf-8')
     certificate_id = hashlib.sha256(data_to_hash).hexdigest()
 
-    # Log the generated certificate ID
-    print(f"Generated Certificate ID: {certificate_id}")
-
-    # Generate QR code with all the certificate details
     qr_data = {
         "certificate_id": certificate_id,
         "registration_no": certificate_data['registration_no'],
@@ -34,6 +44,23 @@ def generate_certificate_pdf(certificate_data, file_path, template_path):
         "course_name": certificate_data['course_name'],
         "institution": certificate_data['institution']
     }
+    # Merkle anchoring mode: the certificate carries its own inclusion proof
+    if certificate_data.get('merkle_root'):
+        qr_data["merkle_leaf"] = certificate_data['merkle_leaf']
+        qr_data["merkle_proof"] = certificate_data['merkle_proof']
+        qr_data["merkle_root"] = certificate_data['merkle_root']
+    return qr_data
+
+
+def render_overlay(certificate_data, qr_data=None):
+    """Draw the per-certificate text and QR code on a blank page; returns (certificate_id, overlay PDF bytes)"""
+    register_fonts()
+
+    qr_data = qr_data or certificate_payload(certificate_data)
+    certificate_id = qr_data["certificate_id"]
+
+    # Log the generated certificate ID
+    print(f"Generated Certificate ID: {certificate_id}")
 
     # Log the QR code data
     print(f"QR Code Data: {qr_data}")
@@ -49,57 +76,144 @@ def generate_certificate_pdf(certificate_data, file_path, template_path):
     qr.make(fit=True)
     img = qr.make_image(fill='black', back_color='white')
 
-    # Save QR code as an image
-    qr_code_path = os.path.join("..", "assets", "qr_code.png")
-    img.save(qr_code_path)
+    # Keep the QR code image in memory
+    qr_buffer = BytesIO()
+    img.save(qr_buffer, format="PNG")
+    qr_buffer.seek(0)
 
-    # Create the directory if it does not exist
-    directory = os.path.dirname(file_path)
-    if directory:
-        os.makedirs(directory, exist_ok=True)
+    # Draw the user inputs on an in-memory overlay page
+    overlay_buffer = BytesIO()
+    c = canvas.Canvas(overlay_buffer, pagesize=landscape(letter))
 
-    # Create a temporary PDF with the user inputs
-    temp_folder = os.path.join("..", "application", "temp")
-    os.makedirs(temp_folder, exist_ok=True)
-    temp_pdf_path = os.path.join(temp_folder, "temp_certificate.pdf")
-    c = canvas.Canvas(temp_pdf_path, pagesize=landscape(letter))
-    
     # Add the certificate details
     c.setFont("Damion", 36)
     c.drawString(3*inch, 5*inch, certificate_data['student_name'])
-    
+
     c.setFont("Playball", 18)
     c.drawString(3*inch, 4.5*inch, f"Registration Number: {certificate_data['registration_no']}")
     c.drawString(3*inch, 4*inch, f"Course: {certificate_data['course_name']}")
     c.drawString(3*inch, 3.5*inch, f"Institution: {certificate_data['institution']}")  # Add institution name
 
     # Draw the QR code at the bottom left
-    c.drawImage(qr_code_path, 0.5 * inch, 0.5 * inch, 1.5 * inch, 1.5 * inch)
+    qr_x, qr_y, qr_size = QR_BOX
+    c.drawImage(ImageReader(qr_buffer), qr_x, qr_y, qr_size, qr_size)
 
     # Add issue date at the bottom right in white color with larger font size
     c.setFont("Playball", 12)  # Increase font size
     c.setFillColorRGB(1, 1, 1)  # Set text color to white
     c.drawString(9.9 * inch, 0.5 * inch, certificate_data['issue_date'])  # Adjust position
 
-    # Save the temporary PDF
     c.save()
+    return certificate_id, overlay_buffer.getvalue()
+
+
+def stamp_overlay(writer, page, overlay_page):
+    """
+    Draw overlay_page on top of page as a form XObject. Unlike merge_page,
+    this never decodes or rewrites the template's own content stream, which
+    is by far the largest part of the certificate.
+    """
+    content = DecodedStreamObject()
+    content.set_data(overlay_page.get_contents().get_data())
+    form = content.flate_encode()
+    form.update({
+        NameObject("/Type"): NameObject("/XObject"),
+        NameObject("/Subtype"): NameObject("/Form"),
+        NameObject("/BBox"): overlay_page.mediabox,
+        NameObject("/Resources"): overlay_page[NameObject("/Resources")].clone(writer)
+    })
+    form_ref = writer._add_object(form)
+
+    resources = page[NameObject("/Resources")]
+    if NameObject("/XObject") not in resources:
+        resources[NameObject("/XObject")] = DictionaryObject()
+    resources[NameObject("/XObject")][NameObject(OVERLAY_NAME)] = form_ref
+
+    # Wrap the template in q/Q so its graphics state cannot leak into the overlay
+    save_state = DecodedStreamObject()
+    save_state.set_data(b"q\n")
+    draw_overlay = DecodedStreamObject()
+    draw_overlay.set_data(f"\nQ q {OVERLAY_NAME} Do Q\n".encode("ascii"))
+    contents = page.raw_get(NameObject("/Contents"))
+    if isinstance(contents.get_object(), ArrayObject):
+        contents = list(contents.get_object())
+    else:
+        contents = [contents]
+    page[NameObject("/Contents")] = ArrayObject(
+        [writer._add_object(save_state)] + contents + [writer._add_object(draw_overlay)]
+    )
+
 
-    # Read the template PDF and the temporary PDF
-    with open(template_path, "rb") as template_file, open(temp_pdf_path, "rb") as temp_file:
-        template_pdf = PdfReader(template_file)
-        temp_pdf = PdfReader(temp_file)
+class CertificateTemplate:
+    """
+    Keeps the parsed template page in memory and stamps certificate overlays
+    onto copies of it. The template is re-parsed only when its file mtime
+    changes.
+    """
+
+    def __init__(self, template_path):
+        self.template_path = template_path
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._page = None
+
+    def _load_if_changed(self):
+        mtime = os.path.getmtime(self.template_path)
+        if mtime != self._mtime:
+            with open(self.template_path, "rb") as template_file:
+                # Parse from memory so the reader never holds the file open
+                self._page = PdfReader(BytesIO(template_file.read())).pages[0]
+            self._mtime = mtime
+
+    def render(self, certificate_data):
+        """Render a certificate onto the template and return the PDF as bytes"""
+        qr_data = certificate_payload(certificate_data)
+        _, overlay = render_overlay(certificate_data, qr_data)
 
-        # Create a new PDF with the template and the new content
         output = PdfWriter()
-        page = template_pdf.pages[0]
-        page.merge_page(temp_pdf.pages[0])
-        output.add_page(page)
+        with self._lock:
+            self._load_if_changed()
+            # add_page copies the cached page into the writer, so stamping below leaves the cache untouched.
+            # The shared reader resolves objects lazily and is not thread-safe, hence the lock
+            page = output.add_page(self._page)
+        stamp_overlay(output, page, PdfReader(BytesIO(overlay)).pages[0])
+        # The QR payload again as document metadata, so born-digital copies verify without decoding the image
+        output.add_metadata({PAYLOAD_KEY: json.dumps(qr_data)})
+
+        output_buffer = BytesIO()
+        output.write(output_buffer)
+        return output_buffer.getvalue()
+
+
+_templates = {}
+_templates_lock = threading.Lock()
 
-        # Save the new PDF
-        with open(file_path, "wb") as outputStream:
-            output.write(outputStream)
 
-    # Clean up the temporary PDF and QR code image
-    os.remove(temp_pdf_path)
-    os.remove(qr_code_path)
+def get_certificate_template(template_path):
+    """Process-wide CertificateTemplate for the given path"""
+    key = os.path.abspath(template_path)
+    with _templates_lock:
+        if key not in _templates:
+            _templates[key] = CertificateTemplate(template_path)
+        return _templates[key]
+
+
+def render_certificate_pdf(certificate_data, template_path):
+    """Render a certificate onto the template and return the PDF as bytes, without touching the filesystem"""
+    return get_certificate_template(template_path).render(certificate_data)
+
+
+def generate_certificate_pdf(certificate_data, file_path, template_path):
+    # Ensure file_path is not empty
+    if not file_path:
+        raise ValueError("The file_path parameter is empty")
+
+    pdf_bytes = render_certificate_pdf(certificate_data, template_path)
+
+    # Create the directory if it does not exist
+    directory = os.path.dirname(file_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
 
+    with open(file_path, "wb") as outputStream:
+        outputStream.write(pdf_bytes)
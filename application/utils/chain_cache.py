@@ -0,0 +1,189 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from web3.exceptions import ContractLogicError
+
+from connection import contract, reader, w3
+
+
+class ContractReadCache:
+    """
+    LRU + TTL cache for contract reads keyed by certificate ID. Entries are
+    dropped as soon as a CertificateGenerated or CertificateInvalidated log
+    for the same ID is seen, so the TTL only bounds staleness if the log
+    watcher falls behind.
+    """
+
+    def __init__(self, maxsize=4096, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped on every invalidation so a read that raced with an event is not cached
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _cached(self, certificate_id, now):
+        """(hit, value); call with the lock held"""
+        entry = self._entries.get(certificate_id)
+        if entry is not None and entry[1] > now:
+            self._entries.move_to_end(certificate_id)
+            self.hits += 1
+            return True, entry[0]
+        self.misses += 1
+        return False, None
+
+    def _store(self, values, expires, generation):
+        with self._lock:
+            if generation != self._generation:
+                return
+            for certificate_id, value in values.items():
+                self._entries[certificate_id] = (value, expires)
+                self._entries.move_to_end(certificate_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_load(self, certificate_id, loader):
+        now = time.monotonic()
+        with self._lock:
+            hit, value = self._cached(certificate_id, now)
+            generation = self._generation
+        if hit:
+            return value
+        value = loader()
+        self._store({certificate_id: value}, now + self.ttl, generation)
+        return value
+
+    async def get_or_load_async(self, certificate_id, loader):
+        """get_or_load for a coroutine function loader, so async readers share the cache and its invalidation"""
+        now = time.monotonic()
+        with self._lock:
+            hit, value = self._cached(certificate_id, now)
+            generation = self._generation
+        if hit:
+            return value
+        value = await loader()
+        self._store({certificate_id: value}, now + self.ttl, generation)
+        return value
+
+    def get_many_or_load(self, certificate_ids, loader):
+        """Like get_or_load for many IDs; loader gets the missing IDs and returns a dict of their values"""
+        now = time.monotonic()
+        values = {}
+        missing = []
+        with self._lock:
+            for certificate_id in certificate_ids:
+                hit, value = self._cached(certificate_id, now)
+                if hit:
+                    values[certificate_id] = value
+                else:
+                    missing.append(certificate_id)
+            generation = self._generation
+        if not missing:
+            return values
+        loaded = loader(missing)
+        self._store(loaded, now + self.ttl, generation)
+        values.update(loaded)
+        return values
+
+    def invalidate(self, certificate_id):
+        with self._lock:
+            self._generation += 1
+            if self._entries.pop(certificate_id, None) is not None:
+                self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations
+            }
+
+
+class CertificateEventWatcher:
+    """Polls the contract's certificate events and invalidates matching cache entries"""
+
+    def __init__(self, cache, poll_interval=2.0):
+        self.cache = cache
+        self.poll_interval = poll_interval
+        self._next_block = w3.eth.block_number + 1
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"Certificate event watcher error: {e}")
+            time.sleep(self.poll_interval)
+
+    def poll(self):
+        latest = w3.eth.block_number
+        if latest < self._next_block:
+            return
+        for event in (contract.events.CertificateGenerated, contract.events.CertificateInvalidated):
+            for log in event().get_logs(from_block=self._next_block, to_block=latest):
+                self.cache.invalidate(log["args"]["certificate_id"])
+        self._next_block = latest + 1
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_read_cache():
+    """Process-wide read cache shared by every Streamlit session, with its log watcher"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ContractReadCache(
+                maxsize=int(os.getenv("READ_CACHE_SIZE", "4096")),
+                ttl=float(os.getenv("READ_CACHE_TTL", "300"))
+            )
+            CertificateEventWatcher(_cache)
+        return _cache
+
+
+def _load_certificate(certificate_id):
+    try:
+        return tuple(contract.functions.getCertificate(certificate_id).call())
+    except ContractLogicError:
+        # getCertificate reverts for unknown IDs; cache that as a miss too
+        return None
+
+
+def get_certificate(certificate_id):
+    """Cached getCertificate; returns None when the certificate does not exist"""
+    return get_read_cache().get_or_load(certificate_id, lambda: _load_certificate(certificate_id))
+
+
+def get_certificates(certificate_ids):
+    """Cached getCertificate for many IDs; misses are fetched together in batched reads"""
+    def load(missing):
+        return {certificate_id: tuple(result) if result else None for certificate_id, result in reader.get_certificates(missing).items()}
+    return get_read_cache().get_many_or_load(list(certificate_ids), load)
+
+
+def certificate_exists(certificate_id):
+    # Same condition as certificateExists: the stored registration number is non-empty
+    certificate = get_certificate(certificate_id)
+    return certificate is not None and bool(certificate[0])
+
+
+def is_verified(certificate_id):
+    # Same condition as isVerified: the stored IPFS hash is non-empty
+    certificate = get_certificate(certificate_id)
+    return certificate is not None and bool(certificate[4])
@@ -0,0 +1,129 @@
+import concurrent.futures
+
+from connection import contract, w3
+from utils.tx_utils import GAS_MARGIN, RECEIPT_TIMEOUT, get_submitter
+
+# Rough gas model for one row of generateCertificates: a fresh storage slot per
+# 32-byte word of each string plus the length slot, and the event/loop overhead
+SSTORE_GAS = 22100
+ROW_OVERHEAD_GAS = 30000
+BATCH_OVERHEAD_GAS = 60000
+# Leave headroom below the block gas limit for estimate drift
+BLOCK_FILL_RATIO = 0.8
+CERTIFICATE_FIELDS = ("certificate_id", "registration_no", "candidate_name", "course_name", "institution", "ipfs_hash")
+# Error of rows whose transaction was not mined in time; it may still be, so they are worth checking again on chain
+NOT_MINED = f"Transaction was not mined within {RECEIPT_TIMEOUT} seconds"
+
+
+def get_block_gas_limit():
+    return w3.eth.get_block("latest")["gasLimit"]
+
+
+def estimate_row_gas(row):
+    """Approximate the gas needed to store a single certificate row"""
+    words = 0
+    for field in CERTIFICATE_FIELDS[1:]:
+        words += (len(row[field].encode("utf-8")) + 31) // 32 + 1
+    return ROW_OVERHEAD_GAS + words * SSTORE_GAS
+
+
+def pack_batches(rows, gas_budget):
+    """Group rows into batches whose estimated gas stays under gas_budget"""
+    batches = []
+    batch = []
+    batch_gas = BATCH_OVERHEAD_GAS
+    for row in rows:
+        row_gas = estimate_row_gas(row)
+        if batch and batch_gas + row_gas > gas_budget:
+            batches.append(batch)
+            batch = []
+            batch_gas = BATCH_OVERHEAD_GAS
+        batch.append(row)
+        batch_gas += row_gas
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def batch_function(batch):
+    columns = [[row[field] for row in batch] for field in CERTIFICATE_FIELDS]
+    return contract.functions.generateCertificates(*columns)
+
+
+def submit_batch(batch, submitter, gas_limit):
+    """
+    Submit generateCertificates for a batch and return a list of
+    (rows, future) pairs. Batches whose real estimate exceeds the block limit,
+    or cannot be estimated at all, are split in half.
+    """
+    function = batch_function(batch)
+    try:
+        gas = function.estimate_gas({"from": submitter.sender})
+    except Exception as e:
+        # Nodes refuse to estimate a call above the block gas limit ("exceeds block gas limit")
+        if len(batch) == 1:
+            raise
+        print(f"Gas estimate for a batch of {len(batch)} failed, splitting it: {e}")
+        gas = None
+    if (gas is None or gas > gas_limit * BLOCK_FILL_RATIO) and len(batch) > 1:
+        middle = len(batch) // 2
+        return submit_batch(batch[:middle], submitter, gas_limit) + submit_batch(batch[middle:], submitter, gas_limit)
+    return [(batch, submitter.submit(function, gas=min(int(gas * GAS_MARGIN), gas_limit)))]
+
+
+def issue_certificates_batched(rows, progress_callback=None):
+    """
+    Anchor many certificates with generateCertificates, packing rows into
+    batches sized by gas estimate. Batches are pipelined through the shared
+    transaction submitter. Returns a list of (row, success, error) tuples in
+    the same order as rows; rows of a batch whose receipt does not arrive
+    within RECEIPT_TIMEOUT fail with NOT_MINED.
+    """
+    if not rows:
+        return []
+    submitter = get_submitter()
+    gas_limit = get_block_gas_limit()
+    submitted = []
+    for batch in pack_batches(rows, gas_limit * BLOCK_FILL_RATIO):
+        try:
+            submitted.extend(submit_batch(batch, submitter, gas_limit))
+        except Exception as e:
+            failed = concurrent.futures.Future()
+            failed.set_exception(e)
+            submitted.append((batch, failed))
+
+    results = []
+    for batch, future in submitted:
+        try:
+            receipt = future.result(timeout=RECEIPT_TIMEOUT)
+            if receipt["status"] != 1:
+                raise RuntimeError("Transaction reverted")
+            issued_ids = {event["args"]["certificate_id"] for event in contract.events.CertificateGenerated().process_receipt(receipt)}
+            for row in batch:
+                if row["certificate_id"] in issued_ids:
+                    # A repeated ID inside the batch is only stored once
+                    issued_ids.discard(row["certificate_id"])
+                    results.append((row, True, None))
+                else:
+                    results.append((row, False, "Certificate with this ID already exists"))
+        except concurrent.futures.TimeoutError:
+            results.extend((row, False, NOT_MINED) for row in batch)
+        except Exception as e:
+            results.extend((row, False, str(e)) for row in batch)
+        if progress_callback:
+            progress_callback(len(results), len(rows))
+    return results
+
+
+# Anchored roots can never be removed, so positive lookups are cached for the
+# process; AsyncVerifier adds to the same set
+anchored_roots = set()
+
+
+def is_merkle_root_anchored(root):
+    if root in anchored_roots:
+        return True
+    if contract.functions.merkleRoots(bytes.fromhex(root)).call():
+        anchored_roots.add(root)
+        return True
+    return False
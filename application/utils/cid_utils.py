@@ -0,0 +1,175 @@
+import base64
+import hashlib
+import os
+
+import base58
+
+# go-ipfs / Pinata defaults: fixed-size 256 KiB chunks in a balanced DAG of at most 174 links per node
+CHUNK_SIZE = 262144
+MAX_LINKS = 174
+
+# Multicodec and multihash codes
+DAG_PB = 0x70
+RAW = 0x55
+SHA2_256 = 0x12
+UNIXFS_FILE = 2
+
+
+def _varint(value):
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _field(number, value):
+    """Protobuf length-delimited field"""
+    return _varint(number << 3 | 2) + _varint(len(value)) + value
+
+
+def _varint_field(number, value):
+    return _varint(number << 3) + _varint(value)
+
+
+def _unixfs_file(data=None, filesize=0, blocksizes=()):
+    message = _varint_field(1, UNIXFS_FILE)
+    if data:
+        message += _field(2, data)
+    message += _varint_field(3, filesize)
+    for size in blocksizes:
+        message += _varint_field(4, size)
+    return message
+
+
+def _dag_pb_node(data, links=()):
+    """Serialised PBNode; links are (cid_bytes, tsize) and, as in go-ipfs, come before the data"""
+    node = b""
+    for cid_bytes, tsize in links:
+        node += _field(2, _field(1, cid_bytes) + _field(2, b"") + _varint_field(3, tsize))
+    return node + _field(1, data)
+
+
+def _multihash(block):
+    return bytes([SHA2_256, 32]) + hashlib.sha256(block).digest()
+
+
+def _cid_bytes(block, codec, version):
+    if version == 0:
+        return _multihash(block)
+    return _varint(1) + _varint(codec) + _multihash(block)
+
+
+def _chunks(source):
+    """CHUNK_SIZE pieces of bytes or of a binary file object; at least one, possibly empty"""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        view = memoryview(source)
+        yield from (view[i:i + CHUNK_SIZE] for i in range(0, len(view), CHUNK_SIZE))
+        if not view:
+            yield b""
+        return
+    chunk = source.read(CHUNK_SIZE)
+    yield chunk
+    while len(chunk) == CHUNK_SIZE:
+        chunk = source.read(CHUNK_SIZE)
+        if chunk:
+            yield chunk
+
+
+def _build(source, version, raw_leaves):
+    """
+    (cid_bytes, tsize, filesize) of the root of `source` (bytes or a binary
+    file object) as `ipfs add` lays it out: fixed-size chunks in a balanced
+    tree. Files are hashed a chunk at a time.
+    """
+    level = []
+    for chunk in _chunks(source):
+        if raw_leaves:
+            level.append((_cid_bytes(chunk, RAW, version), len(chunk), len(chunk)))
+        else:
+            block = _dag_pb_node(_unixfs_file(chunk, len(chunk)))
+            level.append((_cid_bytes(block, DAG_PB, version), len(block), len(chunk)))
+    # A single chunk is its own root
+    while len(level) > 1:
+        parents = []
+        for i in range(0, len(level), MAX_LINKS):
+            children = level[i:i + MAX_LINKS]
+            filesize = sum(child[2] for child in children)
+            block = _dag_pb_node(
+                _unixfs_file(filesize=filesize, blocksizes=[child[2] for child in children]),
+                [(child[0], child[1]) for child in children]
+            )
+            parents.append((_cid_bytes(block, DAG_PB, version), len(block) + sum(child[1] for child in children), filesize))
+        level = parents
+    return level[0]
+
+
+def compute_cid(data, version=0):
+    """
+    The CID `ipfs add` (and Pinata) assigns to a file's bytes, given as bytes
+    or a binary file object: CIDv0 with dag-pb leaves, or CIDv1 in base32
+    with raw leaves.
+    """
+    if version == 0:
+        return base58.b58encode(_build(data, 0, raw_leaves=False)[0]).decode("ascii")
+    return encode_cid_v1(_build(data, 1, raw_leaves=True)[0])
+
+
+def encode_cid_v1(cid_bytes):
+    return "b" + base64.b32encode(cid_bytes).decode("ascii").lower().rstrip("=")
+
+
+def parse_cid(cid):
+    """
+    (version, codec) of a CID string; raises ValueError for anything
+    unsupported. The string is decoded and must re-encode to itself, so
+    only base58 or base32 characters get through.
+    """
+    if not isinstance(cid, str):
+        raise ValueError(f"Unsupported CID: {cid!r}")
+    try:
+        if cid.startswith("Qm") and len(cid) == 46:
+            raw = base58.b58decode(cid)
+            if len(raw) == 34 and raw[:2] == bytes([SHA2_256, 32]) and base58.b58encode(raw).decode("ascii") == cid:
+                return 0, DAG_PB
+        elif cid.startswith("b"):
+            encoded = cid[1:].upper()
+            raw = base64.b32decode(encoded + "=" * (-len(encoded) % 8))
+            if (len(raw) == 36 and raw[0] == 1 and raw[1] in (DAG_PB, RAW) and raw[2:4] == bytes([SHA2_256, 32])
+                    and encode_cid_v1(raw) == cid):
+                return 1, raw[1]
+    except ValueError:
+        # Characters outside the alphabet (binascii.Error is a ValueError)
+        pass
+    raise ValueError(f"Unsupported CID: {cid}")
+
+
+def cid_path(directory, cid, suffix=""):
+    """Path of a CID's file in `directory`; raises ValueError unless `cid` is a CID and the path stays inside it"""
+    parse_cid(cid)
+    root = os.path.realpath(directory)
+    path = os.path.join(root, cid + suffix)
+    if os.path.dirname(os.path.realpath(path)) != root:
+        raise ValueError(f"Unsupported CID: {cid}")
+    return os.path.join(directory, cid + suffix)
+
+
+def verify_cid(cid, data):
+    """True when `data` (bytes or a seekable binary file object) hashes to `cid` under the go-ipfs default layout"""
+    version, codec = parse_cid(cid)
+    if version == 0:
+        return compute_cid(data, 0) == cid
+    if codec == RAW:
+        # A single raw block; it has to be hashed whole
+        block = data if isinstance(data, (bytes, bytearray, memoryview)) else data.read()
+        return encode_cid_v1(_cid_bytes(block, RAW, 1)) == cid
+    # CIDv1 dag-pb roots come with raw leaves by default, or dag-pb leaves with --raw-leaves=false
+    if compute_cid(data, 1) == cid:
+        return True
+    if not isinstance(data, (bytes, bytearray, memoryview)):
+        data.seek(0)
+    return encode_cid_v1(_build(data, 1, raw_leaves=False)[0]) == cid
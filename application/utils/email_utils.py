@@ -0,0 +1,173 @@
+import os
+import queue
+import smtplib
+import threading
+import time
+from concurrent.futures import Future
+from email.message import EmailMessage
+
+SENT_STATUS = "Email sent successfully"
+
+
+def certificate_email(sender, to_email, certificate_id, download_link, institution_name):
+    msg = EmailMessage()
+    msg['From'] = sender
+    msg['To'] = to_email
+    msg['Subject'] = "Certificate Issued"
+    msg.set_content(f"Dear Student,\n\nCongratulations on completing your Course. Here are your certificate details: \n\nCertificate ID: {certificate_id}\nDownload Link: {download_link}\n\nBest regards,\n {institution_name}")
+    return msg
+
+
+class SMTPPool:
+    """
+    Logged-in SMTP connections reused across messages, at most `size` at a
+    time. A connection is replaced after `max_messages` sends (providers
+    cap messages per session) or when the server has dropped it.
+    """
+
+    def __init__(self, host, port=587, user=None, password=None, starttls=True, size=2, timeout=30, max_messages=100):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+        self.max_messages = max_messages
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    def _connect(self):
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.starttls:
+                server.starttls()
+            # Local stand-ins such as aiosmtpd take mail without logging in
+            if self.user and self.password:
+                server.login(self.user, self.password)
+        except Exception:
+            server.close()
+            raise
+        return [server, 0]
+
+    def _close(self, connection):
+        try:
+            connection[0].quit()
+        except (smtplib.SMTPException, OSError):
+            connection[0].close()
+
+    def send(self, message):
+        """Send one message on a pooled connection, reconnecting once if the idle connection went stale"""
+        with self._slots:
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                connection = self._connect()
+            try:
+                try:
+                    connection[0].send_message(message)
+                except smtplib.SMTPServerDisconnected:
+                    connection = self._connect()
+                    connection[0].send_message(message)
+            except (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused) as e:
+                # The server answered, so the session is still usable unless it says otherwise
+                if getattr(e, "smtp_code", None) == 421:
+                    self._close(connection)
+                else:
+                    self._idle.put(connection)
+                raise
+            except Exception:
+                self._close(connection)
+                raise
+            connection[1] += 1
+            if connection[1] >= self.max_messages:
+                self._close(connection)
+            else:
+                self._idle.put(connection)
+
+    def close(self):
+        while True:
+            try:
+                self._close(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+
+def _permanent(error):
+    """5xx replies and refused recipients will not succeed on a retry"""
+    if isinstance(error, (smtplib.SMTPRecipientsRefused, smtplib.SMTPAuthenticationError)):
+        return True
+    return isinstance(error, smtplib.SMTPResponseException) and 500 <= error.smtp_code < 600
+
+
+class EmailOutbox:
+    """
+    Background email delivery: send() queues a message and returns a Future
+    resolving to SENT_STATUS or a "Failed to send email" status, so callers
+    never wait on SMTP. Worker threads share an SMTPPool and retry transient
+    failures with exponential backoff.
+    """
+
+    def __init__(self, pool, workers=2, max_retries=3, backoff=1.0):
+        self.pool = pool
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._queue = queue.Queue()
+        self._workers = [threading.Thread(target=self._run, daemon=True, name=f"email-outbox-{index}") for index in range(workers)]
+        for worker in self._workers:
+            worker.start()
+
+    def send(self, message):
+        future = Future()
+        self._queue.put((message, future))
+        return future
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def _deliver(self, message):
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.pool.send(message)
+                return SENT_STATUS
+            except (smtplib.SMTPException, OSError) as e:
+                if _permanent(e) or attempt == self.max_retries:
+                    return f"Failed to send email: {e}"
+                time.sleep(self.backoff * 2 ** attempt)
+
+    def _run(self):
+        while True:
+            message, future = self._queue.get()
+            try:
+                status = self._deliver(message)
+                print(f"{status} to {message['To']}")
+                future.set_result(status)
+            except Exception as e:
+                future.set_result(f"Failed to send email: {e}")
+            finally:
+                self._queue.task_done()
+
+
+_outbox = None
+_outbox_lock = threading.Lock()
+
+
+def get_outbox():
+    """
+    Process-wide outbox for SMTP_HOST:SMTP_PORT (smtp.gmail.com:587 with
+    STARTTLS unless SMTP_STARTTLS=0), logged in as EMAIL_USER. Connections
+    and workers are bounded by EMAIL_WORKERS.
+    """
+    global _outbox
+    with _outbox_lock:
+        if _outbox is None:
+            workers = int(os.getenv("EMAIL_WORKERS", "2"))
+            pool = SMTPPool(
+                os.getenv("SMTP_HOST", "smtp.gmail.com"),
+                int(os.getenv("SMTP_PORT", "587")),
+                user=os.getenv("EMAIL_USER"),
+                password=os.getenv("EMAIL_PASSWORD"),
+                starttls=os.getenv("SMTP_STARTTLS", "1") != "0",
+                size=workers
+            )
+            _outbox = EmailOutbox(pool, workers=workers)
+        return _outbox
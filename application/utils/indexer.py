@@ -0,0 +1,233 @@
+import os
+import sqlite3
+import threading
+import time
+
+from web3.logs import DISCARD
+
+from connection import contract, w3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS chain_certificates (
+    certificate_id TEXT PRIMARY KEY,
+    registration_no TEXT NOT NULL,
+    candidate_name TEXT NOT NULL,
+    course_name TEXT NOT NULL,
+    institution TEXT NOT NULL,
+    ipfs_hash TEXT NOT NULL,
+    block_number INTEGER NOT NULL,
+    revoked INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS chain_certificates_revoked ON chain_certificates (revoked);
+CREATE TABLE IF NOT EXISTS merkle_roots (
+    root TEXT PRIMARY KEY,
+    certificate_count INTEGER NOT NULL,
+    block_number INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS revoked_leaves (
+    leaf TEXT PRIMARY KEY,
+    block_number INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS indexer_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# Columns returned by get(), in the same order as getCertificate's outputs
+CERTIFICATE_COLUMNS = ("registration_no", "candidate_name", "course_name", "institution", "ipfs_hash")
+INDEXED_EVENTS = ("CertificateGenerated", "CertificateInvalidated", "MerkleRootAnchored", "LeafRevoked")
+
+
+class CertificateIndexer:
+    """
+    Materialises the Certification contract's events into a local SQLite
+    table so pages can list and look up certificates without one contract
+    call per certificate. catch_up() reads logs in block ranges of
+    batch_size, halving the range when the node rejects it, and stores each
+    range together with the checkpoint so a restart resumes where it left
+    off. A background thread then follows new blocks.
+    """
+
+    def __init__(self, db_path="chain_index.db", start_block=0, batch_size=2000, confirmations=0, poll_interval=2.0):
+        self.batch_size = batch_size
+        self.confirmations = confirmations
+        self.poll_interval = poll_interval
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        # Held for a whole catch_up so the follow thread and page reruns do not index the same range twice
+        self._sync_lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+            self._conn.execute(
+                "INSERT OR IGNORE INTO indexer_meta (key, value) VALUES ('contract_address', ?)", (contract.address,)
+            )
+            indexed_address = self._conn.execute("SELECT value FROM indexer_meta WHERE key = 'contract_address'").fetchone()[0]
+            if indexed_address != contract.address:
+                # Redeployed contract: the old index describes a different chain state
+                self._reset(contract.address)
+            self._conn.execute(
+                "INSERT OR IGNORE INTO indexer_meta (key, value) VALUES ('next_block', ?)", (str(start_block),)
+            )
+
+    def _reset(self, address):
+        for table in ("chain_certificates", "merkle_roots", "revoked_leaves", "indexer_meta"):
+            self._conn.execute(f"DELETE FROM {table}")
+        self._conn.execute("INSERT INTO indexer_meta (key, value) VALUES ('contract_address', ?)", (address,))
+
+    @property
+    def next_block(self):
+        with self._lock:
+            return int(self._conn.execute("SELECT value FROM indexer_meta WHERE key = 'next_block'").fetchone()[0])
+
+    def start(self):
+        threading.Thread(target=self._follow, daemon=True).start()
+        return self
+
+    def _follow(self):
+        while True:
+            try:
+                self.catch_up()
+            except Exception as e:
+                print(f"Certificate indexer error: {e}")
+            time.sleep(self.poll_interval)
+
+    def catch_up(self):
+        """Index every block up to the chain head (minus confirmations); returns the number of events applied"""
+        with self._sync_lock:
+            target = w3.eth.block_number - self.confirmations
+            from_block = self.next_block
+            applied = 0
+            range_size = self.batch_size
+            while from_block <= target:
+                to_block = min(from_block + range_size - 1, target)
+                try:
+                    logs = self._fetch_logs(from_block, to_block)
+                except Exception as e:
+                    if to_block == from_block:
+                        raise
+                    # Too many results or a range limit on the node: retry with a smaller range
+                    range_size = max(range_size // 2, 1)
+                    print(f"Retrying logs {from_block}-{to_block} in ranges of {range_size}: {e}")
+                    continue
+                self._apply(logs, to_block + 1)
+                applied += len(logs)
+                from_block = to_block + 1
+                # Grow back after a success so one dense range does not slow the rest of the catch-up
+                range_size = min(range_size * 2, self.batch_size)
+            return applied
+
+    def _fetch_logs(self, from_block, to_block):
+        logs = []
+        for name in INDEXED_EVENTS:
+            logs.extend(contract.events[name]().get_logs(from_block=from_block, to_block=to_block))
+        # Apply in chain order so a re-issue after an invalidation ends up live
+        logs.sort(key=lambda log: (log["blockNumber"], log["logIndex"]))
+        return logs
+
+    def _apply(self, logs, next_block):
+        with self._lock, self._conn:
+            for log in logs:
+                self._apply_log(log)
+            self._conn.execute("UPDATE indexer_meta SET value = ? WHERE key = 'next_block'", (str(next_block),))
+
+    def _apply_log(self, log):
+        args = log["args"]
+        if log["event"] == "CertificateGenerated":
+            self._conn.execute(
+                "INSERT OR REPLACE INTO chain_certificates "
+                "(certificate_id, registration_no, candidate_name, course_name, institution, ipfs_hash, block_number, revoked) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, 0)",
+                (args["certificate_id"], args["registrationNo"], args["candidateName"], args["courseName"],
+                 args["institution"], args["ipfsHash"], log["blockNumber"])
+            )
+        elif log["event"] == "CertificateInvalidated":
+            self._conn.execute(
+                "UPDATE chain_certificates SET revoked = 1, block_number = ? WHERE certificate_id = ?",
+                (log["blockNumber"], args["certificate_id"])
+            )
+        elif log["event"] == "MerkleRootAnchored":
+            self._conn.execute(
+                "INSERT OR REPLACE INTO merkle_roots (root, certificate_count, block_number) VALUES (?, ?, ?)",
+                (bytes(args["root"]).hex(), args["certificateCount"], log["blockNumber"])
+            )
+        elif log["event"] == "LeafRevoked":
+            self._conn.execute(
+                "INSERT OR REPLACE INTO revoked_leaves (leaf, block_number) VALUES (?, ?)",
+                (bytes(args["leaf"]).hex(), log["blockNumber"])
+            )
+
+    def apply_receipt(self, receipt):
+        """
+        Apply the events of a transaction this process sent, e.g. a
+        revocation, without waiting for the follow thread or for
+        confirmations. The checkpoint is left alone; catch_up applies the
+        same events again when it reaches their block.
+        """
+        logs = []
+        for name in INDEXED_EVENTS:
+            logs.extend(contract.events[name]().process_receipt(receipt, errors=DISCARD))
+        logs.sort(key=lambda log: log["logIndex"])
+        with self._lock, self._conn:
+            for log in logs:
+                self._apply_log(log)
+
+    def get(self, certificate_id):
+        """Indexed certificate as a getCertificate-style tuple, or None when unknown or revoked"""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(CERTIFICATE_COLUMNS)} FROM chain_certificates WHERE certificate_id = ? AND revoked = 0",
+                (certificate_id,)
+            ).fetchone()
+        return tuple(row) if row else None
+
+    def active_certificates(self):
+        """Every live certificate keyed by ID"""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT certificate_id, {', '.join(CERTIFICATE_COLUMNS)} FROM chain_certificates WHERE revoked = 0 ORDER BY block_number"
+            ).fetchall()
+        return {row["certificate_id"]: dict(row) for row in rows}
+
+    def revoked_leaves(self, leaves):
+        """The subset of the given hex leaves that have been revoked on chain"""
+        leaves = list(leaves)
+        revoked = set()
+        with self._lock:
+            # Stay under SQLite's bound-parameter limit
+            for i in range(0, len(leaves), 500):
+                chunk = leaves[i:i + 500]
+                rows = self._conn.execute(
+                    f"SELECT leaf FROM revoked_leaves WHERE leaf IN ({', '.join('?' for _ in chunk)})", chunk
+                ).fetchall()
+                revoked.update(row["leaf"] for row in rows)
+        return revoked
+
+    def is_root_anchored(self, root_hex):
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM merkle_roots WHERE root = ?", (root_hex,)).fetchone() is not None
+
+
+_indexer = None
+_indexer_lock = threading.Lock()
+
+
+def get_indexer():
+    """
+    Process-wide indexer shared by every Streamlit session. The first call
+    catches up from INDEXER_START_BLOCK (or the stored checkpoint) and then
+    follows new blocks in the background.
+    """
+    global _indexer
+    with _indexer_lock:
+        if _indexer is None:
+            _indexer = CertificateIndexer(
+                start_block=int(os.getenv("INDEXER_START_BLOCK", "0")),
+                batch_size=int(os.getenv("INDEXER_BATCH_SIZE", "2000")),
+                confirmations=int(os.getenv("INDEXER_CONFIRMATIONS", "0"))
+            )
+            _indexer.catch_up()
+            _indexer.start()
+        return _indexer
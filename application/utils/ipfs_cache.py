@@ -0,0 +1,193 @@
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from utils.cid_utils import cid_path, verify_cid
+from utils.storage import get_storage
+
+
+class CidCache:
+    """
+    Size-bounded LRU cache of IPFS content on disk, one file per CID (plus
+    `suffix`, e.g. ".pdf" so the files can be served with the right type).
+    Content behind a CID never changes, so entries are never revalidated;
+    downloads are streamed to disk and checked against the CID before they
+    are stored. Concurrent requests for the same missing CID share one
+    download. The newest entry is kept even when it alone exceeds max_bytes.
+    """
+
+    def __init__(self, directory="pdf_cache", max_bytes=512 * 1024 * 1024, storage=None, suffix=""):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        # Where misses are fetched from; any backend from utils.storage
+        self.storage = storage or get_storage()
+        self.suffix = suffix
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._size = 0
+        self._in_flight = {}
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+        # Rebuild the LRU order from access times left by previous runs
+        files = []
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            if name.endswith(".part"):
+                os.remove(path)
+            elif name.endswith(suffix) and os.path.isfile(path):
+                stat = os.stat(path)
+                files.append((stat.st_atime, name[:len(name) - len(suffix)], stat.st_size))
+        for _, cid, size in sorted(files):
+            self._entries[cid] = size
+            self._size += size
+        self._evict()
+
+    def path(self, cid):
+        return cid_path(self.directory, cid, self.suffix)
+
+    def _touch(self, cid):
+        self._entries.move_to_end(cid)
+        try:
+            os.utime(self.path(cid))
+        except FileNotFoundError:
+            pass
+
+    def _evict(self):
+        while self._size > self.max_bytes and len(self._entries) > 1:
+            cid, size = self._entries.popitem(last=False)
+            self._size -= size
+            try:
+                os.remove(self.path(cid))
+            except FileNotFoundError:
+                pass
+
+    def _hit(self, cid):
+        path = self.path(cid)
+        with self._lock:
+            if cid not in self._entries or not os.path.exists(path):
+                return None
+            self._touch(cid)
+            self.hits += 1
+            return path
+
+    def _store(self, cid, temp_path):
+        """Move a complete temporary file into place after checking it against the CID"""
+        with open(temp_path, "rb") as file:
+            matches = verify_cid(cid, file)
+        if not matches:
+            os.remove(temp_path)
+            raise ValueError(f"Content does not match CID {cid}")
+        path = self.path(cid)
+        size = os.path.getsize(temp_path)
+        os.replace(temp_path, path)
+        with self._lock:
+            self._size += size - self._entries.get(cid, 0)
+            self._entries[cid] = size
+            self._touch(cid)
+            self._evict()
+        return path
+
+    def put(self, cid, data):
+        """Store content after checking it against the CID; raises ValueError on a mismatch"""
+        temp_path = f"{self.path(cid)}.{threading.get_ident()}.part"
+        with open(temp_path, "wb") as file:
+            file.write(data)
+        return self._store(cid, temp_path)
+
+    def fetch(self, cid):
+        """
+        Path of the cached file for a CID, fetching it from storage first
+        when needed, once however many callers ask at the same time.
+        """
+        path = self._hit(cid)
+        if path:
+            return path
+        with self._lock:
+            future = self._in_flight.get(cid)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._in_flight[cid] = future
+                self.misses += 1
+        if not leader:
+            return future.result()
+        try:
+            path = self._store(cid, self._download(cid))
+            future.set_result(path)
+            return path
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[cid]
+
+    def get(self, cid):
+        """Bytes for a CID, from disk when cached"""
+        for _ in range(2):
+            try:
+                with open(self.fetch(cid), "rb") as file:
+                    return file.read()
+            except FileNotFoundError:
+                # Evicted between fetch and open; fetch it again
+                continue
+        raise FileNotFoundError(f"{cid} was evicted before it could be read")
+
+    def remove(self, cid):
+        """Drop a CID's cached file, e.g. once its certificate is revoked; True when it was cached"""
+        try:
+            path = self.path(cid)
+        except ValueError:
+            # Not a CID, so never cached
+            return False
+        with self._lock:
+            size = self._entries.pop(cid, None)
+            if size is None:
+                return False
+            self._size -= size
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        return True
+
+    def _download(self, cid):
+        """Stream the content from storage into a temporary file and return its path"""
+        temp_path = f"{self.path(cid)}.{threading.get_ident()}.part"
+        try:
+            with open(temp_path, "wb") as file:
+                for chunk in self.storage.fetch(cid):
+                    file.write(chunk)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return temp_path
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._size, "max_bytes": self.max_bytes,
+                    "hits": self.hits, "misses": self.misses}
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_pdf_cache():
+    """
+    Process-wide certificate PDF cache in PDF_CACHE_DIR, bounded by
+    PDF_CACHE_MAX_MB. It lives under Streamlit's static directory by
+    default so cached certificates can be streamed to the browser.
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = CidCache(
+                directory=os.getenv("PDF_CACHE_DIR", os.path.join("static", "pdf_cache")),
+                max_bytes=int(os.getenv("PDF_CACHE_MAX_MB", "512")) * 1024 * 1024,
+                suffix=".pdf"
+            )
+        return _cache
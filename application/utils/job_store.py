@@ -0,0 +1,291 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# Per-row checkpoints, in order; a row's stage is the last one it completed
+ROW_STAGES = ("pending", "validated", "rendered", "pinned", "anchored", "emailed")
+# Columns written by checkpoints besides the stage itself
+ROW_FIELDS = ("certificate_id", "registration_no", "candidate_name", "course_name", "email",
+              "pdf_cid", "ipfs_hash", "merkle_leaf", "merkle_proof", "email_status")
+# Columns filled in when a row is queued after validation
+VALIDATED_FIELDS = ("certificate_id", "registration_no", "candidate_name", "course_name", "email")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    institution TEXT NOT NULL,
+    institution_name TEXT NOT NULL,
+    merkle_mode INTEGER NOT NULL DEFAULT 0,
+    merkle_root TEXT,
+    merkle_size INTEGER,
+    status TEXT NOT NULL DEFAULT 'queued',
+    error TEXT,
+    total INTEGER NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_expires REAL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS job_rows (
+    job_id INTEGER NOT NULL,
+    row_index INTEGER NOT NULL,
+    stage TEXT NOT NULL DEFAULT 'pending',
+    error TEXT,
+    source TEXT NOT NULL,
+    certificate_id TEXT,
+    registration_no TEXT,
+    candidate_name TEXT,
+    course_name TEXT,
+    email TEXT,
+    pdf_cid TEXT,
+    ipfs_hash TEXT,
+    merkle_leaf TEXT,
+    merkle_proof TEXT,
+    email_status TEXT,
+    PRIMARY KEY (job_id, row_index)
+);
+CREATE INDEX IF NOT EXISTS job_rows_stage ON job_rows (job_id, stage);
+CREATE TABLE IF NOT EXISTS nonces (
+    sender TEXT PRIMARY KEY,
+    next_nonce INTEGER NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS workers (
+    worker_id TEXT PRIMARY KEY,
+    pid INTEGER,
+    heartbeat REAL NOT NULL
+);
+"""
+
+
+class JobStore:
+    """
+    Bulk issuance jobs and their per-row checkpoints in SQLite. The page
+    writes jobs and reads their status; a worker process claims a job with
+    a lease, records each row's completed stage as it goes, and picks up
+    from those checkpoints after a crash.
+    """
+
+    def __init__(self, db_path="jobs.db"):
+        self.db_path = db_path
+        # One connection shared by every thread of the process, serialised by the lock
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+
+    @staticmethod
+    def _to_row(row):
+        record = dict(row)
+        record["source"] = json.loads(record["source"])
+        if record["merkle_proof"] is not None:
+            record["merkle_proof"] = json.loads(record["merkle_proof"])
+        return record
+
+    def create_job(self, rows, institution, institution_name, merkle_mode=False):
+        """
+        Queue a job for an iterable of validated bulk-file rows, consumed
+        one at a time: (source, fields, error) with the row as read, its
+        certificate fields, and the rejection reason or None. Clean rows
+        start at "validated", rejected ones are stored failed. Returns the
+        job ID, or None when there were no rows.
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            job_id = self._conn.execute(
+                "INSERT INTO jobs (institution, institution_name, merkle_mode, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (institution, institution_name, int(merkle_mode), now, now)
+            ).lastrowid
+            total = 0
+            for index, (source, fields, error) in enumerate(rows):
+                self._conn.execute(
+                    f"INSERT INTO job_rows (job_id, row_index, stage, error, source, {', '.join(VALIDATED_FIELDS)}) "
+                    f"VALUES (?, ?, ?, ?, ?{', ?' * len(VALIDATED_FIELDS)})",
+                    (job_id, index, "pending" if error else "validated", error, json.dumps(source, default=str),
+                     *(fields.get(name) for name in VALIDATED_FIELDS))
+                )
+                total += 1
+            if not total:
+                self._conn.rollback()
+                return None
+            self._conn.execute("UPDATE jobs SET total = ? WHERE job_id = ?", (total, job_id))
+        return job_id
+
+    def get_job(self, job_id):
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return dict(row) if row else None
+
+    def recent_jobs(self, limit=10):
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM jobs ORDER BY job_id DESC LIMIT ?", (limit,)).fetchall()
+        return [dict(row) for row in rows]
+
+    def claim_job(self, worker_id, lease_seconds=60):
+        """
+        Lease the oldest queued job, or a running one whose worker stopped
+        renewing its lease; returns the job or None.
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            # A single statement, so two worker processes cannot claim the same job
+            claimed = self._conn.execute(
+                "UPDATE jobs SET status = 'running', lease_owner = ?, lease_expires = ?, updated_at = ? WHERE job_id = ("
+                "SELECT job_id FROM jobs WHERE status = 'queued' OR (status = 'running' AND lease_expires < ?) ORDER BY job_id LIMIT 1)",
+                (worker_id, now + lease_seconds, now, now)
+            ).rowcount
+            if not claimed:
+                return None
+            row = self._conn.execute(
+                "SELECT * FROM jobs WHERE lease_owner = ? AND status = 'running' ORDER BY updated_at DESC LIMIT 1", (worker_id,)
+            ).fetchone()
+        return dict(row)
+
+    def renew_lease(self, job_id, worker_id, lease_seconds=60):
+        """False when the lease was lost to another worker"""
+        with self._lock, self._conn:
+            return self._conn.execute(
+                "UPDATE jobs SET lease_expires = ?, updated_at = ? WHERE job_id = ? AND lease_owner = ? AND status = 'running'",
+                (time.time() + lease_seconds, time.time(), job_id, worker_id)
+            ).rowcount > 0
+
+    def finish_job(self, job_id, status="done", error=None, worker_id=None):
+        """With worker_id, only while that worker still holds the lease"""
+        query = "UPDATE jobs SET status = ?, error = ?, lease_owner = NULL, lease_expires = NULL, updated_at = ? WHERE job_id = ?"
+        params = [status, error, time.time(), job_id]
+        if worker_id is not None:
+            query += " AND lease_owner = ?"
+            params.append(worker_id)
+        with self._lock, self._conn:
+            self._conn.execute(query, params)
+
+    def requeue_job(self, job_id):
+        """Queue a failed job again; rows resume from their last checkpoint"""
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE jobs SET status = 'queued', error = NULL, updated_at = ? WHERE job_id = ? AND status = 'failed'",
+                               (time.time(), job_id))
+
+    def set_merkle_root(self, job_id, root, leaves):
+        """Record the batch root and every row's (row_index, leaf, proof) in one transaction"""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE job_rows SET merkle_leaf = ?, merkle_proof = ? WHERE job_id = ? AND row_index = ?",
+                [(leaf, json.dumps(proof), job_id, row_index) for row_index, leaf, proof in leaves]
+            )
+            self._conn.execute("UPDATE jobs SET merkle_root = ?, merkle_size = ? WHERE job_id = ?", (root, len(leaves), job_id))
+
+    def rows(self, job_id, stages=None):
+        """Rows still in progress (no error), optionally only those at the given stages, in file order"""
+        query = "SELECT * FROM job_rows WHERE job_id = ? AND error IS NULL"
+        params = [job_id]
+        if stages:
+            query += f" AND stage IN ({', '.join('?' for _ in stages)})"
+            params.extend(stages)
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY row_index", params).fetchall()
+        return [self._to_row(row) for row in rows]
+
+    def checkpoint(self, job_id, row_index, stage, **fields):
+        """Record that a row completed `stage`, together with what that stage produced"""
+        self.checkpoint_many(job_id, [(row_index, fields)], stage)
+
+    def checkpoint_many(self, job_id, updates, stage):
+        """Checkpoint many (row_index, fields) at the same stage in one transaction"""
+        with self._lock, self._conn:
+            for row_index, fields in updates:
+                fields = {name: json.dumps(value) if name == "merkle_proof" else value for name, value in fields.items() if name in ROW_FIELDS}
+                assignments = "".join(f", {name} = ?" for name in fields)
+                self._conn.execute(f"UPDATE job_rows SET stage = ?{assignments} WHERE job_id = ? AND row_index = ?",
+                                   (stage, *fields.values(), job_id, row_index))
+
+    def fail_row(self, job_id, row_index, error, **fields):
+        """Stop a row at its current stage with the reason; it is skipped on resume"""
+        fields = {name: value for name, value in fields.items() if name in ROW_FIELDS}
+        assignments = "".join(f", {name} = ?" for name in fields)
+        with self._lock, self._conn:
+            self._conn.execute(f"UPDATE job_rows SET error = ?{assignments} WHERE job_id = ? AND row_index = ?",
+                               (error, *fields.values(), job_id, row_index))
+
+    def progress(self, job_id):
+        """{stage: rows that reached it}, plus "failed" for rows stopped with an error"""
+        with self._lock:
+            counts = self._conn.execute(
+                "SELECT stage, error IS NOT NULL AS failed, COUNT(*) FROM job_rows WHERE job_id = ? GROUP BY stage, failed",
+                (job_id,)
+            ).fetchall()
+        progress = {stage: 0 for stage in ROW_STAGES}
+        progress["failed"] = 0
+        for stage, failed, count in counts:
+            # Reaching a stage means reaching every stage before it
+            for earlier in ROW_STAGES[:ROW_STAGES.index(stage) + 1]:
+                progress[earlier] += count
+            if failed:
+                progress["failed"] += count
+        return progress
+
+    def failures(self, job_id):
+        """(row_index, registration_no, stage, error) for every failed row"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT row_index, registration_no, source, stage, error FROM job_rows WHERE job_id = ? AND error IS NOT NULL ORDER BY row_index",
+                (job_id,)
+            ).fetchall()
+        return [(row["row_index"], row["registration_no"] or json.loads(row["source"]).get("registration_no"), row["stage"], row["error"])
+                for row in rows]
+
+    def sync_nonce(self, sender, count, idle_seconds=60):
+        """
+        Start the sender's shared nonce sequence at the chain's pending
+        `count`, unless another process reserved one within idle_seconds
+        (its transactions may not have reached the node yet).
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR IGNORE INTO nonces (sender, next_nonce, updated_at) VALUES (?, ?, ?)", (sender, count, now))
+            self._conn.execute(
+                "UPDATE nonces SET next_nonce = CASE WHEN updated_at < ? THEN ? ELSE MAX(next_nonce, ?) END WHERE sender = ?",
+                (now - idle_seconds, count, count, sender)
+            )
+
+    def reserve_nonce(self, sender, floor):
+        """
+        The sender's next nonce, unique across every process sharing this
+        database and at least `floor` (the caller's own view of the chain)
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            # The UPDATE takes SQLite's write lock, so the read below cannot interleave with another process
+            self._conn.execute("INSERT OR IGNORE INTO nonces (sender, next_nonce, updated_at) VALUES (?, ?, ?)", (sender, floor, now))
+            self._conn.execute("UPDATE nonces SET next_nonce = MAX(next_nonce, ?) + 1, updated_at = ? WHERE sender = ?", (floor, now, sender))
+            return self._conn.execute("SELECT next_nonce - 1 FROM nonces WHERE sender = ?", (sender,)).fetchone()[0]
+
+    def heartbeat(self, worker_id):
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO workers (worker_id, pid, heartbeat) VALUES (?, ?, ?)",
+                               (worker_id, os.getpid(), time.time()))
+
+    def remove_worker(self, worker_id):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM workers WHERE worker_id = ?", (worker_id,))
+
+    def live_workers(self, timeout=30):
+        with self._lock:
+            rows = self._conn.execute("SELECT worker_id FROM workers WHERE heartbeat > ?", (time.time() - timeout,)).fetchall()
+        return [row["worker_id"] for row in rows]
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_job_store():
+    """Process-wide job store in JOB_DB (jobs.db by default)"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = JobStore(os.getenv("JOB_DB", "jobs.db"))
+        return _store
@@ -0,0 +1,56 @@
+import hashlib
+
+# Domain separation so a leaf can never be passed off as an inner node
+LEAF_PREFIX = b"\x00"
+NODE_PREFIX = b"\x01"
+
+
+def leaf_hash(certificate_id):
+    """Hash a certificate ID (hex sha256) into a Merkle leaf"""
+    return hashlib.sha256(LEAF_PREFIX + bytes.fromhex(certificate_id)).hexdigest()
+
+
+def node_hash(left, right):
+    # Sorted pairs keep proofs free of left/right flags
+    first, second = sorted((bytes.fromhex(left), bytes.fromhex(right)))
+    return hashlib.sha256(NODE_PREFIX + first + second).hexdigest()
+
+
+def build_tree(leaves):
+    """Return every level of the tree, leaves first and the root level last"""
+    if not leaves:
+        raise ValueError("Cannot build a Merkle tree without leaves")
+    levels = [list(leaves)]
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        parents = []
+        for i in range(0, len(level), 2):
+            # An odd node at the end is promoted unchanged
+            if i + 1 < len(level):
+                parents.append(node_hash(level[i], level[i + 1]))
+            else:
+                parents.append(level[i])
+        levels.append(parents)
+    return levels
+
+
+def get_root(levels):
+    return levels[-1][0]
+
+
+def get_proof(levels, index):
+    """Sibling hashes from the leaf at index up to the root"""
+    proof = []
+    for level in levels[:-1]:
+        sibling = index ^ 1
+        if sibling < len(level):
+            proof.append(level[sibling])
+        index //= 2
+    return proof
+
+
+def verify_proof(leaf, proof, root):
+    computed = leaf
+    for sibling in proof:
+        computed = node_hash(computed, sibling)
+    return computed == root
@@ -0,0 +1,134 @@
+import os
+import threading
+import time
+
+import requests
+from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+
+load_dotenv()
+
+PINATA_API_URL = os.getenv("PINATA_API_URL", "https://api.pinata.cloud")
+
+# Responses that mean "slow down" rather than "this request is wrong"
+THROTTLE_STATUSES = (408, 429, 500, 502, 503, 504)
+
+
+class AdaptiveLimit:
+    """
+    AIMD concurrency limit: each success raises the limit by 1/limit (about
+    one extra slot per round of requests), each throttled response halves
+    it. Requests started before the last cut cannot cut it again, so one
+    burst of 429s counts as a single congestion signal.
+    """
+
+    def __init__(self, initial=4, minimum=1, maximum=16):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.limit = float(min(max(initial, minimum), maximum))
+        self.active = 0
+        self._epoch = 0
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        """Wait for a slot; returns a token to pass to release"""
+        with self._condition:
+            while self.active >= int(self.limit):
+                self._condition.wait()
+            self.active += 1
+            return self._epoch
+
+    def release(self, token, throttled=False):
+        with self._condition:
+            self.active -= 1
+            if throttled:
+                if token == self._epoch:
+                    self.limit = max(self.minimum, self.limit / 2)
+                    self._epoch += 1
+            else:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._condition.notify_all()
+
+
+class PinataClient:
+    """
+    Pinata pinning API over one pooled session. Uploads take in-memory
+    bytes, so every retry re-sends the full body, and run under an
+    AdaptiveLimit shared by every thread using the client.
+    """
+
+    def __init__(self, api_key, api_secret, api_url=PINATA_API_URL, max_concurrency=16,
+                 initial_concurrency=4, max_retries=3, timeout=30, backoff=0.25):
+        self.api_url = api_url.rstrip("/")
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.limit = AdaptiveLimit(initial_concurrency, 1, max_concurrency)
+        self.session = requests.Session()
+        self.session.headers.update({"pinata_api_key": api_key, "pinata_secret_api_key": api_secret})
+        # Retries are handled here, where throttling can feed the concurrency limit
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_concurrency)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    @property
+    def max_concurrency(self):
+        return self.limit.maximum
+
+    def _request(self, method, path, **kwargs):
+        """Send a request under the concurrency limit, retrying throttled responses and connection errors"""
+        for attempt in range(self.max_retries + 1):
+            token = self.limit.acquire()
+            throttled = True
+            try:
+                response = self.session.request(method, f"{self.api_url}{path}", timeout=self.timeout, **kwargs)
+                throttled = response.status_code in THROTTLE_STATUSES
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == self.max_retries:
+                    raise
+                response = None
+            finally:
+                self.limit.release(token, throttled)
+            if not throttled:
+                return response
+            if attempt == self.max_retries:
+                response.raise_for_status()
+            # The halved limit already slows everyone down, so the retry itself only waits briefly
+            retry_after = response.headers.get("Retry-After", "") if response is not None else ""
+            time.sleep(min(float(retry_after), 60) if retry_after.isdigit() else self.backoff * 2 ** attempt)
+
+    def pin(self, pdf_bytes, file_name="certificate.pdf"):
+        """Pin PDF bytes and return their IPFS hash"""
+        response = self._request("POST", "/pinning/pinFileToIPFS", files={"file": (file_name, pdf_bytes, "application/pdf")})
+        response.raise_for_status()
+        return response.json()["IpfsHash"]
+
+    def unpin(self, ipfs_hash):
+        """True when Pinata confirms the unpin"""
+        return self._request("DELETE", f"/pinning/unpin/{ipfs_hash}").status_code == 200
+
+    def is_pinned(self, ipfs_hash):
+        response = self._request("GET", "/data/pinList", params={"hashContains": ipfs_hash, "status": "pinned"})
+        response.raise_for_status()
+        return response.json()["count"] > 0
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_pinata_client(api_key=None, api_secret=None):
+    """
+    Process-wide client per API key, defaulting to PINATA_API_KEY and
+    PINATA_API_SECRET; concurrency is bounded by PINATA_MAX_CONCURRENCY.
+    """
+    api_key = api_key or os.getenv("PINATA_API_KEY")
+    api_secret = api_secret or os.getenv("PINATA_API_SECRET")
+    with _clients_lock:
+        if (api_key, api_secret) not in _clients:
+            _clients[(api_key, api_secret)] = PinataClient(
+                api_key, api_secret,
+                max_concurrency=int(os.getenv("PINATA_MAX_CONCURRENCY", "16")),
+                initial_concurrency=int(os.getenv("PINATA_INITIAL_CONCURRENCY", "4"))
+            )
+        return _clients[(api_key, api_secret)]
@@ -0,0 +1,147 @@
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Marks the end of a stage's input
+_DONE = object()
+
+
+class Stage:
+    """
+    One step of a Pipeline. `func` takes an item and returns the item to pass
+    downstream; raising drops the item and reports the error. With
+    `batch_size` set, `func` takes a list of items and returns a list of
+    (item, success, error) tuples instead.
+    """
+
+    def __init__(self, name, func, workers=1, queue_size=32, batch_size=None, linger=1.0):
+        self.name = name
+        self.func = func
+        self.workers = workers
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.linger = linger
+
+
+class StageResult:
+    def __init__(self, item, stage=None, error=None):
+        self.item = item
+        # Name of the stage that failed, None when the item finished every stage
+        self.stage = stage
+        self.error = error
+
+    @property
+    def success(self):
+        return self.error is None
+
+
+class Pipeline:
+    """
+    Runs items through stages connected by bounded queues. Each stage has its
+    own worker threads; a full downstream queue blocks the upstream workers,
+    so no stage runs far ahead of the slowest one. Results are yielded on the
+    calling thread as items finish, which keeps Streamlit calls on the script
+    thread.
+    """
+
+    def __init__(self, stages):
+        self.stages = stages
+        self._queues = [queue.Queue(maxsize=stage.queue_size) for stage in stages]
+        self._results = queue.Queue()
+        self._progress = {stage.name: 0 for stage in stages}
+        self._lock = threading.Lock()
+
+    def progress(self, stage_name):
+        """Number of items that have left the given stage, successfully or not"""
+        with self._lock:
+            return self._progress[stage_name]
+
+    def _advance(self, index, item):
+        with self._lock:
+            self._progress[self.stages[index].name] += 1
+        if index + 1 < len(self.stages):
+            self._queues[index + 1].put(item)
+        else:
+            self._results.put(StageResult(item))
+
+    def _fail(self, index, item, error):
+        with self._lock:
+            self._progress[self.stages[index].name] += 1
+        self._results.put(StageResult(item, self.stages[index].name, error))
+
+    def _run_worker(self, index):
+        stage = self.stages[index]
+        inbox = self._queues[index]
+        while True:
+            item = inbox.get()
+            if item is _DONE:
+                # Let sibling workers see the marker too
+                inbox.put(_DONE)
+                return
+            try:
+                self._advance(index, stage.func(item))
+            except Exception as e:
+                self._fail(index, item, str(e))
+
+    def _run_batch_worker(self, index):
+        stage = self.stages[index]
+        inbox = self._queues[index]
+        batch = []
+        finished = False
+        while not finished:
+            deadline = time.monotonic() + stage.linger
+            while len(batch) < stage.batch_size:
+                try:
+                    item = inbox.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if item is _DONE:
+                    inbox.put(_DONE)
+                    finished = True
+                    break
+                batch.append(item)
+            if not batch:
+                continue
+            try:
+                for item, success, error in stage.func(batch):
+                    if success:
+                        self._advance(index, item)
+                    else:
+                        self._fail(index, item, error)
+            except Exception as e:
+                for item in batch:
+                    self._fail(index, item, str(e))
+            batch = []
+
+    def _run_stage(self, index, executor):
+        stage = self.stages[index]
+        target = self._run_batch_worker if stage.batch_size else self._run_worker
+        workers = [executor.submit(target, index) for _ in range(stage.workers)]
+        for worker in workers:
+            worker.result()
+        # Every worker of this stage is done, so the next stage gets no more input
+        if index + 1 < len(self.stages):
+            self._queues[index + 1].put(_DONE)
+        else:
+            self._results.put(_DONE)
+
+    def _feed(self, items):
+        try:
+            for item in items:
+                self._queues[0].put(item)
+        finally:
+            self._queues[0].put(_DONE)
+
+    def run(self, items):
+        """Yield a StageResult for every item as soon as it completes or fails"""
+        total_workers = sum(stage.workers for stage in self.stages)
+        with ThreadPoolExecutor(max_workers=total_workers + len(self.stages) + 1) as executor:
+            executor.submit(self._feed, items)
+            for index in range(len(self.stages)):
+                executor.submit(self._run_stage, index, executor)
+            while True:
+                result = self._results.get()
+                if result is _DONE:
+                    break
+                yield result
@@ -0,0 +1,157 @@
+import json
+import os
+import threading
+
+import fitz  # PyMuPDF
+from PIL import Image, ImageOps
+
+from utils.cert_utils import PAYLOAD_KEY, QR_BOX
+
+# Extra points around QR_BOX when rendering only that region
+CLIP_MARGIN = 18
+# Quiet zone added around embedded QR images; the generator only leaves a 2-module border
+QUIET_ZONE = 20
+# Embedded images larger than this (in pixels per side) are not QR candidates
+MAX_EMBEDDED_SIZE = 1024
+
+
+class PyzbarDecoder:
+    name = "pyzbar"
+
+    def __init__(self):
+        from pyzbar.pyzbar import ZBarSymbol, decode
+        self._decode = decode
+        self._symbols = [ZBarSymbol.QRCODE]
+
+    def decode(self, image):
+        return [obj.data.decode("utf-8") for obj in self._decode(image, symbols=self._symbols)]
+
+
+class OpenCVDecoder:
+    name = "opencv"
+
+    def __init__(self):
+        import cv2
+        import numpy
+        self._numpy = numpy
+        self._detector = cv2.QRCodeDetector()
+
+    def decode(self, image):
+        text, _, _ = self._detector.detectAndDecode(self._numpy.asarray(image.convert("L")))
+        return [text] if text else []
+
+
+DECODERS = {"pyzbar": PyzbarDecoder, "opencv": OpenCVDecoder}
+
+_decoders = {}
+_decoders_lock = threading.Lock()
+
+
+def get_decoder(name=None):
+    """Decoder instance by name, defaulting to QR_DECODER (pyzbar); one per process"""
+    name = name or os.getenv("QR_DECODER", "pyzbar")
+    with _decoders_lock:
+        if name not in _decoders:
+            _decoders[name] = DECODERS[name]()
+        return _decoders[name]
+
+
+def _parse(texts):
+    for text in texts:
+        try:
+            payload = json.loads(text.strip())
+        except ValueError:
+            continue
+        if isinstance(payload, dict):
+            return payload
+    return None
+
+
+def _pixmap_to_image(pix):
+    if pix.alpha or pix.n not in (1, 3):
+        pix = fitz.Pixmap(fitz.csRGB, pix, 0)
+    mode = "L" if pix.n == 1 else "RGB"
+    return Image.frombytes(mode, [pix.width, pix.height], pix.samples)
+
+
+def qr_clip(page):
+    """QR_BOX plus a margin, in PyMuPDF page coordinates"""
+    x, y, size = QR_BOX
+    box = fitz.Rect(x - CLIP_MARGIN, y - CLIP_MARGIN, x + size + CLIP_MARGIN, y + size + CLIP_MARGIN)
+    return (box * page.transformation_matrix) & page.rect
+
+
+def _try_metadata(document, decoder, stats):
+    """
+    The payload the generator also writes into the document info. Like the
+    QR code it is only a claim; the verifier confirms it against the chain.
+    Re-saved or scanned copies lose it and fall through to the image paths.
+    """
+    kind, value = document.xref_get_key(-1, "Info")
+    if kind != "xref":
+        return None
+    kind, text = document.xref_get_key(int(value.split()[0]), PAYLOAD_KEY.lstrip("/"))
+    return _parse([text]) if kind == "string" else None
+
+
+def _try_embedded(document, decoder, stats):
+    """
+    Decode the QR image XObject straight from the file, without rendering.
+    Images are picked from page 1's resources rather than by position,
+    since locating them would mean interpreting the whole template content
+    stream; the QR code is the small square one, so those are tried first.
+    """
+    images = [image for image in document[0].get_images(full=True)
+              if image[2] == image[3] and image[2] <= MAX_EMBEDDED_SIZE]
+    for image in sorted(images, key=lambda image: image[2]):
+        pil_image = _pixmap_to_image(fitz.Pixmap(document, image[0]))
+        stats["pixels"] += pil_image.width * pil_image.height
+        payload = _parse(decoder.decode(ImageOps.expand(pil_image, border=QUIET_ZONE, fill="white")))
+        if payload:
+            return payload
+    return None
+
+
+def _try_render(document, decoder, stats, zoom, clip_only):
+    pages = [document[0]] if clip_only else document
+    for page in pages:
+        pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), clip=qr_clip(page) if clip_only else None)
+        stats["pixels"] += pix.width * pix.height
+        payload = _parse(decoder.decode(_pixmap_to_image(pix)))
+        if payload:
+            return payload
+    return None
+
+
+# Cheapest first: the document metadata, the embedded image, the rendered QR region, then whole pages
+STRATEGIES = (
+    ("metadata", _try_metadata, {}),
+    ("embedded", _try_embedded, {}),
+    ("clip", _try_render, {"zoom": 3, "clip_only": True}),
+    ("page", _try_render, {"zoom": 2, "clip_only": False}),
+    ("page_hires", _try_render, {"zoom": 4, "clip_only": False}),
+)
+
+
+def decode_qr_payload(pdf, decoder=None, stats=None, strategies=STRATEGIES):
+    """
+    QR payload (a dict) from a certificate PDF given as a path or bytes, or
+    None. Tries each of `strategies` until one decodes; `stats`, when given,
+    receives the winning strategy and the number of pixels decoded.
+    """
+    decoder = decoder or get_decoder()
+    stats = stats if stats is not None else {}
+    stats.update(strategy=None, pixels=0)
+    if isinstance(pdf, bytes):
+        document = fitz.open(stream=pdf, filetype="pdf")
+    else:
+        document = fitz.open(pdf)
+    with document:
+        if not len(document):
+            return None
+        for name, strategy, options in strategies:
+            payload = strategy(document, decoder, stats, **options)
+            if payload:
+                stats["strategy"] = name
+                return payload
+    return None
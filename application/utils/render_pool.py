@@ -0,0 +1,72 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from utils.cert_utils import CertificateTemplate, register_fonts
+
+# Template held by each worker process, warmed once in the initializer
+_worker_template = None
+
+
+def _init_worker(template_path):
+    global _worker_template
+    register_fonts()
+    _worker_template = CertificateTemplate(template_path)
+    # Parse the template now so the first chunk does not pay for it
+    _worker_template._load_if_changed()
+
+
+def _render_chunk(certificates):
+    """Render a chunk of certificates; returns (success, pdf_bytes or error) per certificate"""
+    results = []
+    for certificate_data in certificates:
+        try:
+            results.append((True, _worker_template.render(certificate_data)))
+        except Exception as e:
+            results.append((False, str(e)))
+    return results
+
+
+class RenderPool:
+    """
+    Renders certificates across worker processes. Each worker keeps a warm
+    template and font cache and sends back PDF bytes; results come back in
+    the same order as the input.
+    """
+
+    def __init__(self, template_path, processes=None, chunk_size=8):
+        self.processes = processes or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.processes,
+            # Forking the threaded page or job worker could copy a lock held by another thread into the child
+            mp_context=multiprocessing.get_context("forkserver"),
+            initializer=_init_worker,
+            initargs=(template_path,)
+        )
+
+    def render_many(self, certificates):
+        """Yield (success, pdf_bytes or error) for every certificate, in input order"""
+        certificates = list(certificates)
+        chunks = [certificates[i:i + self.chunk_size] for i in range(0, len(certificates), self.chunk_size)]
+        # map keeps submission order even though chunks finish out of order
+        for chunk_results in self._executor.map(_render_chunk, chunks):
+            yield from chunk_results
+
+    def shutdown(self):
+        self._executor.shutdown()
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_render_pool(template_path):
+    """Process-wide RenderPool; size from RENDER_POOL_PROCESSES, defaulting to the CPU count"""
+    key = os.path.abspath(template_path)
+    with _pools_lock:
+        if key not in _pools:
+            processes = int(os.getenv("RENDER_POOL_PROCESSES", "0")) or None
+            _pools[key] = RenderPool(template_path, processes=processes)
+        return _pools[key]
@@ -0,0 +1,171 @@
+import itertools
+import json
+import threading
+
+import requests
+from eth_utils.abi import get_abi_output_types
+from web3.exceptions import ContractLogicError
+
+# Successful chunks in a row after which a lowered chunk-size ceiling is raised again
+CEILING_RECOVERY_SUCCESSES = 50
+
+# aggregate3 from the Multicall helper contract (contracts/Multicall.sol)
+MULTICALL_ABI = [{
+    "name": "aggregate3",
+    "type": "function",
+    "stateMutability": "payable",
+    "inputs": [{
+        "name": "calls",
+        "type": "tuple[]",
+        "components": [
+            {"name": "target", "type": "address"},
+            {"name": "allowFailure", "type": "bool"},
+            {"name": "callData", "type": "bytes"}
+        ]
+    }],
+    "outputs": [{
+        "name": "returnData",
+        "type": "tuple[]",
+        "components": [
+            {"name": "success", "type": "bool"},
+            {"name": "returnData", "type": "bytes"}
+        ]
+    }]
+}]
+
+
+class BatchReader:
+    """
+    Runs many read-only contract calls in one round trip: a single
+    aggregate3 eth_call when a Multicall contract address is given,
+    otherwise one JSON-RPC batch of eth_calls. Calls that revert come back
+    as None. The chunk size starts at max_batch_size and halves whenever the
+    node rejects a chunk (batch limits, gas cap, payload size); it grows
+    back after successes but stays below the smallest size that failed.
+    That ceiling is doubled again after a run of successful chunks, since
+    a rejection may have been a passing one, and timeouts or dropped
+    connections do not lower it at all.
+    """
+
+    def __init__(self, web3, contract, multicall_address=None, max_batch_size=200, timeout=30, session=None):
+        self.web3 = web3
+        self.contract = contract
+        self.max_batch_size = max_batch_size
+        self.batch_size = max_batch_size
+        # Largest chunk size not yet known to fail on this node
+        self._ceiling = max_batch_size
+        self._successes = 0
+        self.timeout = timeout
+        self.multicall = web3.eth.contract(address=multicall_address, abi=MULTICALL_ABI) if multicall_address else None
+        self._session = session or requests.Session()
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+
+    def call_many(self, calls):
+        """Results for a list of (function_name, args) calls, in order; None where the call reverted"""
+        calls = list(calls)
+        results = []
+        start = 0
+        while start < len(calls):
+            with self._lock:
+                size = self.batch_size
+            chunk = calls[start:start + size]
+            try:
+                results.extend(self._call_chunk(chunk))
+            except Exception as e:
+                if size == 1:
+                    raise
+                with self._lock:
+                    if not isinstance(e, (requests.ConnectionError, requests.Timeout)):
+                        self._ceiling = min(self._ceiling, size - 1)
+                    self._successes = 0
+                    self.batch_size = max(min(self.batch_size, size) // 2, 1)
+                print(f"Batch of {size} reads failed, retrying with {self.batch_size}: {e}")
+                continue
+            start += len(chunk)
+            with self._lock:
+                self._successes += 1
+                if self._ceiling < self.max_batch_size and self._successes >= CEILING_RECOVERY_SUCCESSES:
+                    self._ceiling = min(self._ceiling * 2, self.max_batch_size)
+                    self._successes = 0
+                self.batch_size = min(self.batch_size * 2, self._ceiling)
+        return results
+
+    def _call_chunk(self, chunk):
+        encoded = [(self.contract.encode_abi(name, args=list(args)), self._output_types(name)) for name, args in chunk]
+        if self.multicall is not None:
+            raw_results = self._multicall(encoded)
+        else:
+            raw_results = self._rpc_batch(encoded)
+        return [None if raw is None else self.web3.codec.decode(output_types, raw) for raw, (_, output_types) in zip(raw_results, encoded)]
+
+    def _output_types(self, name):
+        return get_abi_output_types(self.contract.get_function_by_name(name).abi)
+
+    def _multicall(self, encoded):
+        calls = [(self.contract.address, True, bytes.fromhex(data[2:])) for data, _ in encoded]
+        return [return_data if success else None
+                for success, return_data in self.multicall.functions.aggregate3(calls).call()]
+
+    def _rpc_batch(self, encoded):
+        if not hasattr(self.web3.provider, "endpoint_uri"):
+            # Non-HTTP providers cannot take a raw batch; fall back to one call each
+            return [self._single_call(data) for data, _ in encoded]
+        payload = []
+        for data, _ in encoded:
+            payload.append({
+                "jsonrpc": "2.0",
+                "id": next(self._ids),
+                "method": "eth_call",
+                "params": [{"to": self.contract.address, "data": data}, "latest"]
+            })
+        response = self._session.post(
+            self.web3.provider.endpoint_uri,
+            data=json.dumps(payload),
+            headers={"Content-Type": "application/json"},
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+        replies = response.json()
+        if not isinstance(replies, list):
+            # Nodes that refuse batches (or this batch size) answer with a single error object
+            raise ValueError(replies.get("error", replies))
+        by_id = {reply.get("id"): reply for reply in replies}
+        results = []
+        for request in payload:
+            reply = by_id.get(request["id"])
+            if reply is None:
+                raise ValueError("Node dropped requests from the batch")
+            if "result" in reply:
+                results.append(bytes.fromhex(reply["result"][2:]))
+            elif "revert" in str(reply["error"].get("message", "")).lower() or reply["error"].get("code") == 3:
+                # A revert of this call only, e.g. getCertificate for an unknown ID
+                results.append(None)
+            else:
+                # Rate limits and batch limits show up per request; let call_many shrink the batch
+                raise ValueError(reply["error"])
+        return results
+
+    def _single_call(self, data):
+        try:
+            return bytes(self.web3.eth.call({"to": self.contract.address, "data": data}))
+        except ContractLogicError:
+            # A revert of this call only, as in _rpc_batch; anything else is left to call_many
+            return None
+
+    def get_certificates(self, certificate_ids):
+        """getCertificate for many IDs; maps each ID to its tuple, or None when it does not exist"""
+        certificate_ids = list(certificate_ids)
+        results = self.call_many(("getCertificate", (certificate_id,)) for certificate_id in certificate_ids)
+        return {certificate_id: result for certificate_id, result in zip(certificate_ids, results)}
+
+    def is_verified_many(self, certificate_ids):
+        certificate_ids = list(certificate_ids)
+        results = self.call_many(("isVerified", (certificate_id,)) for certificate_id in certificate_ids)
+        return {certificate_id: bool(result and result[0]) for certificate_id, result in zip(certificate_ids, results)}
+
+    def revoked_leaves(self, leaves):
+        """The subset of the given hex leaves that revokedLeaves reports as revoked"""
+        leaves = list(leaves)
+        results = self.call_many(("revokedLeaves", (bytes.fromhex(leaf),)) for leaf in leaves)
+        return {leaf for leaf, result in zip(leaves, results) if result and result[0]}
@@ -0,0 +1,117 @@
+import os
+import threading
+
+import requests
+from dotenv import load_dotenv
+
+from utils.cid_utils import CHUNK_SIZE, cid_path, compute_cid
+from utils.pinata_utils import get_pinata_client
+
+load_dotenv()
+
+IPFS_GATEWAY = os.getenv("IPFS_GATEWAY", "https://gateway.pinata.cloud/ipfs")
+
+
+class PinataStorage:
+    """
+    Certificate storage on IPFS through Pinata. Every backend provides
+    pin(data, name) -> cid, unpin(cid) -> bool, fetch(cid) -> iterator of
+    byte chunks, exists(cid) -> bool, url(cid) -> public link, and
+    max_concurrency, the number of pins worth running in parallel.
+    """
+
+    def __init__(self, api_key=None, api_secret=None, gateway=IPFS_GATEWAY, timeout=30, client=None):
+        self.client = client or get_pinata_client(api_key, api_secret)
+        self.gateway = gateway.rstrip("/")
+        self.timeout = timeout
+        # Gateway reads must not carry the API credentials
+        self.session = requests.Session()
+
+    @property
+    def max_concurrency(self):
+        return self.client.max_concurrency
+
+    def pin(self, data, name="certificate.pdf"):
+        return self.client.pin(data, name)
+
+    def unpin(self, cid):
+        return self.client.unpin(cid)
+
+    def fetch(self, cid):
+        with self.session.get(self.url(cid), timeout=self.timeout, stream=True) as response:
+            response.raise_for_status()
+            yield from response.iter_content(CHUNK_SIZE)
+
+    def exists(self, cid):
+        return self.client.is_pinned(cid)
+
+    def url(self, cid):
+        return f"{self.gateway}/{cid}"
+
+
+class LocalStorage:
+    """
+    Content-addressed storage in a local directory, one file per CID as
+    `ipfs add` would compute it. For offline runs, tests and benchmarks;
+    `gateway` is only used to build links.
+    """
+
+    def __init__(self, directory="ipfs_store", gateway=IPFS_GATEWAY, cid_version=0, max_concurrency=4):
+        self.directory = directory
+        self.gateway = gateway.rstrip("/")
+        self.cid_version = cid_version
+        self.max_concurrency = max_concurrency
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, cid):
+        return cid_path(self.directory, cid)
+
+    def pin(self, data, name="certificate.pdf"):
+        cid = compute_cid(data, self.cid_version)
+        path = self.path(cid)
+        if not os.path.exists(path):
+            temp_path = f"{path}.{threading.get_ident()}.part"
+            with open(temp_path, "wb") as file:
+                file.write(data)
+            os.replace(temp_path, path)
+        return cid
+
+    def unpin(self, cid):
+        try:
+            os.remove(self.path(cid))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def fetch(self, cid):
+        with open(self.path(cid), "rb") as file:
+            while chunk := file.read(CHUNK_SIZE):
+                yield chunk
+
+    def exists(self, cid):
+        return os.path.exists(self.path(cid))
+
+    def url(self, cid):
+        return f"{self.gateway}/{cid}"
+
+
+STORAGE_BACKENDS = {"pinata": PinataStorage, "local": LocalStorage}
+
+_storage = None
+_storage_lock = threading.Lock()
+
+
+def get_storage():
+    """
+    Process-wide storage backend named by STORAGE_BACKEND: "pinata" (the
+    default) or "local", which keeps files in LOCAL_STORAGE_DIR.
+    """
+    global _storage
+    with _storage_lock:
+        if _storage is None:
+            backend = os.getenv("STORAGE_BACKEND", "pinata")
+            if backend == "local":
+                _storage = LocalStorage(os.getenv("LOCAL_STORAGE_DIR", "ipfs_store"))
+            else:
+                _storage = STORAGE_BACKENDS[backend]()
+        return _storage
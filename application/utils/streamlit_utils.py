@@ -1,14 +1,19 @@
 import streamlit as st
 import base64
-import requests
 import os
-from connection import contract
+from utils.chain_cache import get_certificate
+from utils.cid_utils import compute_cid
+from utils.ipfs_cache import get_pdf_cache
 
 
 def displayPDF(file):
     # Opening file from file path
     with open(file, "rb") as f:
-        base64_pdf = base64.b64encode(f.read()).decode('utf-8')
+        display_pdf_bytes(f.read())
+
+
+def display_pdf_bytes(pdf_bytes):
+    base64_pdf = base64.b64encode(pdf_bytes).decode('utf-8')
 
     # Embedding PDF in HTML
     pdf_display = F'<iframe src="data:application/pdf;base64,{base64_pdf}" width="700" height="1000" type="application/pdf"></iframe>'
@@ -17,18 +22,46 @@ def displayPDF(file):
     st.markdown(pdf_display, unsafe_allow_html=True)
 
 
-def view_certificate(certificate_id):
-    # Smart Contract Call
-    result = contract.functions.getCertificate(certificate_id).call()
-    ipfs_hash = result[4]
+# Served by Streamlit at app/static/ when server.enableStaticServing is on
+STATIC_DIR = "static"
+
+
+def static_url(path):
+    """Relative URL Streamlit serves a file under STATIC_DIR at, or None when it cannot"""
+    if not st.get_option("server.enableStaticServing"):
+        return None
+    relative_path = os.path.relpath(path, STATIC_DIR)
+    if relative_path.startswith(".."):
+        return None
+    return "app/static/" + relative_path.replace(os.sep, "/")
+
+
+def display_certificate(pdf):
+    """
+    Show a certificate given as bytes or as a file path. Files under
+    STATIC_DIR are streamed to the browser by Streamlit's static file
+    server instead of being inlined as base64; bytes are first stored in
+    the PDF cache under their CID.
+    """
+    if isinstance(pdf, bytes):
+        pdf = get_pdf_cache().put(compute_cid(pdf), pdf)
+    url = static_url(pdf)
+    if url is None:
+        displayPDF(pdf)
+        return
+    st.markdown(f'<iframe src="{url}" width="700" height="1000" type="application/pdf"></iframe>', unsafe_allow_html=True)
+
+
+def view_certificate(certificate_id, ipfs_hash=None):
+    if ipfs_hash is None:
+        # Smart Contract Call, served from the shared read cache when possible
+        result = get_certificate(certificate_id)
+        if result is None:
+            raise ValueError("Certificate with this ID does not exist")
+        ipfs_hash = result[4]
 
-    pinata_gateway_base_url = 'https://gateway.pinata.cloud/ipfs'
-    content_url = f"{pinata_gateway_base_url}/{ipfs_hash}"
-    response = requests.get(content_url)
-    with open("temp.pdf", 'wb') as pdf_file:
-        pdf_file.write(response.content)
-    displayPDF("temp.pdf")
-    os.remove("temp.pdf")
+    # Served from the local CID cache; only the first view of a certificate downloads it
+    display_certificate(get_pdf_cache().fetch(ipfs_hash))
 
 
 def hide_icons():
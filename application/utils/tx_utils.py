@@ -0,0 +1,239 @@
+import heapq
+import os
+import threading
+import time
+from concurrent.futures import Future
+
+from web3.exceptions import TransactionNotFound
+
+from connection import w3
+from utils.job_store import get_job_store
+
+# Margin added to estimate_gas so small state changes between estimate and mining do not fail the transaction
+GAS_MARGIN = 1.2
+# How long a transaction may be unknown to the node before its nonce is treated as a gap
+GAP_TIMEOUT = 15
+# Seconds a caller waits for a receipt before giving up on the transaction
+RECEIPT_TIMEOUT = int(os.getenv("TX_RECEIPT_TIMEOUT", "120"))
+# Fresh nonces tried when another sender on the same account took the reserved one
+NONCE_RETRIES = 3
+
+
+def _nonce_too_low(error):
+    return "nonce too low" in str(error).lower()
+
+
+def _already_known(error):
+    message = str(error).lower()
+    return "already known" in message or "known transaction" in message
+
+
+class PendingTransaction:
+    def __init__(self, nonce, tx_params, contract_function, tag, holds_slot=True):
+        self.nonce = nonce
+        self.tx_params = tx_params
+        self.contract_function = contract_function
+        self.tag = tag
+        # Gap fillers are sent by the receipt collector and never wait for a window slot
+        self.holds_slot = holds_slot
+        self.tx_hash = None
+        self.submitted_at = None
+        self.future = Future()
+
+
+class TransactionSubmitter:
+    """
+    Submits contract transactions with locally tracked nonces, keeping up to
+    `window` of them in flight. A background thread collects receipts and
+    resolves each submission's Future with its receipt. With a
+    `nonce_store` (the job store), nonces are allocated through it so
+    several processes can send from the same account.
+    """
+
+    def __init__(self, web3, sender=None, window=16, poll_interval=0.2, nonce_store=None):
+        self.w3 = web3
+        self.sender = sender or web3.eth.accounts[0]
+        self.poll_interval = poll_interval
+        self.nonce_store = nonce_store
+        self._slots = threading.BoundedSemaphore(window)
+        self._lock = threading.Condition()
+        self._next_nonce = web3.eth.get_transaction_count(self.sender, "pending")
+        if nonce_store is not None:
+            nonce_store.sync_nonce(self.sender, self._next_nonce)
+        # Nonces reserved by submissions that never reached the node
+        self._gaps = []
+        self._in_flight = {}
+        self._collector = threading.Thread(target=self._collect_receipts, daemon=True)
+        self._collector.start()
+
+    def _nonce_used(self, nonce):
+        return self.w3.eth.get_transaction_count(self.sender, "pending") > nonce
+
+    def _resync(self):
+        """Skip nonces spent outside this submitter, e.g. by another process sending from the same account"""
+        count = self.w3.eth.get_transaction_count(self.sender, "pending")
+        with self._lock:
+            self._gaps = [nonce for nonce in self._gaps if nonce >= count]
+            heapq.heapify(self._gaps)
+            if count > self._next_nonce:
+                print(f"Nonce resynced from {self._next_nonce} to {count}")
+                self._next_nonce = count
+
+    def _release_nonce(self, nonce):
+        """A failed send leaves a gap only if the node never took the nonce"""
+        try:
+            if self._nonce_used(nonce):
+                return
+        except Exception:
+            pass
+        with self._lock:
+            heapq.heappush(self._gaps, nonce)
+
+    def _finish(self, pending):
+        with self._lock:
+            self._in_flight.pop(pending.nonce, None)
+            self._lock.notify_all()
+        if pending.holds_slot:
+            self._slots.release()
+
+    def _reserve_nonce(self):
+        with self._lock:
+            if self._gaps:
+                return heapq.heappop(self._gaps)
+            nonce = self._next_nonce
+            if self.nonce_store is not None:
+                nonce = self.nonce_store.reserve_nonce(self.sender, nonce)
+            self._next_nonce = nonce + 1
+            return nonce
+
+    def _send(self, pending):
+        pending.tx_params["nonce"] = pending.nonce
+        if pending.contract_function is None:
+            pending.tx_hash = self.w3.eth.send_transaction(pending.tx_params)
+        else:
+            pending.tx_hash = pending.contract_function.transact(pending.tx_params)
+        pending.submitted_at = time.monotonic()
+
+    def submit(self, contract_function, tag=None, gas=None):
+        """
+        Queue a contract function call and return a Future resolving to its
+        receipt. Blocks while the in-flight window is full.
+        """
+        # Estimate before reserving a nonce so a reverting call never leaves a gap
+        if gas is None:
+            gas = int(contract_function.estimate_gas({"from": self.sender}) * GAS_MARGIN)
+        self._slots.acquire()
+        for attempt in range(NONCE_RETRIES + 1):
+            pending = PendingTransaction(self._reserve_nonce(), {"from": self.sender, "gas": gas}, contract_function, tag)
+            try:
+                self._send(pending)
+                break
+            except Exception as e:
+                if _nonce_too_low(e) or _already_known(e):
+                    # The nonce is spent, so it is not a gap; move past everything the node has seen
+                    self._resync()
+                    if _nonce_too_low(e) and attempt < NONCE_RETRIES:
+                        continue
+                else:
+                    self._release_nonce(pending.nonce)
+                self._slots.release()
+                pending.future.set_exception(e)
+                return pending.future
+        with self._lock:
+            self._in_flight[pending.nonce] = pending
+            self._lock.notify()
+        return pending.future
+
+    def _fill_gaps(self, below=None):
+        """
+        Send a zero-value self transfer for every gap (below `below` only, if
+        given) so the transactions queued behind it can be mined.
+        """
+        with self._lock:
+            gaps = [nonce for nonce in self._gaps if below is None or nonce < below]
+            self._gaps = [nonce for nonce in self._gaps if below is not None and nonce >= below]
+            heapq.heapify(self._gaps)
+        for nonce in gaps:
+            pending = PendingTransaction(nonce, {"from": self.sender, "to": self.sender, "value": 0}, None, None, holds_slot=False)
+            try:
+                if self._nonce_used(nonce):
+                    continue
+                self._send(pending)
+            except Exception as e:
+                if not (_nonce_too_low(e) or _already_known(e)):
+                    print(f"Filling nonce gap {nonce} failed: {e}")
+                    with self._lock:
+                        heapq.heappush(self._gaps, nonce)
+                continue
+            with self._lock:
+                self._in_flight[nonce] = pending
+                self._lock.notify()
+
+    def flush(self, timeout=None):
+        """Fill any nonce gaps and wait until every submitted transaction has a receipt"""
+        self._fill_gaps()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            while self._in_flight:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError(f"{len(self._in_flight)} transactions still pending")
+                self._lock.wait(remaining)
+
+    def _collect_receipts(self):
+        while True:
+            with self._lock:
+                while not self._in_flight:
+                    self._lock.wait()
+                in_flight = sorted(self._in_flight.values(), key=lambda pending: pending.nonce)
+                blocked = self._gaps and self._gaps[0] < in_flight[-1].nonce
+            if blocked:
+                # No later submission took the gap, and in-flight transactions wait behind it
+                self._fill_gaps(below=in_flight[-1].nonce)
+            for pending in in_flight:
+                try:
+                    receipt = self.w3.eth.get_transaction_receipt(pending.tx_hash)
+                except TransactionNotFound:
+                    self._check_gap(pending)
+                    continue
+                except Exception:
+                    continue
+                self._finish(pending)
+                pending.future.set_result(receipt)
+            time.sleep(self.poll_interval)
+
+    def _check_gap(self, pending):
+        # A transaction the node no longer knows about blocks every later nonce, so send it again
+        if time.monotonic() - pending.submitted_at < GAP_TIMEOUT:
+            return
+        try:
+            self.w3.eth.get_transaction(pending.tx_hash)
+            return
+        except TransactionNotFound:
+            pass
+        if self.w3.eth.get_transaction_count(self.sender, "latest") > pending.nonce:
+            # Nonce was consumed by something else; the original can never be mined
+            self._finish(pending)
+            pending.future.set_exception(RuntimeError(f"Transaction with nonce {pending.nonce} was dropped"))
+            return
+        print(f"Resubmitting dropped transaction with nonce {pending.nonce}")
+        try:
+            self._send(pending)
+        except Exception as e:
+            print(f"Resubmission of nonce {pending.nonce} failed: {e}")
+
+
+_submitter = None
+_submitter_lock = threading.Lock()
+
+
+def get_submitter():
+    """
+    Process-wide submitter so every session shares one nonce sequence; the
+    page and the job worker share it through the job store
+    """
+    global _submitter
+    with _submitter_lock:
+        if _submitter is None:
+            _submitter = TransactionSubmitter(w3, window=int(os.getenv("TX_IN_FLIGHT_WINDOW", "16")), nonce_store=get_job_store())
+        return _submitter
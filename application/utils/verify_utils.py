@@ -0,0 +1,239 @@
+import asyncio
+import hashlib
+import os
+import threading
+
+import aiohttp
+from web3 import AsyncHTTPProvider, AsyncWeb3
+from web3.exceptions import ContractLogicError
+
+from connection import contract, w3
+from utils.chain_cache import get_read_cache
+from utils.chain_utils import anchored_roots, is_merkle_root_anchored
+from utils.ipfs_cache import get_pdf_cache
+from utils.merkle_utils import leaf_hash, verify_proof
+from utils.qr_utils import decode_qr_payload
+from utils.storage import IPFS_GATEWAY
+
+
+
+def extract_qr_code_from_pdf(pdf_path, decoder=None, stats=None):
+    """Decoded QR payload of the certificate, or None. Takes a path or the PDF bytes."""
+    try:
+        return decode_qr_payload(pdf_path, decoder=decoder, stats=stats)
+    except Exception as e:
+        print(f"Error extracting QR code from PDF: {e}")
+        return None
+
+
+def compute_certificate_id(qr_data):
+    data_to_hash = f"{qr_data['registration_no']}{qr_data['student_name']}{qr_data['course_name']}{qr_data['institution']}".encode('utf-8')
+    return hashlib.sha256(data_to_hash).hexdigest()
+
+
+def match_details(certificate_details, qr_data):
+    """Compare on-chain details with the QR payload; returns (is_valid, details or reason)"""
+    if certificate_details is None or not certificate_details[0]:
+        return False, "Certificate with this ID does not exist"
+    if (certificate_details[0] == qr_data["registration_no"] and
+            certificate_details[1] == qr_data["student_name"] and
+            certificate_details[2] == qr_data["course_name"] and
+            certificate_details[3] == qr_data["institution"]):
+        return True, certificate_details
+    # Log the mismatched details
+    print(f"Mismatch Details: Registration No: {certificate_details[0]} != {qr_data['registration_no']}, "
+          f"Full Name: {certificate_details[1]} != {qr_data['student_name']}, "
+          f"Course Name: {certificate_details[2]} != {qr_data['course_name']}, "
+          f"Institution: {certificate_details[3]} != {qr_data['institution']}")
+    return False, "Certificate details mismatch"
+
+
+def check_merkle_proof(qr_data):
+    """Offline part of Merkle verification; returns (leaf, None) or (None, reason)"""
+    # The leaf must be derived from the printed details, not trusted from the QR code
+    certificate_id = compute_certificate_id(qr_data)
+    if certificate_id != qr_data["certificate_id"]:
+        return None, "Certificate details mismatch"
+    leaf = leaf_hash(certificate_id)
+    if not verify_proof(leaf, qr_data["merkle_proof"], qr_data["merkle_root"]):
+        return None, "Invalid Merkle inclusion proof"
+    return leaf, None
+
+
+def check_merkle_record(record):
+    """
+    Lookup by ID of a Merkle-anchored certificate, which has no entry of its
+    own on chain (isVerified is false for it): the stored record's leaf must
+    derive from the ID, its batch root be anchored and the leaf not revoked.
+    Returns (is_valid, reason).
+    """
+    leaf = leaf_hash(record["certificate_id"])
+    if leaf != record["merkle_leaf"]:
+        return False, "Certificate details mismatch"
+    if not is_merkle_root_anchored(record["merkle_root"]):
+        return False, "Certificate batch is not anchored on the blockchain"
+    if contract.functions.revokedLeaves(bytes.fromhex(leaf)).call():
+        return False, "Certificate has been revoked"
+    return True, None
+
+
+class AsyncVerifier:
+    """
+    Verification against the node and the IPFS gateway over one aiohttp
+    session. Independent lookups run concurrently: the chain read and the
+    PDF download when the IPFS hash is already known (e.g. from the local
+    event index), and the root and revocation checks of Merkle certificates.
+    PDFs are returned as bytes, or as the path of the cached file when a
+    `cache` (a CidCache) is given; certificate reads go through `read_cache`
+    (a ContractReadCache) when one is given. Anchored Merkle roots are
+    remembered in the set chain_utils.is_merkle_root_anchored uses. Use as an
+    async context manager.
+    """
+
+    def __init__(self, provider_uri=None, gateway=IPFS_GATEWAY, timeout=None, cache=None, read_cache=None):
+        self.provider_uri = provider_uri or w3.provider.endpoint_uri
+        self.gateway = gateway
+        self.cache = cache
+        self.read_cache = read_cache
+        self.timeout = timeout or float(os.getenv("WEB3_TIMEOUT", "30"))
+        self.session = None
+        self.contract = None
+
+    async def __aenter__(self):
+        self.session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.timeout))
+        provider = AsyncHTTPProvider(self.provider_uri)
+        # Node requests share the gateway's connection pool
+        await provider.cache_async_session(self.session)
+        self.contract = AsyncWeb3(provider).eth.contract(address=contract.address, abi=contract.abi)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.session.close()
+
+    async def _load_certificate(self, certificate_id):
+        try:
+            return tuple(await self.contract.functions.getCertificate(certificate_id).call())
+        except ContractLogicError:
+            return None
+
+    async def get_certificate(self, certificate_id):
+        """getCertificate as a tuple, or None when the certificate does not exist"""
+        if self.read_cache is None:
+            return await self._load_certificate(certificate_id)
+        return await self.read_cache.get_or_load_async(certificate_id, lambda: self._load_certificate(certificate_id))
+
+    async def is_merkle_root_anchored(self, root):
+        if root in anchored_roots:
+            return True
+        if await self.contract.functions.merkleRoots(bytes.fromhex(root)).call():
+            anchored_roots.add(root)
+            return True
+        return False
+
+    async def fetch_pdf(self, ipfs_hash):
+        if self.cache is not None:
+            # The cache's own download is shared with concurrent viewers of the same CID
+            return await asyncio.to_thread(self.cache.fetch, ipfs_hash)
+        async with self.session.get(f"{self.gateway}/{ipfs_hash}") as response:
+            response.raise_for_status()
+            return await response.read()
+
+    async def _details_and_pdf(self, certificate_id, ipfs_hash, accept=None):
+        """
+        Chain details plus the PDF, downloading speculatively when the hash is
+        known up front. No PDF is returned when the certificate is missing or
+        `accept(details)` is false.
+        """
+        pdf_task = asyncio.create_task(self.fetch_pdf(ipfs_hash)) if ipfs_hash else None
+        try:
+            details = await self.get_certificate(certificate_id)
+            if details is None or not details[4] or (accept and not accept(details)):
+                return details, None
+            if pdf_task and details[4] == ipfs_hash:
+                return details, await pdf_task
+            if pdf_task:
+                # Stale hint; the chain is authoritative
+                pdf_task.cancel()
+            return details, await self.fetch_pdf(details[4])
+        finally:
+            if pdf_task and not pdf_task.done():
+                pdf_task.cancel()
+
+    async def verify_merkle_certificate(self, qr_data):
+        leaf, reason = check_merkle_proof(qr_data)
+        if leaf is None:
+            return False, reason
+        anchored, revoked = await asyncio.gather(
+            self.is_merkle_root_anchored(qr_data["merkle_root"]),
+            self.contract.functions.revokedLeaves(bytes.fromhex(leaf)).call()
+        )
+        if not anchored:
+            return False, "Certificate batch is not anchored on the blockchain"
+        if revoked:
+            return False, "Certificate has been revoked"
+        return True, (qr_data["registration_no"], qr_data["student_name"], qr_data["course_name"], qr_data["institution"], "")
+
+    async def verify_certificate(self, qr_data, ipfs_hash=None, fetch_pdf=True):
+        """
+        Returns (is_valid, details or reason, pdf). Merkle-anchored
+        certificates have no stored PDF, so pdf is None for them.
+        """
+        try:
+            print(f"Verifying Certificate ID: {qr_data['certificate_id']}")
+            if "merkle_root" in qr_data:
+                is_valid, result = await self.verify_merkle_certificate(qr_data)
+                return is_valid, result, None
+            if fetch_pdf:
+                details, pdf = await self._details_and_pdf(
+                    qr_data["certificate_id"], ipfs_hash,
+                    # Only download the PDF of a certificate that matches
+                    accept=lambda details: tuple(details[:4]) == (qr_data["registration_no"], qr_data["student_name"], qr_data["course_name"], qr_data["institution"])
+                )
+            else:
+                details, pdf = await self.get_certificate(qr_data["certificate_id"]), None
+            is_valid, result = match_details(details, qr_data)
+            return is_valid, result, pdf
+        except Exception as e:
+            return False, str(e), None
+
+    async def view_certificate(self, certificate_id, ipfs_hash=None):
+        """(details, pdf) for a certificate ID; (None, None) when it is not on chain"""
+        details, pdf = await self._details_and_pdf(certificate_id, ipfs_hash)
+        if details is None or not details[4]:
+            return None, None
+        return details, pdf
+
+
+_verifier = None
+_verifier_loop = None
+_verifier_lock = threading.Lock()
+
+
+def get_verifier():
+    """
+    Process-wide AsyncVerifier shared by every Streamlit session, with the
+    read and PDF caches. It runs on its own event loop thread, so one
+    aiohttp session and its connection pool serve every verification.
+    Returns (verifier, loop).
+    """
+    global _verifier, _verifier_loop
+    with _verifier_lock:
+        if _verifier is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, daemon=True).start()
+            verifier = AsyncVerifier(cache=get_pdf_cache(), read_cache=get_read_cache())
+            asyncio.run_coroutine_threadsafe(verifier.__aenter__(), loop).result()
+            _verifier, _verifier_loop = verifier, loop
+        return _verifier, _verifier_loop
+
+
+def verify_certificate(qr_data, ipfs_hash=None, fetch_pdf=True):
+    """AsyncVerifier.verify_certificate on the shared verifier; blocks until it is done"""
+    verifier, loop = get_verifier()
+    return asyncio.run_coroutine_threadsafe(verifier.verify_certificate(qr_data, ipfs_hash=ipfs_hash, fetch_pdf=fetch_pdf), loop).result()
+
+
+def fetch_certificate(certificate_id, ipfs_hash=None):
+    """AsyncVerifier.view_certificate on the shared verifier; blocks until it is done"""
+    verifier, loop = get_verifier()
+    return asyncio.run_coroutine_threadsafe(verifier.view_certificate(certificate_id, ipfs_hash=ipfs_hash), loop).result()
@@ -11,8 +11,13 @@ contract Certification {
     }
 
     mapping(string => Certificate) public certificates;
+    // Merkle anchoring mode: only batch roots and revoked leaves are stored
+    mapping(bytes32 => bool) public merkleRoots;
+    mapping(bytes32 => bool) public revokedLeaves;
     event CertificateGenerated(string certificate_id, string registrationNo, string candidateName, string courseName, string institution, string ipfsHash);
     event CertificateInvalidated(string certificate_id);
+    event MerkleRootAnchored(bytes32 root, uint256 certificateCount);
+    event LeafRevoked(bytes32 leaf);
 
     function generateCertificate(
         string memory _certificate_id,
@@ -44,6 +49,41 @@ contract Certification {
         emit CertificateGenerated(_certificate_id, _registrationNo, _candidateName, _courseName, _institution, _ipfsHash);
     }
 
+    function generateCertificates(
+        string[] memory _certificate_ids,
+        string[] memory _registrationNos,
+        string[] memory _candidateNames,
+        string[] memory _courseNames,
+        string[] memory _institutions,
+        string[] memory _ipfsHashes
+    ) public {
+        uint256 count = _certificate_ids.length;
+        require(
+            _registrationNos.length == count &&
+            _candidateNames.length == count &&
+            _courseNames.length == count &&
+            _institutions.length == count &&
+            _ipfsHashes.length == count,
+            "Batch arrays must have the same length"
+        );
+
+        for (uint256 i = 0; i < count; i++) {
+            // Skip IDs that already exist so one duplicate does not revert the whole batch;
+            // callers read the emitted CertificateGenerated events to see which rows were stored
+            if (bytes(certificates[_certificate_ids[i]].ipfsHash).length != 0) {
+                continue;
+            }
+            generateCertificate(
+                _certificate_ids[i],
+                _registrationNos[i],
+                _candidateNames[i],
+                _courseNames[i],
+                _institutions[i],
+                _ipfsHashes[i]
+            );
+        }
+    }
+
     function getCertificate(string memory certificateId) public view returns (
         string memory registrationNo,
         string memory candidateName,
@@ -85,4 +125,16 @@ contract Certification {
     function certificateExists(string memory certificateId) public view returns (bool) {
         return bytes(certificates[certificateId].registrationNo).length > 0;
     }
+
+    function anchorMerkleRoot(bytes32 _root, uint256 _certificateCount) public {
+        require(!merkleRoots[_root], "Merkle root already anchored");
+        merkleRoots[_root] = true;
+        emit MerkleRootAnchored(_root, _certificateCount);
+    }
+
+    function revokeLeaf(bytes32 _leaf) public {
+        require(!revokedLeaves[_leaf], "Certificate leaf already revoked");
+        revokedLeaves[_leaf] = true;
+        emit LeafRevoked(_leaf);
+    }
 }
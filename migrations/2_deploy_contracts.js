@@ -1,5 +1,13 @@
+const fs = require("fs");
+const path = require("path");
 const Certification = artifacts.require("Certification");
 
-module.exports = function(deployer) {
-  deployer.deploy(Certification);
+// The application reads contract addresses from here (application/connection.py)
+const configPath = path.join(__dirname, "..", "application", "deployment_config.json");
+
+module.exports = async function(deployer) {
+  await deployer.deploy(Certification);
+  const config = fs.existsSync(configPath) ? JSON.parse(fs.readFileSync(configPath)) : {};
+  config.Certification = Certification.address;
+  fs.writeFileSync(configPath, JSON.stringify(config, null, 2));
 };
@@ -0,0 +1,12 @@
+const fs = require("fs");
+const path = require("path");
+const Multicall = artifacts.require("Multicall");
+
+const configPath = path.join(__dirname, "..", "application", "deployment_config.json");
+
+module.exports = async function(deployer) {
+  await deployer.deploy(Multicall);
+  const config = fs.existsSync(configPath) ? JSON.parse(fs.readFileSync(configPath)) : {};
+  config.Multicall = Multicall.address;
+  fs.writeFileSync(configPath, JSON.stringify(config, null, 2));
+};